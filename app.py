@@ -1,5 +1,6 @@
 from flask import Flask, request, jsonify, render_template
 from pymongo import MongoClient
+from sql2mongo.executor import execute
 import psycopg2
 import json
 import os
@@ -11,12 +12,14 @@ app = Flask(__name__)
 _parser = None
 _generator = None
 _mongo_db = None
+_schema_cache = None
 
 def get_parser():
+    # Pool of pre-built parsers: a single SqlParser is not safe across threads
     global _parser
     if _parser is None:
-        from sql2mongo.parser.sql_parser import SqlParser
-        _parser = SqlParser()
+        from sql2mongo.parser.parser_pool import ParserPool
+        _parser = ParserPool(size=int(os.getenv("PARSER_POOL_SIZE", "4")))
     return _parser
 
 def get_generator():
@@ -26,6 +29,14 @@ def get_generator():
         _generator = MongoDBGenerator()
     return _generator
 
+def get_schema_cache():
+    # Parsed schemas + analyzers, keyed on schema content; clients resend the same schema
+    global _schema_cache
+    if _schema_cache is None:
+        from sql2mongo.schema_cache import SchemaCache
+        _schema_cache = SchemaCache(maxsize=int(os.getenv("SCHEMA_CACHE_SIZE", "64")))
+    return _schema_cache
+
 def get_mongo_db():
     global _mongo_db
     if _mongo_db is None:
@@ -74,6 +85,16 @@ def get_schema():
     except Exception as e:
         return jsonify({"error": f"Schema error: {str(e)}"}), 500
 
+@app.route("/schemas", methods=["POST"])
+def register_schema():
+    # Raw JSON schema in the body; /run can then send {"schema_id": ...} instead
+    from sql2mongo.schema_loader import SchemaError
+    try:
+        schema_id = get_schema_cache().register(request.get_data())
+    except SchemaError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"schema_id": schema_id})
+
 @app.route("/run", methods=["POST"])
 def run_query():
     try:
@@ -83,22 +104,28 @@ def run_query():
 
         sql = data.get("sql", "").strip()
         schema = data.get("schema")
+        schema_id = data.get("schema_id")
 
-        if not sql or not schema:
+        if not sql or not (schema or schema_id):
             return jsonify({"error": "Missing sql or schema"}), 400
 
         print(f"[SQL] {sql}")
 
         # ── Transpile ──────────────────────────────────────
-        from sql2mongo.semantic.semantic_analyzer import SemanticAnalyzer
+        from sql2mongo.schema_loader import SchemaError
 
         parser    = get_parser()
         generator = get_generator()
-        analyzer  = SemanticAnalyzer(schema)
+        try:
+            cache = get_schema_cache()
+            entry = cache.get(schema_id) if schema_id else cache.load_dict(schema)
+        except SchemaError as e:
+            return jsonify({"error": str(e)}), 400
+        analyzer  = entry.analyzer
 
         ast        = parser.parse(sql)
-        analyzer.validate_query(ast)
-        mongo_data = generator.generate(ast)
+        analysis = analyzer.validate_query(ast)
+        mongo_data = generator.generate(ast, analysis)
 
         print(f"[MONGO] {mongo_data}")
 
@@ -116,18 +143,7 @@ def run_query():
         # ── Run Mongo ──────────────────────────────────────
         try:
             db = get_mongo_db()
-            if "pipeline" in mongo_data:
-                mongo_result = list(db[collection].aggregate(mongo_data["pipeline"]))
-            else:
-                cursor = db[collection].find(
-                    mongo_data.get("filter", {}),
-                    mongo_data.get("projection")
-                )
-                if "sort" in mongo_data:
-                    cursor = cursor.sort(list(mongo_data["sort"].items()))
-                if "limit" in mongo_data:
-                    cursor = cursor.limit(mongo_data["limit"])
-                mongo_result = list(cursor)
+            mongo_result = execute(db, mongo_data)
         except Exception as e:
             return jsonify({"error": f"Mongo error: {str(e)}"}), 500
 
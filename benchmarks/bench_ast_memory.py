@@ -0,0 +1,40 @@
+"""
+Bytes retained per parsed query AST, measured with tracemalloc.
+
+    python benchmarks/bench_ast_memory.py [queries]
+"""
+import os
+import sys
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from sql2mongo.parser.sql_parser import get_parser
+
+QUERIES = [
+    "SELECT name, age FROM users WHERE age > {n} AND city = 'Delhi';",
+    "SELECT city, COUNT(*) FROM users WHERE age > {n} GROUP BY city HAVING COUNT(*) > 2 ORDER BY COUNT(*) DESC LIMIT 10;",
+    "SELECT users.name, orders.amount FROM users JOIN orders ON users.id = orders.user_id WHERE orders.amount >= {n};",
+    "SELECT * FROM users WHERE id IN ({n}, 2, 3, 4, 5) OR age BETWEEN 18 AND {n};",
+    "SELECT * FROM users WHERE id IN (SELECT user_id FROM orders WHERE amount > {n});",
+]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    parser = get_parser()
+    texts = [QUERIES[i % len(QUERIES)].format(n=i) for i in range(count)]
+    parser.parse(texts[0])
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    asts = [parser.parse(q) for q in texts]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    retained = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    print(f"{count} ASTs retained {retained / 1024 / 1024:.2f} MB  ->  {retained / len(asts):.0f} bytes/query")
+
+
+if __name__ == "__main__":
+    main()
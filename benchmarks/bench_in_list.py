@@ -0,0 +1,71 @@
+"""
+`id IN (...)` with 10 to 1M values, inlined as $in against spilled to a
+temporary collection (see sql2mongo.codegen.in_list).
+
+For each list size it times translate (lex, parse, generate, optimize), the
+rendered mongosh string, and the query run through the in-process evaluator
+over a fixed users collection, once with the list inlined and once spilled.
+"doc" is the size of the inline filter as mongosh text, a stand-in for the
+BSON document a driver would send; MongoDB rejects documents over 16MB.
+
+    python benchmarks/bench_in_list.py [max values] [users]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from sql2mongo.codegen.evaluator import Evaluator
+from sql2mongo.codegen.mongodb_generator import MongoDBGenerator
+from sql2mongo.codegen.shell import format_shell
+from sql2mongo.transpiler import Transpiler
+
+SCHEMA = {"users": {"id": "int", "name": "string", "age": "int"}}
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def sql_for(values):
+    return "SELECT name FROM users WHERE age > 30 AND id IN (" + ", ".join(map(str, values)) + ");"
+
+
+def main():
+    max_values = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    rng = random.Random(5)
+    db = {"users": [{"id": i, "name": f"u{i}", "age": rng.randrange(18, 80)} for i in range(users)]}
+    modes = {
+        "inline": Transpiler(generator=MongoDBGenerator(in_list_max=None), plan_cache_size=0),
+        "spill": Transpiler(generator=MongoDBGenerator(in_list_max=0), plan_cache_size=0),
+    }
+    print(f"{users} users")
+    print(f"{'values':>8} {'doc':>10}  {'mode':>6} {'translate':>12} {'render':>12} {'run':>12} {'rows':>8}")
+    n = 10
+    while n <= max_values:
+        # ids spread over twice the collection (or the list), with repeats
+        values = [rng.randrange(2 * max(users, n)) for _ in range(n)]
+        sql = sql_for(values)
+        rows = None
+        for mode, transpiler in modes.items():
+            translate, plan = timed(lambda: transpiler.translate(sql, SCHEMA))
+            render, _ = timed(lambda: plan["string"])
+            run, result = timed(lambda: Evaluator(db).run(plan))
+            if rows is None:
+                rows = sorted(r["name"] for r in result)
+                doc = f"{len(format_shell(plan['filter'])) / 1024:>7.0f} KB"
+            else:
+                assert sorted(r["name"] for r in result) == rows, (n, mode)
+                doc = ""
+            print(f"{n if mode == 'inline' else '':>8} {doc:>10}  {mode:>6} {translate * 1000:>9.1f} ms"
+                  f" {render * 1000:>9.1f} ms {run * 1000:>9.1f} ms {len(rows):>8}")
+        n *= 10
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Tokens/sec of the PLY SqlLexer versus the single-regex FastSqlLexer on a
+multi-megabyte .sql script.
+
+    python benchmarks/bench_lexer.py [megabytes]
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from sql2mongo.lexer.sql_lexer import get_lexer
+
+STATEMENTS = [
+    "SELECT name, age FROM users WHERE age > 30 AND city = 'Delhi';",
+    "select city, count(*) from users group by city having count(*) > 2 order by count desc limit 10;",
+    "SELECT users.name, orders.amount FROM users JOIN orders ON users.id = orders.user_id\n"
+    "  WHERE orders.amount >= 500 OR users.city IN ('Pune', 'Mumbai', 'Chennai');",
+    "SELECT * FROM orders WHERE amount BETWEEN 100 AND 900 ORDER BY amount ASC;",
+]
+
+
+def build_script(megabytes):
+    chunk = "\n".join(STATEMENTS) + "\n"
+    return chunk * max(1, int(megabytes * 1024 * 1024 / len(chunk)))
+
+
+def bench(label, fn, script):
+    start = time.perf_counter()
+    count = fn(script)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {count:>9} tokens  {elapsed:7.3f} s  {count / elapsed / 1e6:6.2f} Mtok/s")
+
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    script = build_script(megabytes)
+    print(f"script size: {len(script) / 1024 / 1024:.1f} MB")
+
+    ply_lexer = get_lexer()
+    fast_lexer = get_lexer("fast")
+    bench("ply tokenize()", lambda s: len(ply_lexer.tokenize(s)), script)
+    bench("fast tokenize()", lambda s: len(fast_lexer.tokenize(s)), script)
+    bench("fast iter_tokens()", lambda s: sum(1 for _ in fast_lexer.iter_tokens(s)), script)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+mongosh string rendering: the previous recursive formatter versus the
+iterative format_shell, and eager versus lazy "string" fields in translate().
+
+    python benchmarks/bench_render.py [in-list size]
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from sql2mongo.codegen.shell import format_shell
+from sql2mongo.transpiler import Transpiler
+
+SCHEMA = {"users": {"id": "int", "name": "string", "age": "int", "city": "string"}}
+
+
+def format_recursive(obj):
+    # the formatter the generator and optimizer used before codegen/shell.py
+    if isinstance(obj, dict):
+        return "{ " + ", ".join(f"{k}: {format_recursive(v)}" for k, v in obj.items()) + " }"
+    elif isinstance(obj, list):
+        return "[ " + ", ".join(format_recursive(i) for i in obj) + " ]"
+    elif isinstance(obj, str):
+        return f'"{obj}"'
+    return str(obj)
+
+
+def deep_document(depth):
+    doc = {"age": {"$gt": 0}}
+    for i in range(depth):
+        doc = {"$and": [doc, {"city": f"c{i}"}]} if i % 2 else {"$or": [{"age": i}, doc]}
+    return doc
+
+
+def deep_pipeline(stages):
+    return [{"$match": {"age": {"$gte": i}}} if i % 2 else
+            {"$project": {"name": 1, "city": 1, "tags": ["a", "b", i]}} for i in range(stages)]
+
+
+def bench(label, fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed / repeat * 1e3:9.3f} ms/op")
+
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    wide_in = {"id": {"$in": list(range(width))}, "city": {"$in": [f"city{i}" for i in range(width // 10)]}}
+    deep = deep_document(150)
+    pipeline = deep_pipeline(5000)
+    for name, doc in (("wide IN", wide_in), ("deep filter", deep), ("deep pipeline", pipeline)):
+        assert format_shell(doc) == format_recursive(doc)
+        bench(f"{name}: recursive", lambda: format_recursive(doc), 20)
+        bench(f"{name}: format_shell", lambda: format_shell(doc), 20)
+
+    very_deep = deep_document(3000)
+    try:
+        format_recursive(very_deep)
+        print("deep filter (3000 levels): recursive ok")
+    except RecursionError:
+        print("deep filter (3000 levels): recursive raises RecursionError")
+    bench("deep filter (3000 levels): format_shell", lambda: format_shell(very_deep), 5)
+
+    values = ", ".join(str(i) for i in range(width // 10))
+    sql = f"SELECT name FROM users WHERE id IN ({values});"
+    transpiler = Transpiler(plan_cache_size=0)
+    bench("translate(), string read", lambda: transpiler.translate(sql, SCHEMA)["string"], 20)
+    bench("translate(), string never read", lambda: transpiler.translate(sql, SCHEMA)["filter"], 20)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Semi-join strategies for `id IN (SELECT user_id FROM orders WHERE ...)`, run
+through the in-process evaluator (sql2mongo.codegen.evaluator).
+
+Sweeps the subquery's selectivity and the share of users the outer query
+keeps, times the lookup, distinct and temp plans on each, and prints which
+one the planner picks from the collected statistics next to the fastest.
+
+    python benchmarks/bench_semi_join.py [users] [orders per user]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from sql2mongo.codegen.evaluator import Evaluator
+from sql2mongo.codegen.mongodb_generator import MongoDBGenerator
+from sql2mongo.codegen.semi_join import STRATEGIES
+from sql2mongo.transpiler import Transpiler
+
+SCHEMA = {
+    "users": {"id": "int", "name": "string", "age": "int"},
+    "orders": {"order_id": "int", "user_id": "int", "amount": "int"},
+}
+
+SQL = "SELECT name FROM users WHERE age < {age} AND id IN (SELECT user_id FROM orders WHERE amount >= {amount});"
+
+# (outer age bound, subquery amount bound): from few outer rows to all of them,
+# from a handful of subquery rows to most of the table
+CASES = [(20, 0), (20, 9990), (40, 9990), (80, 9990), (80, 9000), (80, 5000), (80, 0)]
+
+
+def dataset(users, per_user):
+    rng = random.Random(11)
+    return {
+        "users": [{"id": i, "name": f"u{i}", "age": rng.randrange(18, 80)} for i in range(users)],
+        "orders": [{"order_id": i, "user_id": rng.randrange(users), "amount": rng.randrange(10000)}
+                   for i in range(users * per_user)],
+    }
+
+
+def with_stats(db, age, amount):
+    # exact row counts and selectivities of this case's filters
+    users, orders = db["users"], db["orders"]
+    stats = {
+        "users": {"rows": len(users), "selectivity": {"age": sum(u["age"] < age for u in users) / len(users)}},
+        "orders": {"rows": len(orders),
+                   "selectivity": {"amount": sum(o["amount"] >= amount for o in orders) / len(orders)}},
+    }
+    return dict(SCHEMA, **{"$stats": stats})
+
+
+def run(db, mongo_data):
+    start = time.perf_counter()
+    rows = Evaluator(db).run(mongo_data)
+    return time.perf_counter() - start, rows
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    per_user = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    db = dataset(users, per_user)
+    print(f"{users} users x {users * per_user} orders")
+    print(f"{'age <':>6} {'amount >=':>10} {'rows':>7}  " + "".join(f"{s:>12}" for s in STRATEGIES)
+          + "   fastest   planned")
+    for age, amount in CASES:
+        sql = SQL.format(age=age, amount=amount)
+        times, expected = {}, None
+        for strategy in STRATEGIES:
+            plan = Transpiler(generator=MongoDBGenerator(semi_join=strategy)).translate(sql, SCHEMA)
+            times[strategy], rows = run(db, plan)
+            if expected is None:
+                expected = sorted(map(repr, rows))
+            assert sorted(map(repr, rows)) == expected, strategy
+        planned = Transpiler().translate(sql, with_stats(db, age, amount))
+        choice = "lookup" if "prepare" not in planned else planned["prepare"][0]["name"].split("_")[0]
+        choice = {"in": "distinct", "tmp": "temp"}.get(choice, choice)
+        print(f"{age:>6} {amount:>10} {len(expected):>7}  "
+              + "".join(f"{times[s] * 1000:>9.1f} ms" for s in STRATEGIES)
+              + f"   {min(times, key=times.get):>7}   {choice:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Cold-start cost of building SqlParser from the shipped PLY tables versus
+regenerating the lexer and LALR tables from the grammar.
+
+    python benchmarks/bench_startup.py [runs]
+"""
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../'))
+
+SHIPPED = "from sql2mongo.parser.sql_parser import SqlParser; SqlParser()"
+REGENERATE = """
+import ply.yacc as yacc
+from sql2mongo.parser.sql_parser import SqlParser
+p = SqlParser.__new__(SqlParser)
+p.lexer = __import__('sql2mongo.lexer.sql_lexer', fromlist=['SqlLexer']).SqlLexer()
+p.lexer.build(optimize=False)
+p.tokens = p.lexer.tokens
+p.parser = yacc.yacc(module=p, debug=False, write_tables=False,
+                     tabmodule='sql2mongo.parser._missing_parsetab')
+"""
+
+
+def cold_start(code, runs):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True,
+                       stderr=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    baseline = cold_start("import ply.yacc", runs)
+    shipped = cold_start(SHIPPED, runs)
+    regenerated = cold_start(REGENERATE, runs)
+    print(f"interpreter + ply import   {baseline * 1000:8.1f} ms")
+    print(f"SqlParser (shipped tables) {shipped * 1000:8.1f} ms  (+{(shipped - baseline) * 1000:.1f} ms)")
+    print(f"SqlParser (regenerate)     {regenerated * 1000:8.1f} ms  (+{(regenerated - baseline) * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Per-request transpile cost: rebuilding the pipeline on every call versus
+reusing one long-lived Transpiler.
+
+    python benchmarks/bench_transpiler.py [iterations]
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from sql2mongo.parser.sql_parser import get_parser
+from sql2mongo.semantic.semantic_analyzer import SemanticAnalyzer
+from sql2mongo.codegen.mongodb_generator import MongoDBGenerator
+from sql2mongo.codegen.optimizer import MongoOptimizer
+from sql2mongo.transpiler import Transpiler
+
+SCHEMA = {
+    "users": {"id": "int", "name": "string", "age": "int", "city": "string"},
+    "orders": {"order_id": "int", "user_id": "int", "amount": "int"},
+}
+
+QUERIES = [
+    "SELECT * FROM users WHERE age > 30;",
+    "SELECT name, city FROM users WHERE city = 'Delhi' ORDER BY age DESC LIMIT 5;",
+    "SELECT city, COUNT(*) FROM users GROUP BY city ORDER BY COUNT(*) DESC;",
+    "SELECT users.name, orders.amount FROM users JOIN orders ON users.id = orders.user_id;",
+]
+
+
+def rebuild_per_call(sql):
+    parser = get_parser()
+    analyzer = SemanticAnalyzer(SCHEMA)
+    ast = parser.parse(sql)
+    analyzer.validate_query(ast)
+    return MongoOptimizer().optimize(MongoDBGenerator().generate(ast))
+
+
+def bench(label, fn, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(QUERIES[i % len(QUERIES)])
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {iterations:>6} calls  {elapsed * 1e6 / iterations:10.1f} us/call")
+    return elapsed
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    transpiler = Transpiler()
+    parse_only = transpiler.parser
+
+    bench("rebuild per call", rebuild_per_call, max(1, iterations // 10))
+    bench("reused Transpiler", lambda q: transpiler.translate(q, SCHEMA), iterations)
+    bench("parse only", parse_only.parse, iterations)
+
+
+if __name__ == "__main__":
+    main()
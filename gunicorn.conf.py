@@ -3,6 +3,9 @@ import os
 # Workers
 workers = 1
 worker_class = "sync"
+# More than one thread switches gunicorn to the gthread worker; the parser pool
+# below is sized to match so every thread can parse without waiting.
+threads = int(os.environ.get("WEB_THREADS", "1"))
 timeout = 300
 
 # Pre-load app so parser is built ONCE before workers fork
@@ -14,9 +17,9 @@ bind = f"0.0.0.0:{os.environ.get('PORT', '10000')}"
 # Called once in master process BEFORE forking workers
 def on_starting(server):
     print(">>> Pre-warming parser (runs once before workers fork)...")
-    from sql2mongo.parser.sql_parser import SqlParser
+    from sql2mongo.parser.parser_pool import ParserPool
     from sql2mongo.codegen.mongodb_generator import MongoDBGenerator
     import app as application
-    application._parser = SqlParser()
+    application._parser = ParserPool(size=int(os.environ.get("PARSER_POOL_SIZE", threads)))
     application._generator = MongoDBGenerator()
     print(">>> Parser ready!")
@@ -6,6 +6,7 @@ from sql2mongo.parser.sql_parser import get_parser
 from sql2mongo.semantic.semantic_analyzer import SemanticAnalyzer, SemanticError
 from sql2mongo.codegen.optimizer import MongoOptimizer
 from sql2mongo.schema_loader import load_schema, SchemaError
+from sql2mongo.executor import execute
 import psycopg2
 from pymongo import MongoClient
 import re
@@ -152,12 +153,12 @@ def run_full_pipeline(sql, schema):
         # 1. Parse
         ast = parser.parse(sql)
         # 2. Semantic Analysis
-        analyzer.validate_query(ast)
+        analysis = analyzer.validate_query(ast)
         
         print("Query is semantically valid.")
         
         # 3. Code Generation
-        mongo_query = generator.generate(ast)
+        mongo_query = generator.generate(ast, analysis)
         print("MongoDB Query:")
         print(mongo_query["string"])
         
@@ -180,10 +181,10 @@ def run_with_execution(sql, schema):
         ast = parser.parse(sql)
 
         # 2. Semantic check
-        analyzer.validate_query(ast)
+        analysis = analyzer.validate_query(ast)
 
         # 3. Generate Mongo string
-        mongo_data = generator.generate(ast)
+        mongo_data = generator.generate(ast, analysis)
 
         print("\nGenerated Mongo Query:")
         print(mongo_data["string"])
@@ -193,28 +194,26 @@ def run_with_execution(sql, schema):
         collection = mongo_data["collection"]
         print("\nParsed Mongo:")
         print("Collection:", collection)
+        # Handle count
+        if mongo_data.get("empty"):
+            print("Empty: no document can match the filter, the database is not queried")
+        elif "distinct" in mongo_data:
+            print("Distinct:", mongo_data["distinct"], "Filter:", mongo_data["filter"])
+        elif "count" in mongo_data:
+            print("Count filter:", mongo_data.get("filter", "(collection metadata)"))
         # Handle normal find
-        if "filter" in mongo_data:
+        elif "filter" in mongo_data:
             filter_dict = mongo_data["filter"]
             projection_dict = mongo_data["projection"]
             print("Filter:", filter_dict)
             print("Projection:", projection_dict)
-            #mongo_result = run_mongo(collection, filter_dict, projection_dict)
-            cursor = db[collection].find(filter_dict, projection_dict)
-            # APPLY SORT
-            if "sort" in mongo_data:
-                cursor = cursor.sort(list(mongo_data["sort"].items()))
-            # APPLY LIMIT
-            if "limit" in mongo_data:
-                cursor = cursor.limit(mongo_data["limit"])
-            mongo_result = list(cursor)
             # Handle aggregate
         elif "pipeline" in mongo_data:
             pipeline = mongo_data["pipeline"]
             print("Pipeline:", pipeline)
-            mongo_result = list(db[collection].aggregate(mongo_data["pipeline"]))
         else:
             raise ValueError("Unknown MongoDB operation type")
+        mongo_result = execute(db, mongo_data)
         # 5. Execute SQL
         sql_result = run_sql(sql)
         print("\nSQL Result:", sql_result)
@@ -270,10 +269,10 @@ def run_with_execution_and_optimization(sql, schema):
         ast = parser.parse(sql)
 
         # ---------------- 2. Semantic Check ----------------
-        analyzer.validate_query(ast)
+        analysis = analyzer.validate_query(ast)
 
         # ---------------- 3. Generate Mongo ----------------
-        mongo_data = generator.generate(ast)
+        mongo_data = generator.generate(ast, analysis)
         #mongo_query = mongo_data["string"]
 
         print("\nGenerated Mongo Query:")
@@ -300,33 +299,30 @@ def run_with_execution_and_optimization(sql, schema):
         print("\nParsed Mongo:")
         print("Collection:", collection)
 
-        if "filter" in mongo_data:
+        if mongo_data.get("empty"):
+            print("Empty: no document can match the filter, the database is not queried")
+        elif "distinct" in mongo_data:
+            print("Distinct:", mongo_data["distinct"], "Filter:", mongo_data["filter"])
+        elif "count" in mongo_data:
+            print("Count filter:", mongo_data.get("filter", "(collection metadata)"))
+
+        elif "filter" in mongo_data:
             filter_dict = mongo_data["filter"]
             projection_dict = mongo_data["projection"]
 
             print("Filter:", filter_dict)
             print("Projection:", projection_dict)
 
-           # mongo_result = run_mongo(collection, filter_dict, projection_dict)
-            cursor = db[collection].find(filter_dict, projection_dict)
-            # APPLY SORT
-            if "sort" in mongo_data:
-                cursor = cursor.sort(list(mongo_data["sort"].items()))
-            # APPLY LIMIT
-            if "limit" in mongo_data:
-                cursor = cursor.limit(mongo_data["limit"])
-
-            mongo_result = list(cursor)
         elif "pipeline" in mongo_data:
             pipeline = mongo_data["pipeline"]
 
             print("Pipeline:", pipeline)
 
-            mongo_result = list(db[collection].aggregate(pipeline))
-
         else:
             raise ValueError("Unknown MongoDB operation type")
 
+        mongo_result = execute(db, mongo_data)
+
         # ---------------- 6. Execute SQL ----------------
         sql_result = run_sql(sql)
 
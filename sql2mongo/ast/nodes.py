@@ -1,16 +1,98 @@
-from typing import List, Union, Optional
+from typing import Tuple, Union, Optional
 
 class ASTNode:
-    """Base class for all AST nodes."""
+    """
+    Base class for all AST nodes.
+
+    Nodes are immutable: every field is set once in __init__, sequences are
+    stored as tuples, and equality and hashing follow the tree structure, so
+    ASTs can be interned, compared cheaply and used as cache keys.
+    """
+    __slots__ = ("_hash",)
+    _fields = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self._fields, values):
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "_hash", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def _key(self):
+        return tuple(getattr(self, name) for name in self._fields)
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if type(other) is not type(self):
+            return NotImplemented
+        if self._hash is not None and other._hash is not None and self._hash != other._hash:
+            return False
+        return self._key() == other._key()
+
+    def __hash__(self):
+        if self._hash is None:
+            object.__setattr__(self, "_hash", hash((self.__class__.__name__,) + self._key()))
+        return self._hash
+
+    def __reduce__(self):
+        return (self.__class__, self._key())
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def replace(self, **changes):
+        """Returns a copy of the node with the given fields replaced."""
+        values = dict(zip(self._fields, self._key()))
+        values.update(changes)
+        return self.__class__(**values)
+
     def __repr__(self):
         return self.__class__.__name__
 
+class ColumnRef(ASTNode):
+    """Represents a column reference: column or table.column"""
+    __slots__ = ("table", "column", "type")
+    _fields = ("table", "column", "type")
+
+    def __init__(self, table: Optional[str], column: str, type: Optional[str] = None):
+        # the parser leaves table/type unset; the analyzer's bound tree fills them in
+        super().__init__(table, column, type)
+
+    @classmethod
+    def of(cls, value):
+        """Normalizes a ColumnRef or a 'column' / 'table.column' string to a ColumnRef."""
+        if isinstance(value, ColumnRef):
+            return value
+        if "." in value:
+            table, column = value.split(".", 1)
+            return cls(table, column)
+        return cls(None, value)
+
+    def __str__(self):
+        return self.column if self.table is None else f"{self.table}.{self.column}"
+
+    def __repr__(self):
+        if self.type is None:
+            return f"ColumnRef(table={self.table!r}, column={self.column!r})"
+        return f"ColumnRef(table={self.table!r}, column={self.column!r}, type={self.type!r})"
+
 class Comparison(ASTNode):
     """Represents a comparison: identifier operator literal"""
-    def __init__(self, identifier: str, operator: str, value: Union[int, str]):
-        self.identifier = identifier
-        self.operator = operator
-        self.value = value
+    __slots__ = ("identifier", "operator", "value")
+    _fields = ("identifier", "operator", "value")
+
+    def __init__(self, identifier: Union[ColumnRef, "Aggregate"], operator: str, value):
+        if isinstance(value, list):
+            value = tuple(value)
+        super().__init__(identifier, operator, value)
 
     def __repr__(self):
         return (f"Comparison(\n"
@@ -19,12 +101,25 @@ class Comparison(ASTNode):
                 f"    value={repr(self.value)}\n"
                 f")")
 
+class Parameter(ASTNode):
+    """Represents a bind placeholder: positional '?' or named ':name'"""
+    __slots__ = ("name", "position")
+    _fields = ("name", "position")
+
+    def __init__(self, name: Optional[str], position: int):
+        # name is None for positional '?'; position is the offset in the SQL text
+        super().__init__(name, position)
+
+    def __repr__(self):
+        return "?" if self.name is None else f":{self.name}"
+
 class LogicalCondition(ASTNode):
     """Represents a logical condition: condition AND/OR condition"""
+    __slots__ = ("left", "operator", "right")
+    _fields = ("left", "operator", "right")
+
     def __init__(self, left: ASTNode, operator: str, right: ASTNode):
-        self.left = left
-        self.operator = operator
-        self.right = right
+        super().__init__(left, operator, right)
 
     def __repr__(self):
         left_repr = repr(self.left).replace('\n', '\n    ')
@@ -35,11 +130,28 @@ class LogicalCondition(ASTNode):
                 f"    right={right_repr}\n"
                 f")")
 
+class Join(ASTNode):
+    """Represents an explicit JOIN table ON condition"""
+    __slots__ = ("table", "condition")
+    _fields = ("table", "condition")
+
+    def __init__(self, table: str, condition: ASTNode):
+        super().__init__(table, condition)
+
+    def __repr__(self):
+        condition_repr = repr(self.condition).replace('\n', '\n    ')
+        return (f"Join(\n"
+                f"    table='{self.table}',\n"
+                f"    condition={condition_repr}\n"
+                f")")
+
 class OrderByItem(ASTNode):
     """Represents a single ORDER BY item"""
+    __slots__ = ("column", "direction")
+    _fields = ("column", "direction")
+
     def __init__(self, column: str, direction: str = "ASC"):
-        self.column = column
-        self.direction = direction.upper()
+        super().__init__(column, direction.upper())
 
     def __repr__(self):
         return (f"OrderByItem(\n"
@@ -49,29 +161,36 @@ class OrderByItem(ASTNode):
 
 class Aggregate(ASTNode):
     """Represents an aggregate function like COUNT, MIN, MAX, AVG, SUM"""
-    def __init__(self, func: str, column: str):
-        self.func = func.upper()
-        self.column = column  # '*' or column name
+    __slots__ = ("func", "column", "distinct")
+    _fields = ("func", "column", "distinct")
+
+    def __init__(self, func: str, column: str, distinct: bool = False):
+        # column is '*' or a column name; distinct marks COUNT(DISTINCT column)
+        super().__init__(func.upper(), column, distinct)
 
     def __repr__(self):
         return (f"Aggregate(\n"
                 f"    func='{self.func}',\n"
-                f"    column='{self.column}'\n"
+                f"    column='{self.column}'" + (",\n    distinct=True" if self.distinct else "") + "\n"
                 f")")
 
 
 class SelectQuery(ASTNode):
     """Represents a SELECT query"""
-    def __init__(self, columns: List[Union[str,Aggregate]], table: str,joins=None, where: Optional[ASTNode] = None,group_by:Optional[List[str]] = None,having:Optional[ASTNode] = None,order_by:Optional[List[OrderByItem]] = None,limit:Optional[int] = None,offset:Optional[int] = None):
-        self.columns = columns
-        self.table = table
-        self.joins = joins or []
-        self.where = where
-        self.group_by = group_by or []
-        self.having=having
-        self.order_by = order_by or []
-        self.limit = limit
-        self.offset = offset
+    __slots__ = ("columns", "table", "joins", "where", "group_by", "having", "order_by", "limit", "offset", "distinct")
+    _fields = ("columns", "table", "joins", "where", "group_by", "having", "order_by", "limit", "offset", "distinct")
+
+    def __init__(self, columns: Tuple[Union[str, ColumnRef, Aggregate], ...], table: Union[str, Tuple[str, ...]], joins=None, where: Optional[ASTNode] = None, group_by: Optional[Tuple[str, ...]] = None, having: Optional[ASTNode] = None, order_by: Optional[Tuple[OrderByItem, ...]] = None, limit: Optional[int] = None, offset: Optional[int] = None, distinct: bool = False):
+        if isinstance(table, list):
+            table = tuple(table)
+        super().__init__(tuple(columns), table, tuple(joins or ()), where,
+                         tuple(group_by or ()), having, tuple(order_by or ()), limit, offset, distinct)
+
+    @property
+    def tables(self):
+        """Every table the query reads: FROM list first, then JOIN tables."""
+        base = self.table if isinstance(self.table, tuple) else (self.table,)
+        return base + tuple(join.table for join in self.joins)
 
     def __repr__(self):
         if self.where:
@@ -97,14 +216,14 @@ class SelectQuery(ASTNode):
             ) + "\n    ]"
         else:
             order_repr = "[]"
-            
+
         return (f"SelectQuery(\n"
-                f"    columns={self.columns},\n"
+                f"    columns={list(self.columns)},\n"
                 f"    table='{self.table}',\n"
                 f"    where={where_repr},\n"
                 f"    group_by={group_repr},\n"
                 f"    having={having_repr},\n"
                 f"    order_by={order_repr},\n"
                 f"    limit={self.limit},\n"
-                f"    offset={self.offset}\n"
+                f"    offset={self.offset}" + (",\n    distinct=True" if self.distinct else "") + "\n"
                 f")")
@@ -0,0 +1,91 @@
+"""
+Generates the PLY lexer and parser tables that ship inside the package.
+
+    python -m sql2mongo.build_tables          # (re)write lextab.py and parsetab.py
+    python -m sql2mongo.build_tables --check  # exit 1 if the tables are stale
+
+At runtime SqlLexer/SqlParser load these tables in optimize mode and never
+regenerate them, so this must be re-run after any token or grammar change.
+"""
+import importlib
+import os
+import sys
+
+import ply.lex as lex
+import ply.yacc as yacc
+
+from sql2mongo.lexer import sql_lexer
+from sql2mongo.parser import sql_parser
+
+LEXER_DIR = os.path.dirname(os.path.abspath(sql_lexer.__file__))
+PARSER_DIR = os.path.dirname(os.path.abspath(sql_parser.__file__))
+
+
+def _table_path(directory, tabmodule):
+    return os.path.join(directory, tabmodule.rsplit(".", 1)[-1] + ".py")
+
+
+def _load_table(tabmodule):
+    sys.modules.pop(tabmodule, None)
+    try:
+        return importlib.import_module(tabmodule)
+    except ImportError:
+        return None
+
+
+def _grammar_signature(parser):
+    pdict = {k: getattr(parser, k) for k in dir(parser)}
+    pdict["__file__"] = sql_parser.__file__
+    pinfo = yacc.ParserReflect(pdict)
+    pinfo.get_all()
+    return pinfo.signature()
+
+
+def build_tables():
+    """Rewrites lextab.py and parsetab.py from the current token and grammar rules."""
+    for path in (_table_path(LEXER_DIR, sql_lexer.LEXTAB),
+                 _table_path(PARSER_DIR, sql_parser.TABMODULE)):
+        if os.path.exists(path):
+            os.remove(path)
+    sys.modules.pop(sql_lexer.LEXTAB, None)
+    sys.modules.pop(sql_parser.TABMODULE, None)
+
+    # optimize=True with a missing lextab makes PLY build and write it
+    sql_lexer.SqlLexer().build(outputdir=LEXER_DIR)
+    sql_parser.SqlParser(optimize=False, write_tables=True, outputdir=PARSER_DIR)
+
+
+def tables_are_current():
+    """True if the shipped tables match the current token and grammar rules."""
+    lextab = _load_table(sql_lexer.LEXTAB)
+    parsetab = _load_table(sql_parser.TABMODULE)
+    if lextab is None or parsetab is None:
+        return False
+
+    fresh = lex.lex(module=sql_lexer.SqlLexer(), optimize=False)
+    if set(lextab._lextokens) != fresh.lextokens:
+        return False
+    shipped_patterns = [pattern for pattern, _ in lextab._lexstatere["INITIAL"]]
+    if shipped_patterns != fresh.lexstateretext["INITIAL"]:
+        return False
+
+    parser = sql_parser.SqlParser()
+    return parsetab._lr_signature == _grammar_signature(parser)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if "--check" in argv:
+        if tables_are_current():
+            print("PLY tables are up to date.")
+            return 0
+        print("PLY tables are stale; run `python -m sql2mongo.build_tables`.", file=sys.stderr)
+        return 1
+    build_tables()
+    print("Wrote", _table_path(LEXER_DIR, sql_lexer.LEXTAB))
+    print("Wrote", _table_path(PARSER_DIR, sql_parser.TABMODULE))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -28,33 +28,12 @@ def transpile(schema: dict, query: str) -> list:
     Converts SQL to MongoDB Query JSON array.
     """
     try:
-        from sql2mongo.parser.sql_parser import get_parser
-        from sql2mongo.semantic.semantic_analyzer import SemanticAnalyzer, SemanticError
-        from sql2mongo.codegen.mongodb_generator import MongoDBGenerator
-        from sql2mongo.codegen.optimizer import MongoOptimizer
-        from sql2mongo.lexer.sql_lexer import LexerError
+        from sql2mongo.transpiler import get_transpiler
     except ImportError as e:
         raise RuntimeError(f"Transpiler modules or dependencies not found. Details: {e}")
 
-    parser = get_parser()
-    analyzer = SemanticAnalyzer(schema)
-    generator = MongoDBGenerator()
-    optimizer = MongoOptimizer()
-
-    queries = preprocess_sql(query)
-    results = []
-
-    for q in queries:
-        try:
-            ast = parser.parse(q)
-            analyzer.validate_query(ast)
-            mongo_data = generator.generate(ast)
-            optimized_data = optimizer.optimize(mongo_data)
-            results.append(optimized_data.get("string", ""))
-        except Exception as e:
-            results.append(f"Error: {str(e)}")
-
-    return results
+    # The parser tables, generator and optimizer are built once per process
+    return get_transpiler().transpile(schema, query)
 
 
 def setup_logger(verbose: bool):
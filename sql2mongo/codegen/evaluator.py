@@ -0,0 +1,488 @@
+"""
+In-process evaluator for generated queries.
+
+Runs find/aggregate query data against plain Python collections
+({name: [documents]}), covering the operators and stages the generator emits.
+It stands in for a mongod in benchmarks and differential tests: it is meant to
+agree with MongoDB on those queries, not to be a database. $lookup builds a
+hash index on the foreign field once per stage, like an indexed foreignField.
+"""
+import heapq
+import operator
+
+from sql2mongo.codegen.in_list import InList
+from sql2mongo.executor import execute
+
+_MISSING = object()
+
+_EXPR_COMPARISONS = {
+    "$eq": operator.eq, "$ne": operator.ne,
+    "$gt": operator.gt, "$gte": operator.ge,
+    "$lt": operator.lt, "$lte": operator.le,
+}
+
+
+def get_path(doc, path):
+    """Value at a dotted path, or _MISSING."""
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _set_path(doc, path, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+
+def _compare(value, op, target):
+    if value is _MISSING:
+        # a missing field equals null
+        if op in ("$eq", "$ne"):
+            return (target is None) == (op == "$eq")
+        if op in ("$in", "$nin"):
+            return (None in target) == (op == "$in")
+        return False
+    if op == "$eq":
+        return value == target
+    if op == "$ne":
+        return value != target
+    if op == "$in":
+        if isinstance(target, InList):
+            try:
+                return target.contains(value)
+            except TypeError:
+                return value in target
+        return value in target
+    if op == "$nin":
+        return value not in target
+    try:
+        if op == "$gt":
+            return value > target
+        if op == "$gte":
+            return value >= target
+        if op == "$lt":
+            return value < target
+        if op == "$lte":
+            return value <= target
+    except TypeError:
+        # MongoDB only compares values of the same type bracket
+        return False
+    raise ValueError(f"Unsupported query operator: {op}")
+
+
+def _matches_field(value, condition):
+    if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+        if isinstance(value, list) and not any(op in ("$ne", "$nin") for op in condition):
+            # array fields match when any element does
+            if any(_matches_field(item, condition) for item in value):
+                return True
+        return all(_compare(value, op, target) for op, target in condition.items())
+    if isinstance(value, list) and not isinstance(condition, list):
+        return condition in value
+    return _compare(value, "$eq", condition)
+
+
+def matches(doc, query, variables=None):
+    """True if `doc` satisfies the query document `query`."""
+    for key, condition in query.items():
+        if key == "$and":
+            if not all(matches(doc, q, variables) for q in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(doc, q, variables) for q in condition):
+                return False
+        elif key == "$nor":
+            if any(matches(doc, q, variables) for q in condition):
+                return False
+        elif key == "$expr":
+            if not evaluate_expression(doc, condition, variables):
+                return False
+        elif not _matches_field(get_path(doc, key), condition):
+            return False
+    return True
+
+
+def evaluate_expression(doc, expr, variables=None):
+    """Aggregation expression: "$field", "$$var", operator documents and literals."""
+    if isinstance(expr, str) and expr.startswith("$$"):
+        name, _, rest = expr[2:].partition(".")
+        value = (variables or {}).get(name, _MISSING)
+        if rest and value is not _MISSING:
+            value = get_path(value, rest)
+        return None if value is _MISSING else value
+    if isinstance(expr, str) and expr.startswith("$"):
+        value = get_path(doc, expr[1:])
+        return None if value is _MISSING else value
+    if isinstance(expr, list):
+        return [evaluate_expression(doc, e, variables) for e in expr]
+    if isinstance(expr, dict):
+        if len(expr) == 1:
+            op, args = next(iter(expr.items()))
+            if op.startswith("$"):
+                return _operator(doc, op, args, variables)
+        return {k: evaluate_expression(doc, v, variables) for k, v in expr.items()}
+    return expr
+
+
+def _operator(doc, op, args, variables):
+    if op == "$literal":
+        return args
+    values = evaluate_expression(doc, args, variables)
+    if op == "$cond":
+        condition, then, otherwise = values
+        return then if condition else otherwise
+    if op == "$and":
+        return all(values)
+    if op == "$or":
+        return any(values)
+    if op == "$not":
+        return not values[0]
+    if op == "$in":
+        return values[0] in values[1]
+    if op == "$size":
+        return len(values)
+    if op == "$setDifference":
+        first, second = values
+        return [v for v in first if v not in second]
+    if op in _EXPR_COMPARISONS:
+        # expressions compare across types in BSON order (null < numbers < strings)
+        left, right = values
+        return _EXPR_COMPARISONS[op](_sort_key(left), _sort_key(right))
+    raise ValueError(f"Unsupported expression operator: {op}")
+
+
+def _project(doc, spec):
+    # inclusion projection with computed fields; _id is kept unless excluded
+    include_id = spec.get("_id", 1) not in (0, False)
+    result = {}
+    if include_id and "_id" in doc and "_id" not in spec:
+        result["_id"] = doc["_id"]
+    excluded = [k for k, v in spec.items() if v in (0, False)]
+    if len(excluded) == len(spec):
+        result = {k: v for k, v in doc.items()}
+        for path in excluded:
+            parts = path.split(".")
+            target = result
+            for part in parts[:-1]:
+                target = target.get(part)
+                if not isinstance(target, dict):
+                    break
+            else:
+                target.pop(parts[-1], None)
+        return result
+    for path, value in spec.items():
+        if value in (0, False):
+            continue
+        if value in (1, True):
+            found = get_path(doc, path)
+            if found is not _MISSING:
+                _set_path(result, path, found)
+        else:
+            _set_path(result, path, evaluate_expression(doc, value))
+    return result
+
+
+def _group(docs, spec):
+    groups = {}
+    key_spec = spec["_id"]
+    for doc in docs:
+        key = evaluate_expression(doc, key_spec)
+        hashable = repr(key)
+        state = groups.get(hashable)
+        if state is None:
+            state = groups[hashable] = {"_id": key, "_docs": []}
+        state["_docs"].append(doc)
+    out = []
+    for state in groups.values():
+        result = {"_id": state["_id"]}
+        members = state["_docs"]
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            (op, arg), = accumulator.items()
+            values = [evaluate_expression(d, arg) for d in members]
+            if op == "$sum":
+                result[field] = sum(v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool))
+            elif op in ("$min", "$max", "$avg"):
+                present = [v for v in values if v is not None]
+                if not present:
+                    result[field] = None
+                elif op == "$min":
+                    result[field] = min(present)
+                elif op == "$max":
+                    result[field] = max(present)
+                else:
+                    result[field] = sum(present) / len(present)
+            elif op == "$push":
+                result[field] = values
+            elif op == "$addToSet":
+                unique = []
+                for v in values:
+                    if v not in unique:
+                        unique.append(v)
+                result[field] = unique
+            elif op == "$first":
+                result[field] = values[0] if values else None
+            else:
+                raise ValueError(f"Unsupported accumulator: {op}")
+        out.append(result)
+    return out
+
+
+def _sort_key(value):
+    # MongoDB orders missing/null first, then numbers, then strings
+    if value is _MISSING or value is None:
+        return (0, 0)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    return (3, repr(value))
+
+
+def sort_documents(docs, spec):
+    docs = list(docs)
+    for field, direction in reversed(list(spec.items())):
+        docs.sort(key=lambda d: _sort_key(get_path(d, field)), reverse=direction == -1)
+    return docs
+
+
+class _OrderKey:
+    # compound sort key with a direction per field, for heapq
+    __slots__ = ("values", "directions")
+
+    def __init__(self, doc, spec):
+        self.values = [_sort_key(get_path(doc, field)) for field in spec]
+        self.directions = list(spec.values())
+
+    def __lt__(self, other):
+        for mine, theirs, direction in zip(self.values, other.values, self.directions):
+            if mine != theirs:
+                return mine < theirs if direction == 1 else mine > theirs
+        return False
+
+    def __eq__(self, other):
+        # heapq compares (key, position) tuples, which needs equality for ties
+        return self.values == other.values
+
+
+def top_documents(docs, spec, k):
+    """
+    sort_documents(docs, spec)[:k] with a bounded heap of k documents, the way
+    the server runs a $sort directly followed by a $limit.
+    """
+    return heapq.nsmallest(k, docs, key=lambda d: _OrderKey(d, spec))
+
+
+class _Cursor:
+    # the slice of the pymongo cursor API the executor uses
+    def __init__(self, docs, projection):
+        self.docs = docs
+        self.projection = projection
+        self.order = None
+        self.skipped = 0
+        self.limited = 0
+
+    def sort(self, keys):
+        self.order = dict(keys)
+        return self
+
+    def skip(self, n):
+        self.skipped = n
+        return self
+
+    def limit(self, n):
+        self.limited = n
+        return self
+
+    def __iter__(self):
+        # sort, skip and limit apply in that order whatever order they were set in
+        docs = self.docs
+        if self.order and self.limited:
+            docs = top_documents(docs, self.order, self.skipped + self.limited)
+        elif self.order:
+            docs = sort_documents(docs, self.order)
+        docs = docs[self.skipped:]
+        if self.limited:
+            docs = docs[:self.limited]
+        if self.projection:
+            return iter([_project(d, self.projection) for d in docs])
+        return iter(docs)
+
+
+class _Collection:
+    # the slice of the pymongo Collection API the executor uses
+    def __init__(self, evaluator, name):
+        self.evaluator = evaluator
+        self.name = name
+
+    @property
+    def docs(self):
+        return self.evaluator.db.get(self.name, [])
+
+    def find(self, filter=None, projection=None):
+        return _Cursor([d for d in self.docs if matches(d, filter or {})], projection)
+
+    def aggregate(self, pipeline):
+        return self.evaluator.aggregate(self.docs, pipeline)
+
+    def count_documents(self, filter):
+        return sum(1 for d in self.docs if matches(d, filter))
+
+    def estimated_document_count(self):
+        return len(self.docs)
+
+    def index_information(self):
+        # no secondary indexes in memory
+        return {"_id_": {"key": [("_id", 1)]}}
+
+    def distinct(self, key, filter=None):
+        values = []
+        seen = set()
+        for doc in self.docs:
+            if not matches(doc, filter or {}):
+                continue
+            value = get_path(doc, key)
+            for item in (value if isinstance(value, list) else [value]):
+                if item is not _MISSING and repr(item) not in seen:
+                    seen.add(repr(item))
+                    values.append(item)
+        return values
+
+    def insert_many(self, docs):
+        self.evaluator.db.setdefault(self.name, []).extend(docs)
+
+    def drop(self):
+        self.evaluator.db.pop(self.name, None)
+
+
+def _sort_bound(rest):
+    # documents a $sort has to produce when $skip/$limit stages follow it directly
+    skipped = 0
+    for stage in rest:
+        if "$skip" in stage:
+            skipped += stage["$skip"]
+        elif "$limit" in stage:
+            return skipped + stage["$limit"]
+        else:
+            return None
+    return None
+
+
+class Evaluator:
+    """
+    Runs query data against `db`, a mapping of collection name -> documents.
+    It exposes the pymongo collection methods sql2mongo.executor uses
+    (evaluator[name].find/aggregate/distinct/count_documents/drop), so plans
+    run through the same executor as against a mongod. `stats` counts the documents each
+    $lookup probed and returned, which is what join pushdown is meant to
+    reduce.
+    """
+    def __init__(self, db):
+        self.db = db
+        self.stats = {"lookup_probes": 0, "lookup_matches": 0}
+
+    def __getitem__(self, name):
+        return _Collection(self, name)
+
+    def run(self, mongo_data):
+        return execute(self, mongo_data)
+
+    def aggregate(self, docs, pipeline, variables=None):
+        for i, stage in enumerate(pipeline):
+            (name, spec), = stage.items()
+            if name == "$match":
+                docs = [d for d in docs if matches(d, spec, variables)]
+            elif name == "$project":
+                docs = [_project(d, spec) for d in docs]
+            elif name in ("$addFields", "$set"):
+                docs = [self._add_fields(d, spec) for d in docs]
+            elif name == "$unwind":
+                docs = self._unwind(docs, spec)
+            elif name == "$lookup":
+                docs = self._lookup(docs, spec)
+            elif name == "$group":
+                docs = _group(docs, spec)
+            elif name == "$sort":
+                bound = _sort_bound(pipeline[i + 1:])
+                docs = sort_documents(docs, spec) if bound is None else top_documents(docs, spec, bound)
+            elif name == "$skip":
+                docs = list(docs)[spec:]
+            elif name == "$limit":
+                docs = list(docs)[:spec]
+            elif name == "$out":
+                self.db[spec] = list(docs)
+                docs = []
+            elif name == "$count":
+                docs = [{spec: len(list(docs))}] if docs else []
+            else:
+                raise ValueError(f"Unsupported pipeline stage: {name}")
+        return list(docs)
+
+    def _add_fields(self, doc, spec):
+        result = dict(doc)
+        for path, expr in spec.items():
+            _set_path(result, path, evaluate_expression(doc, expr))
+        return result
+
+    def _unwind(self, docs, spec):
+        path = spec if isinstance(spec, str) else spec["path"]
+        preserve = isinstance(spec, dict) and spec.get("preserveNullAndEmptyArrays")
+        field = path[1:]
+        out = []
+        for doc in docs:
+            value = get_path(doc, field)
+            if isinstance(value, list) and value:
+                for item in value:
+                    unwound = dict(doc)
+                    _set_path(unwound, field, item)
+                    out.append(unwound)
+            elif isinstance(value, list) or value is _MISSING or value is None:
+                if preserve:
+                    unwound = dict(doc)
+                    if isinstance(value, list):
+                        unwound.pop(field, None)
+                    out.append(unwound)
+            else:
+                out.append(doc)
+        return out
+
+    def _lookup(self, docs, spec):
+        foreign = self.db.get(spec["from"], [])
+        sub_pipeline = spec.get("pipeline")
+        let = spec.get("let", {})
+        index = None
+        if "localField" in spec:
+            index = {}
+            for f in foreign:
+                key = get_path(f, spec["foreignField"])
+                index.setdefault(None if key is _MISSING else key, []).append(f)
+        out = []
+        for doc in docs:
+            self.stats["lookup_probes"] += 1
+            if index is not None:
+                key = get_path(doc, spec["localField"])
+                if isinstance(key, list):
+                    candidates = [f for k in key for f in index.get(k, ())]
+                else:
+                    candidates = index.get(None if key is _MISSING else key, [])
+            else:
+                candidates = foreign
+            if sub_pipeline is not None:
+                variables = {name: evaluate_expression(doc, expr) for name, expr in let.items()}
+                candidates = self.aggregate(candidates, sub_pipeline, variables)
+            self.stats["lookup_matches"] += len(candidates)
+            joined = dict(doc)
+            _set_path(joined, spec["as"], list(candidates))
+            out.append(joined)
+        return out
+
+
+def evaluate(db, mongo_data):
+    """Runs find/count/aggregate query data against `db` and returns the result documents."""
+    return Evaluator(db).run(mongo_data)
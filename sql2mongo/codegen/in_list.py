@@ -0,0 +1,63 @@
+"""
+Value lists of `col IN (...)`.
+
+InList is the $in list the generator and the optimizer produce: deduplicated
+and sorted once when it is built, so later passes (OR -> IN, the $in ordering
+of MongoOptimizer, interval intersection) can recognise it and leave it
+alone, and the in-process evaluator can binary-search it. It stays a list,
+which is what drivers encode as a BSON array.
+
+Lists longer than a generator's in_list_max are not inlined at all: the
+values go to a temporary collection (a "values" prepare step, run by
+sql2mongo.executor) and the query joins against its _id index with $lookup,
+ahead of any grouping, count or join. That takes an AND-ed IN on a column of
+the FROM table; lists under an OR or on a joined table stay inline.
+spill_values() packs integer values into an array('q'), 8 bytes per value
+instead of a Python int object each, for the time the plan holds them.
+"""
+from array import array
+from bisect import bisect_left
+
+from sql2mongo.codegen.ir import is_constant
+
+_INT64 = (-2 ** 63, 2 ** 63 - 1)
+
+
+class InList(list):
+    """A $in value list without duplicates, in ascending order."""
+    __slots__ = ()
+
+    @classmethod
+    def of(cls, values):
+        """
+        InList of the distinct values; a plain list in the order they were
+        written when they can't be ordered (values of mixed types).
+        """
+        unique = set(values)
+        try:
+            return cls(sorted(unique))
+        except TypeError:
+            return list(dict.fromkeys(values))
+
+    def contains(self, value):
+        # binary search; TypeError for a value the list's values don't compare with
+        i = bisect_left(self, value)
+        return i < len(self) and self[i] == value
+
+
+def in_values(values):
+    """The $in list for IN (values): an InList when it can be one, else a copy of the values."""
+    if isinstance(values, InList):
+        return InList(values)
+    if all(is_constant(v) for v in values):
+        return InList.of(values)
+    return list(values)
+
+
+def spill_values(values):
+    """Distinct values for a temporary collection; an array('q') when they are all int64."""
+    values = InList.of(values)
+    ints = isinstance(values, InList) and all(isinstance(v, int) and not isinstance(v, bool) for v in values)
+    if values and ints and _INT64[0] <= values[0] and values[-1] <= _INT64[1]:
+        return array("q", values)
+    return values
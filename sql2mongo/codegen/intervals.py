@@ -0,0 +1,134 @@
+"""
+Interval algebra for the comparisons on one field.
+
+All the operators a FieldCond applies to its field ($eq, $in, $gt, $gte,
+$lt, $lte, $ne, $nin, possibly repeated) describe one set of values: a range,
+narrowed to a list of points by $eq/$in, minus the excluded values.
+intersect() computes that set and writes it back with as few operators as
+it takes, or returns EMPTY when no value is in it:
+
+    {$gt: 10, $gt: 20}              ->  {$gt: 20}
+    {$gte: 1, $lte: 9} and {$eq: 5} ->  {$eq: 5}
+    {$in: [1, 5, 9], $gt: 3}        ->  {$in: [5, 9]}
+    {$gte: 4, $lte: 4, $ne: 7}      ->  {$eq: 4}
+    {$gt: 50, $lt: 10}              ->  EMPTY
+
+Only constant values of one comparable kind (numbers, or strings) are
+handled; MongoDB compares values of different BSON types by type order, not
+by value, so mixed conditions are left alone. Excluded nulls are redundant
+next to a bound or a point, which never matches null.
+"""
+from sql2mongo.codegen.in_list import InList
+from sql2mongo.codegen.ir import is_constant
+
+INTERVAL_OPS = ("$eq", "$in", "$gt", "$gte", "$lt", "$lte", "$ne", "$nin")
+
+EMPTY = "empty"
+
+
+def _kind(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    return None
+
+
+def _values(ops):
+    """Every value the operators compare against, or None if one is not a constant."""
+    values = []
+    for op, value in ops:
+        if op in ("$in", "$nin"):
+            if not isinstance(value, list):
+                return None
+            values.extend(value)
+        else:
+            values.append(value)
+    if not all(is_constant(v) for v in values):
+        return None
+    return values
+
+
+def applies(ops):
+    """True if intersect() can reason about these operators."""
+    if not ops or any(op not in INTERVAL_OPS for op, _ in ops):
+        return False
+    constraints = [(op, v) for op, v in ops if op not in ("$ne", "$nin")]
+    values = _values(ops)
+    if not constraints or values is None or None in _values(constraints):
+        # only exclusions, placeholders, or {field: null}
+        return False
+    kinds = {_kind(v) for v in values if v is not None}
+    return len(kinds) <= 1 and None not in kinds
+
+
+def _tighter(bound, value, closed, upper):
+    if bound is None:
+        return value, closed
+    if value == bound[0]:
+        return value, closed and bound[1]
+    if (value < bound[0]) == upper:
+        return value, closed
+    return bound
+
+
+def _dedupe(values):
+    # values of one kind are hashable
+    return list(dict.fromkeys(values))
+
+
+def intersect(ops):
+    """The operators' value set as new ((op, value), ...), or EMPTY. Check applies() first."""
+    lower = upper = points = None
+    excluded = []
+    for op, value in ops:
+        if op == "$eq":
+            points = [value] if points is None else [p for p in points if p == value]
+        elif op == "$in":
+            if points is None:
+                points = _dedupe(value)
+            else:
+                listed = set(value)
+                points = [p for p in points if p in listed]
+        elif op in ("$gt", "$gte"):
+            lower = _tighter(lower, value, op == "$gte", upper=False)
+        elif op in ("$lt", "$lte"):
+            upper = _tighter(upper, value, op == "$lte", upper=True)
+        elif op == "$ne":
+            excluded.append(value)
+        else:
+            excluded.extend(value)
+
+    def in_range(value):
+        if lower is not None and (value < lower[0] or (value == lower[0] and not lower[1])):
+            return False
+        if upper is not None and (value > upper[0] or (value == upper[0] and not upper[1])):
+            return False
+        return True
+
+    # a bound or a point never matches null
+    excluded = [v for v in _dedupe(excluded) if v is not None]
+    excluded_set = set(excluded)
+    if points is not None:
+        points = [p for p in points if in_range(p) and p not in excluded_set]
+        if not points:
+            return EMPTY
+        return (("$eq", points[0]),) if len(points) == 1 else (("$in", InList.of(points)),)
+    if lower is not None and upper is not None:
+        if lower[0] > upper[0] or (lower[0] == upper[0] and not (lower[1] and upper[1])):
+            return EMPTY
+        if lower[0] == upper[0]:
+            return EMPTY if lower[0] in excluded_set else (("$eq", lower[0]),)
+    result = []
+    if lower is not None:
+        result.append(("$gte" if lower[1] else "$gt", lower[0]))
+    if upper is not None:
+        result.append(("$lte" if upper[1] else "$lt", upper[0]))
+    excluded = [v for v in excluded if in_range(v)]
+    if len(excluded) == 1:
+        result.append(("$ne", excluded[0]))
+    elif excluded:
+        result.append(("$nin", excluded))
+    return tuple(result)
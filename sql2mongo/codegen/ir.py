@@ -0,0 +1,317 @@
+"""
+Typed intermediate form of generated filters and pipelines, for the rewrite
+rules in codegen/rules.py.
+
+Filters lift into a tree of
+
+    And(terms)              implicit or explicit $and
+    Or(terms)               $or
+    FieldCond(field, ops)   the operators applied to one field, in order:
+                            ("$eq", v) for {field: v}, ("$gt", v), ("$in", [...]) ...
+    Never()                 a condition nothing satisfies, {$expr: false}
+    Raw(doc)                anything else ($expr, embedded document equality),
+                            carried through untouched
+
+and pipelines into a list of Stage(op, spec), with Match(condition) for
+$match stages. Nodes are immutable; rules build new ones. lower_filter() and
+lower_pipeline() give back query data; field conditions keep the order they
+were written in, so the rendered string only changes where a rule fired.
+"""
+from sql2mongo.ast.nodes import Parameter
+from sql2mongo.codegen.semi_join import Prepared
+
+COMPARISONS = ("$eq", "$ne", "$gt", "$gte", "$lt", "$lte")
+
+
+class And:
+    __slots__ = ("terms",)
+
+    def __init__(self, terms):
+        self.terms = tuple(terms)
+
+    def with_terms(self, terms):
+        return And(terms)
+
+    def __eq__(self, other):
+        return type(other) is And and other.terms == self.terms
+
+    def __hash__(self):
+        return hash(("And", self.terms))
+
+    def __repr__(self):
+        return f"And{list(self.terms)}"
+
+
+class Or:
+    __slots__ = ("terms",)
+
+    def __init__(self, terms):
+        self.terms = tuple(terms)
+
+    def with_terms(self, terms):
+        return Or(terms)
+
+    def __eq__(self, other):
+        return type(other) is Or and other.terms == self.terms
+
+    def __hash__(self):
+        return hash(("Or", self.terms))
+
+    def __repr__(self):
+        return f"Or{list(self.terms)}"
+
+
+class FieldCond:
+    """Operators on one field, all of which must hold: ((op, value), ...)."""
+    __slots__ = ("field", "ops")
+
+    def __init__(self, field, ops):
+        self.field = field
+        self.ops = tuple(ops)
+
+    @classmethod
+    def eq(cls, field, value):
+        return cls(field, (("$eq", value),))
+
+    def operators(self):
+        return [op for op, _ in self.ops]
+
+    def single(self):
+        """(op, value) when the condition is one operator, else None."""
+        return self.ops[0] if len(self.ops) == 1 else None
+
+    def __eq__(self, other):
+        return type(other) is FieldCond and other.field == self.field and _same(other.ops, self.ops)
+
+    def __hash__(self):
+        return hash(("FieldCond", self.field, tuple(op for op, _ in self.ops)))
+
+    def __repr__(self):
+        return f"FieldCond({self.field!r}, {list(self.ops)!r})"
+
+
+class Never:
+    """A condition no document satisfies."""
+    __slots__ = ()
+
+    def __eq__(self, other):
+        return type(other) is Never
+
+    def __hash__(self):
+        return hash("Never")
+
+    def __repr__(self):
+        return "Never"
+
+
+# how Never reads in query data: an expression that is always false
+NEVER_DOC = {"$expr": False}
+
+
+class Raw:
+    __slots__ = ("doc",)
+
+    def __init__(self, doc):
+        self.doc = doc
+
+    def __eq__(self, other):
+        return type(other) is Raw and other.doc == self.doc
+
+    def __hash__(self):
+        return hash(("Raw", tuple(self.doc)))
+
+    def __repr__(self):
+        return f"Raw({self.doc!r})"
+
+
+def _type(value):
+    # an InList is still a list
+    return list if isinstance(value, list) else type(value)
+
+
+def _same(a, b):
+    # values compare by type too, so True and 1 or IntSlot(1) and 1 stay apart
+    return len(a) == len(b) and all(
+        x[0] == y[0] and _type(x[1]) is _type(y[1]) and x[1] == y[1] for x, y in zip(a, b))
+
+
+def is_constant(value):
+    """True for a literal known now; placeholders are only known at bind or run time."""
+    return not isinstance(value, (Parameter, Prepared, dict, list))
+
+
+def lift_filter(doc):
+    terms = []
+    for key, value in doc.items():
+        if key == "$and":
+            terms.append(And(lift_filter(item) for item in value))
+        elif key == "$or":
+            terms.append(Or(lift_filter(item) for item in value))
+        elif key == "$expr" and value is False:
+            terms.append(Never())
+        elif key.startswith("$"):
+            terms.append(Raw({key: value}))
+        elif isinstance(value, dict):
+            if value and all(k.startswith("$") for k in value):
+                terms.append(FieldCond(key, value.items()))
+            else:
+                terms.append(Raw({key: value}))
+        else:
+            terms.append(FieldCond.eq(key, value))
+    return terms[0] if len(terms) == 1 else And(terms)
+
+
+def lower_filter(node):
+    if isinstance(node, FieldCond):
+        single = node.single()
+        if single and single[0] == "$eq" and not isinstance(single[1], dict):
+            return {node.field: single[1]}
+        return {node.field: dict(node.ops)}
+    if isinstance(node, Raw):
+        return node.doc
+    if isinstance(node, Never):
+        return dict(NEVER_DOC)
+    if isinstance(node, Or):
+        return {"$or": [lower_filter(term) for term in node.terms]}
+    # conjunctions over distinct keys merge into one document
+    lowered = [lower_filter(term) for term in node.terms]
+    merged = {}
+    for doc in lowered:
+        if any(key in merged for key in doc):
+            return {"$and": lowered}
+        merged.update(doc)
+    return merged
+
+
+def conjuncts(node):
+    return list(node.terms) if isinstance(node, And) else [node]
+
+
+def conjunction(terms):
+    return terms[0] if len(terms) == 1 else And(terms)
+
+
+def rename_fields(node, source):
+    """
+    Copy of a condition with every field path mapped through source(path),
+    or None when some path has no source (or the condition reads fields it
+    doesn't name, as $expr does).
+    """
+    if isinstance(node, FieldCond):
+        field = source(node.field)
+        return None if field is None else FieldCond(field, node.ops)
+    if isinstance(node, (And, Or)):
+        terms = [rename_fields(term, source) for term in node.terms]
+        return None if any(term is None for term in terms) else node.with_terms(terms)
+    return None
+
+
+def _related(path, other):
+    return path == other or path.startswith(other + ".") or other.startswith(path + ".")
+
+
+def _field_ref(value):
+    # "$col" names a field; "$$var" is a variable
+    return value[1:] if isinstance(value, str) and value.startswith("$") and not value.startswith("$$") else None
+
+
+def _through(path, key, value):
+    """Source of `path` when `key` is set to `value`: field references carry sub-paths along."""
+    ref = _field_ref(value)
+    if ref is None or not (path == key or path.startswith(key + ".")):
+        return None
+    return ref + path[len(key):]
+
+
+class Stage:
+    """
+    One pipeline stage. source(path) is the field lineage used to move
+    $match stages: the path the stage's input document holds the value of
+    `path` under, or None when the stage produces or changes that value, or
+    changes which documents there are in a way a filter can't cross
+    ($limit, $skip, $count ...).
+    """
+    __slots__ = ("op", "spec")
+
+    def __init__(self, op, spec):
+        self.op = op
+        self.spec = spec
+
+    def source(self, path):
+        op, spec = self.op, self.spec
+        if op in ("$match", "$sort"):
+            return path
+        if op == "$unwind":
+            spec = spec if isinstance(spec, dict) else {"path": spec}
+            written = [spec["path"][1:]] + ([spec["includeArrayIndex"]] if "includeArrayIndex" in spec else [])
+            return None if any(_related(path, field) for field in written) else path
+        if op == "$lookup":
+            return None if _related(path, spec["as"]) else path
+        if op in ("$set", "$addFields"):
+            key = next((key for key in spec if _related(path, key)), None)
+            return path if key is None else _through(path, key, spec[key])
+        if op == "$unset":
+            fields = [spec] if isinstance(spec, str) else spec
+            return None if any(_related(path, field) for field in fields) else path
+        if op == "$project":
+            return self._project_source(path)
+        if op == "$group":
+            key = spec["_id"]
+            if isinstance(key, dict):
+                name = next((name for name in key if _related(path, f"_id.{name}")), None)
+                return None if name is None else _through(path[len("_id."):], name, key[name])
+            return _through(path, "_id", key)
+        return None
+
+    def _project_source(self, path):
+        spec = self.spec
+        excluded = all(value in (0, False) for key, value in spec.items() if key != "_id")
+        key = next((key for key in spec if _related(path, key)), None)
+        if key is None:
+            # _id stays unless excluded; other fields stay only in an exclusion projection
+            return path if excluded or path == "_id" or path.startswith("_id.") else None
+        value = spec[key]
+        if value in (0, False):
+            return None
+        if value in (1, True):
+            # a.b: 1 keeps only part of a
+            return path if path == key or path.startswith(key + ".") else None
+        return _through(path, key, value)
+
+    def lower(self):
+        return {self.op: self.spec}
+
+    def __eq__(self, other):
+        return isinstance(other, Stage) and other.op == self.op and other.lower() == self.lower()
+
+    def __repr__(self):
+        return f"Stage({self.op!r}, {self.spec!r})"
+
+
+class Match(Stage):
+    __slots__ = ()
+
+    def __init__(self, condition):
+        super().__init__("$match", condition)
+
+    @property
+    def condition(self):
+        return self.spec
+
+    def lower(self):
+        return {"$match": lower_filter(self.spec)}
+
+    def __repr__(self):
+        return f"Match({self.spec!r})"
+
+
+def lift_pipeline(pipeline):
+    stages = []
+    for stage in pipeline:
+        op, spec = next(iter(stage.items()))
+        stages.append(Match(lift_filter(spec)) if op == "$match" else Stage(op, spec))
+    return stages
+
+
+def lower_pipeline(stages):
+    return [stage.lower() for stage in stages]
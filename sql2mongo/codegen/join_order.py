@@ -0,0 +1,127 @@
+"""
+Join ordering for JOIN ... ON chains.
+
+Inner joins give the same rows in any order, as long as each $lookup's local
+field is already in the document when it runs. order_joins() greedily picks,
+among the lookups that can run next, the one with the smallest estimated
+output, so the most selective lookups shrink the pipeline first. Estimates
+come from the catalog's statistics (rows per table, selectivity per filtered
+column, distinct values per join column, see SchemaCatalog); without any
+statistics the written order is kept.
+"""
+from sql2mongo.ast.nodes import Comparison, LogicalCondition, ColumnRef
+
+# row count assumed for tables without statistics
+DEFAULT_ROWS = 1000
+
+# textbook defaults for filters on columns without a selectivity estimate
+DEFAULT_SELECTIVITY = {"=": 0.1, "IN": 0.2, "BETWEEN": 0.25, "!=": 0.9}
+RANGE_SELECTIVITY = 1 / 3
+
+
+class JoinStep:
+    """One $lookup: `table` joined on foreign = local, both bound ColumnRefs."""
+    __slots__ = ("table", "local", "foreign")
+
+    def __init__(self, table, local, foreign):
+        self.table = table
+        self.local = local
+        self.foreign = foreign
+
+    @classmethod
+    def of(cls, condition, table):
+        """Splits a join condition into the step that looks up `table`."""
+        left, right = ColumnRef.of(condition.identifier), ColumnRef.of(condition.value)
+        if left.table == table and right.table != table:
+            left, right = right, left
+        return cls(table, left, right)
+
+    def local_field(self, base_table):
+        # joined tables live under their own name once unwound
+        if self.local.table in (None, base_table):
+            return self.local.column
+        return f"{self.local.table}.{self.local.column}"
+
+    def __repr__(self):
+        return f"JoinStep({self.table!r}, local={self.local}, foreign={self.foreign})"
+
+
+def selectivity(catalog, table, terms):
+    """Estimated share of `table` kept by the AND of `terms`."""
+    result = 1.0
+    for term in terms:
+        result *= _term_selectivity(catalog, table, term)
+    return result
+
+
+def _term_selectivity(catalog, table, term):
+    if isinstance(term, LogicalCondition):
+        left = _term_selectivity(catalog, table, term.left)
+        right = _term_selectivity(catalog, table, term.right)
+        if term.operator.upper() == "AND":
+            return left * right
+        return left + right - left * right
+    if isinstance(term, Comparison) and isinstance(term.identifier, ColumnRef):
+        known = catalog.selectivity(table, term.identifier.column) if catalog is not None else None
+        if known is not None:
+            return known
+        return DEFAULT_SELECTIVITY.get(term.operator, RANGE_SELECTIVITY)
+    return 1.0
+
+
+def _rows(catalog, table):
+    rows = catalog.rows(table)
+    return DEFAULT_ROWS if rows is None else max(rows, 1)
+
+
+def distinct_values(catalog, table, column):
+    """
+    Estimated distinct values of table.column: the catalog's "distinct"
+    statistic, else every row for a key column, else None (unknown).
+    """
+    known = catalog.cardinality(table, column)
+    if known is not None:
+        return min(max(known, 1), _rows(catalog, table))
+    if column in ("id", "_id"):
+        return _rows(catalog, table)
+    return None
+
+
+def estimate_join(catalog, rows, step, filters):
+    """Documents left after `step` runs on `rows` input documents."""
+    foreign_rows = _rows(catalog, step.table) * selectivity(catalog, step.table, filters.get(step.table, ()))
+    distinct = [d for d in (distinct_values(catalog, ref.table, ref.column) for ref in (step.local, step.foreign)) if d]
+    divisor = max(distinct) if distinct else max(_rows(catalog, step.local.table), _rows(catalog, step.table))
+    return rows * foreign_rows / divisor
+
+
+def order_joins(base_table, steps, catalog, filters=None):
+    """
+    Returns `steps` in execution order. `filters` maps a table to the
+    single-table conditions pushed down onto it.
+    """
+    steps = list(steps)
+    if catalog is None or len(steps) < 2:
+        return steps
+    if not any(catalog.rows(t) is not None for t in [base_table] + [s.table for s in steps]):
+        return steps
+    filters = filters or {}
+    rows = _rows(catalog, base_table) * selectivity(catalog, base_table, filters.get(base_table, ()))
+    available = {base_table}
+    ordered = []
+    while steps:
+        best = None
+        for step in steps:
+            if (step.local.table or base_table) not in available:
+                continue
+            estimate = estimate_join(catalog, rows, step, filters)
+            if best is None or estimate < best[0]:
+                best = (estimate, step)
+        if best is None:
+            # unreachable for analyzed queries: every ON reads an earlier table
+            return ordered + steps
+        rows, step = best
+        ordered.append(step)
+        steps.remove(step)
+        available.add(step.table)
+    return ordered
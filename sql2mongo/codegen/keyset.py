@@ -0,0 +1,77 @@
+"""
+Keyset pagination for generated find queries.
+
+OFFSET compiles to skip(), which still walks every skipped document, so each
+page costs more than the one before. Keyset pagination instead remembers the
+sort key of the last document of a page and asks for the documents after it:
+
+    ORDER BY age DESC  ->  sort {age: -1, _id: 1}
+    after {age: 40, _id: X}  ->  {$or: [{age: {$lt: 40}},
+                                        {age: 40, _id: {$gt: X}}]}
+
+_id is appended to the sort as a tie-breaker, so the order is total and no
+document is skipped or repeated between pages. With an index on the sort
+columns the predicate is a range seek, and page N costs about as much as
+page 1.
+
+MongoDB sorts null and missing keys before every other value, but range
+operators never match them ($lt: 40 skips nulls, $gt: null matches nothing).
+The predicate spells that order out: nulls come after any value in
+descending order, and every non-null value comes after a null in ascending
+order. A sort key missing from `last` counts as null.
+"""
+from sql2mongo.codegen.shell import MongoQuery
+
+TIE_BREAKER = "_id"
+
+
+def keyset_predicate(sort, last):
+    """
+    Filter matching the documents after `last` in `sort` order: the first key
+    past its last value, or equal on it and past on the next key, and so on.
+    `sort` must hold the _id tie-breaker.
+    """
+    keys = list(sort.items())
+    if TIE_BREAKER not in sort:
+        raise ValueError(f"Keyset pagination needs '{TIE_BREAKER}' as a sort key")
+    if TIE_BREAKER not in last:
+        raise ValueError(f"Keyset pagination needs the last value of '{TIE_BREAKER}'")
+    branches = []
+    for i, (key, direction) in enumerate(keys):
+        equal = {k: last.get(k) for k, _ in keys[:i]}
+        branches += [dict(equal, **{key: after}) for after in _after(last.get(key), direction)]
+    return branches[0] if len(branches) == 1 else {"$or": branches}
+
+
+def _after(value, direction):
+    # conditions on one key matching the values sorted strictly after `value`
+    if direction == 1:
+        return [{"$ne": None}] if value is None else [{"$gt": value}]
+    return [] if value is None else [{"$lt": value}, None]
+
+
+def page_after(mongo_data, last=None):
+    """
+    Copy of the find query `mongo_data` set up for keyset pagination: sorted
+    with the _id tie-breaker, projecting the sort keys so every returned
+    document can serve as the next `last`, and, when `last` (the last
+    document of the previous page) is given, restricted to the documents
+    after it. Use LIMIT for the page size; OFFSET cannot be combined with it.
+    """
+    if "filter" not in mongo_data or "count" in mongo_data or "distinct" in mongo_data:
+        raise ValueError("Keyset pagination needs a find query (no JOIN, GROUP BY or aggregates)")
+    if "skip" in mongo_data:
+        raise ValueError("Keyset pagination cannot be combined with OFFSET")
+    result = MongoQuery(mongo_data)
+    result.invalidate()
+    sort = dict(mongo_data.get("sort") or {})
+    sort.setdefault(TIE_BREAKER, 1)
+    result["sort"] = sort
+    projection = mongo_data.get("projection")
+    if projection:
+        result["projection"] = dict(projection, **{key: 1 for key in sort})
+    if last is not None:
+        predicate = keyset_predicate(sort, last)
+        filter_doc = mongo_data["filter"]
+        result["filter"] = {"$and": [filter_doc, predicate]} if filter_doc else predicate
+    return result
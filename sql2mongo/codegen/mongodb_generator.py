@@ -1,84 +1,204 @@
-from sql2mongo.ast.nodes import SelectQuery, LogicalCondition, Comparison,OrderByItem,Aggregate
-import json
+from sql2mongo.ast.nodes import SelectQuery, LogicalCondition, Comparison,OrderByItem,Aggregate,ColumnRef,Parameter
+from sql2mongo.codegen.shell import MongoQuery
+from sql2mongo.codegen.join_order import JoinStep, order_joins
+from sql2mongo.codegen.semi_join import LOOKUP, DISTINCT, TEMP, STRATEGIES, INLINE_MAX_VALUES, Prepared, choose_strategy
+from sql2mongo.codegen.in_list import in_values, spill_values
+
+# a JOIN that reads at most this share of the base collection's columns
+# projects the base documents down before $lookup
+NARROW_QUERY_RATIO = 0.5
+
+# SELECT DISTINCT / COUNT(DISTINCT) expected to return at most this many
+# values use the distinct command instead of a $group pipeline
+DISTINCT_COMMAND_MAX_VALUES = 10000
+
+
+class GenerationContext:
+    """Per-query state threaded through code generation, so a single generator
+    can serve many threads concurrently."""
+    def __init__(self, base_table, analysis=None):
+        self.base_table = base_table
+        self.analysis = analysis  # AnalysisContext from SemanticAnalyzer, if any
+        # set when semi-join stages run ahead of the query, which must then be a pipeline
+        self.pipeline_only = False
+
 
 class MongoDBGenerator:
+    def __init__(self, semi_join=None, in_list_max=INLINE_MAX_VALUES):
+        # fixed IN (subquery) strategy (see codegen/semi_join.py); None picks one per query
+        if semi_join is not None and semi_join not in STRATEGIES:
+            raise ValueError(f"Unknown semi-join strategy: {semi_join}")
+        self.semi_join = semi_join
+        # longer IN lists go to a temporary collection (see codegen/in_list.py); None never spills
+        self.in_list_max = in_list_max
     def _has_aggregate(self, node):
         for col in node.columns:
             if isinstance(col, Aggregate):
                 return True
         return False
-    def _get_schema_columns(self, node, table):
-        # quick helper if schema not available here
-        # ideally pass schema to generator, but for now:
-        return []  # TEMP (see better fix below)
-    def _generate_join(self, node):
+    def _conjuncts(self, node):
+        # top-level AND terms of a condition, in source order
+        if node is None:
+            return []
+        if isinstance(node, LogicalCondition) and node.operator.upper() == "AND":
+            return self._conjuncts(node.left) + self._conjuncts(node.right)
+        return [node]
+    def _referenced_tables(self, node):
+        # tables a condition reads; None stands for a column of unknown table
+        if isinstance(node, LogicalCondition):
+            return self._referenced_tables(node.left) | self._referenced_tables(node.right)
+        if isinstance(node, Comparison):
+            tables = set()
+            for side in (node.identifier, node.value):
+                if isinstance(side, ColumnRef):
+                    tables.add(side.table)
+                elif isinstance(side, (Aggregate, SelectQuery)):
+                    tables.add(None)
+            return tables
+        return {None}
+    def _push_down(self, conditions, base_table, steps):
+        """
+        Places WHERE conjuncts by the tables they read: base-table terms run
+        before the first $lookup, single foreign-table terms inside that
+        table's lookup pipeline, and the rest right after the $unwind of the
+        last table they read (at the end if a table is unknown).
+        Returns (base terms, {table: terms}, {step index: terms}).
+        """
+        positions = {base_table: 0}
+        for i, step in enumerate(steps, 1):
+            positions[step.table] = i
+        base, foreign, after = [], {}, {}
+        for condition in conditions:
+            for term in self._conjuncts(condition):
+                tables = self._referenced_tables(term)
+                if tables == {base_table}:
+                    base.append(term)
+                elif len(tables) == 1 and tables <= positions.keys():
+                    foreign.setdefault(next(iter(tables)), []).append(term)
+                elif tables <= positions.keys():
+                    after.setdefault(max(positions[t] for t in tables), []).append(term)
+                else:
+                    after.setdefault(len(steps), []).append(term)
+        return base, foreign, after
+    def _match_doc(self, terms, ctx):
+        if len(terms) == 1:
+            return self._generate_filter(terms[0], ctx)
+        return {"$and": [self._generate_filter(t, ctx) for t in terms]}
+    def _needed_columns(self, node, terms, ctx, steps):
+        """
+        table -> columns still read once each table is joined (SELECT,
+        ORDER BY, the filters that run after $unwind and the local keys of
+        the lookups), or None for SELECT *.
+        """
+        tables = [ctx.base_table] + [step.table for step in steps]
+        needed = {table: {} for table in tables}
+        def add(table, column):
+            needed.setdefault(table or ctx.base_table, {})[column] = None
+        for col in node.columns:
+            if isinstance(col, Aggregate):
+                continue
+            ref = ColumnRef.of(col)
+            if ref.column == "*":
+                return None
+            add(ref.table, ref.column)
+        for item in node.order_by:
+            ref = ColumnRef.of(item.column)
+            add(ref.table, ref.column)
+        for step in steps:
+            add(step.local.table, step.local.column)
+        pending = list(terms)
+        while pending:
+            term = pending.pop()
+            if isinstance(term, LogicalCondition):
+                pending += [term.left, term.right]
+            elif isinstance(term, Comparison):
+                for side in (term.identifier, term.value):
+                    if isinstance(side, ColumnRef):
+                        add(side.table, side.column)
+        return needed
+    def _join_stages(self, ctx, node, steps, conditions):
+        """
+        $match (base) -> [$project (base)] -> per join: $lookup (its filters and
+        projection) -> $unwind -> $match (filters that needed this table).
+        The joins run in the order join_order.order_joins picks.
+        """
+        base, foreign, after = self._push_down(conditions, ctx.base_table, steps)
+        catalog = ctx.analysis.catalog if ctx.analysis is not None else None
+        ordered = order_joins(ctx.base_table, steps, catalog, dict(foreign, **{ctx.base_table: base}))
+        if ordered != steps:
+            # multi-table filters follow the last table they read in the new order
+            steps = ordered
+            after = self._push_down(conditions, ctx.base_table, steps)[2]
+        needed = self._needed_columns(node, [t for terms in after.values() for t in terms], ctx, steps)
+        pipeline = []
+        if base:
+            pipeline.append({"$match": self._match_doc(base, ctx)})
+        if needed is not None and catalog is not None:
+            width = len(catalog.get(ctx.base_table, ()))
+            if len(needed[ctx.base_table]) <= width * NARROW_QUERY_RATIO:
+                # narrow query over a wide collection: carry only what the joins read
+                pipeline.append({"$project": {column: 1 for column in needed[ctx.base_table]}})
+        for i, step in enumerate(steps, 1):
+            lookup = {
+                "from": step.table,
+                "localField": step.local_field(ctx.base_table),
+                "foreignField": step.foreign.column,
+            }
+            sub_pipeline = []
+            if step.table in foreign:
+                # foreign fields are top-level inside the lookup pipeline
+                foreign_ctx = GenerationContext(step.table, ctx.analysis)
+                sub_pipeline.append({"$match": self._match_doc(foreign[step.table], foreign_ctx)})
+            if needed is not None:
+                # joined documents keep only the columns read after the join
+                foreign_columns = dict(needed[step.table], **{step.foreign.column: None})
+                projection = {column: 1 for column in foreign_columns}
+                if "_id" not in projection:
+                    projection["_id"] = 0
+                sub_pipeline.append({"$project": projection})
+            if sub_pipeline:
+                lookup["pipeline"] = sub_pipeline
+            lookup["as"] = step.table
+            pipeline.append({"$lookup": lookup})
+            pipeline.append({
+                "$unwind": f"${step.table}"
+                })
+            if i in after:
+                pipeline.append({"$match": self._match_doc(after[i], ctx)})
+        return pipeline
+    def _generate_join(self, node, ctx):
         tables = node.table
         left_table = tables[0]
         right_table = tables[1]
-        join_cond, filter_list = self._split_conditions(node.where)
+        if ctx.analysis is not None and ctx.analysis.join_condition is not None:
+            # the analyzer already split WHERE into the join key and the filters
+            join_cond = ctx.analysis.join_condition
+            filter_cond = ctx.analysis.filter_condition
+            filter_list = [filter_cond] if filter_cond is not None else []
+        else:
+            join_cond, filter_list = self._split_conditions(node.where)
         if not join_cond:
             raise ValueError("JOIN condition not found")
-        left = join_cond.identifier
-        right = join_cond.value
-        # Determine mapping
-        if left["table"] == left_table:
-            localField = left["column"]
-            foreignField = right["column"]
-        else:
-            localField = right["column"]
-            foreignField = left["column"]
-        pipeline = []
-        # $lookup
-        pipeline.append({
-            "$lookup": {
-                "from": right_table,
-                "localField": localField,
-                "foreignField": foreignField,
-                "as": right_table
-            }
-        })
-        pipeline.append({
-            "$unwind": f"${right_table}"
-            })
-        # filter condition
-        if filter_list:
-            if len(filter_list) == 1:
-                match = self._generate_filter(filter_list[0])
-            else:
-                match = {
-                        "$and": [self._generate_filter(f) for f in filter_list]
-                        }
-            pipeline.append({"$match": match})
+        pipeline = self._join_stages(ctx, node, [JoinStep.of(join_cond, right_table)], filter_list)
+        pipeline += self._join_page_stages(node, ctx)
         # $project
         projection = {}
         for col in node.columns:
             # --- normalize column ---
-            if isinstance(col, dict):
-                table = col.get("table")
-                field = col.get("column")
-            elif isinstance(col, str):
-                if "." in col:
-                    table, field = col.split(".")
-                else:
-                    matches = [t for t in node.table if col in self.schema[t]]
-                    if len(matches) == 1:
-                        table = matches[0]
-                        field = col
-                    else:
-                        raise ValueError(f"Ambiguous column '{col}' in JOIN")
-            else:
+            if not isinstance(col, (ColumnRef, str)):
                 continue
+            ref = ColumnRef.of(col)
+            table, field = ref.table, ref.column
+            if table is None:
+                # only reachable without analysis; bound columns are always qualified
+                raise ValueError(f"Ambiguous column '{field}' in JOIN")
             # --- projection mapping ---
             if table == right_table:
                 projection[f"{right_table}.{field}"] = 1
             else:
                 projection[field] = 1
         pipeline.append({"$project": projection})
-        return {
-            "string": f"db.{left_table}.aggregate({pipeline})",
-            "collection": left_table,
-            "pipeline": pipeline
-            }
+        return MongoQuery(collection=left_table, pipeline=pipeline)
     def _contains_in_subquery(self, node):
         from sql2mongo.ast.nodes import LogicalCondition, Comparison
 
@@ -92,85 +212,100 @@ class MongoDBGenerator:
             )
 
         return False
-    def generate(self, ast):
+    def _is_spilled(self, term, base_table):
+        """
+        True for an AND-ed IN list too long to inline, on a column of the FROM
+        table (the semi-join runs before any join). Lists under an OR, or
+        holding placeholders only known at bind time, stay inline.
+        """
+        if self.in_list_max is None or not (isinstance(term, Comparison) and term.operator == "IN"):
+            return False
+        identifier = term.identifier
+        if isinstance(identifier, ColumnRef) and identifier.table not in (None, base_table):
+            return False
+        return len(term.value) > self.in_list_max and not any(isinstance(v, Parameter) for v in term.value)
+    def _has_spilled_in(self, node, base_table):
+        return any(self._is_spilled(t, base_table) for t in self._conjuncts(node.where))
+    def generate(self, ast, analysis=None):
+        """
+        Generates mongo_data for a query. Pass the AnalysisContext from
+        SemanticAnalyzer.validate_query to generate from its bound tree, where
+        every column is already resolved; without it the AST is used as parsed.
+        """
+        if analysis is not None and analysis.bound is not None:
+            ast = analysis.bound
         if isinstance(ast,SelectQuery):
-            self.current_base_table = ast.table
-            if ast.where and self._contains_in_subquery(ast.where):
-                return self._generate_in_subquery(ast)
-            if hasattr(ast, "joins") and ast.joins:
-                return self._generate_explicit_join(ast)
-            if isinstance(ast.table, list) and len(ast.table) > 1:
-                return self._generate_join(ast)
-            # Aggregation
-            if self._has_aggregate(ast) or ast.group_by:
-                return self._generate_aggregate(ast)
-            # Normal SELECT
-            return self._generate_find(ast)
+            # implicit joins read FROM's first table; the rest arrive via $lookup
+            base_table = ast.table[0] if isinstance(ast.table, tuple) else ast.table
+            ctx = GenerationContext(base_table, analysis)
+            if analysis is not None and analysis.bound is not None:
+                has_in_subquery = analysis.has_in_subquery
+            else:
+                has_in_subquery = ast.where and self._contains_in_subquery(ast.where)
+            if has_in_subquery or self._has_spilled_in(ast, base_table):
+                return self._generate_in_subquery(ast, ctx)
+            return self._generate_select(ast, ctx)
         else:
             raise ValueError(f"Unsupported AST node: {type(ast)}")
-    def _generate_explicit_join(self, node):
+    def _is_plain_select(self, node):
+        # a find: no join, grouping, DISTINCT or COUNT
+        return not (node.joins or isinstance(node.table, tuple) or node.distinct or node.group_by
+                    or self._has_aggregate(node))
+    def _generate_select(self, ast, ctx):
+        if hasattr(ast, "joins") and ast.joins:
+            return self._generate_explicit_join(ast, ctx)
+        if isinstance(ast.table, tuple) and len(ast.table) > 1:
+            return self._generate_join(ast, ctx)
+        if ast.distinct:
+            return self._generate_distinct(ast, ctx)
+        count_field = self._count_field(ast)
+        if count_field and ast.columns[0].distinct:
+            return self._generate_count_distinct(ast, ctx, count_field)
+        if count_field:
+            return self._generate_count(ast, ctx, count_field)
+        # Aggregation
+        if self._has_aggregate(ast) or ast.group_by:
+            return self._generate_aggregate(ast, ctx)
+        # Normal SELECT
+        return self._generate_find(ast, ctx)
+    def _generate_explicit_join(self, node, ctx):
         base_table = node.table
-        join = node.joins[0]   # minimal support: single JOIN
-        join_table = join["table"]
-        condition = join["condition"]
-        left = condition.identifier
-        right = condition.value
-        # Determine mapping
-        if left["table"] == base_table:
-            localField = left["column"]
-            foreignField = right["column"]
-        else:
-            localField = right["column"]
-            foreignField = left["column"]
-        pipeline = []
-        # $lookup
-        pipeline.append({
-            "$lookup": {
-                "from": join_table,
-                "localField": localField,
-                "foreignField": foreignField,
-                "as": join_table
-            }
-        })
-        # $unwind
-        pipeline.append({
-            "$unwind": f"${join_table}"
-        })
-        # WHERE support (important)
-        if node.where:
-            match = self._generate_filter(node.where)
-            pipeline.append({"$match": match})
+        steps = [JoinStep.of(join.condition, join.table) for join in node.joins]
+        pipeline = self._join_stages(ctx, node, steps, [node.where])
+        pipeline += self._join_page_stages(node, ctx)
         #  projection (reuse your logic)
         #projection = {}
         add_fields = {}
         clean_projection = {}
         for col in node.columns:
-            if isinstance(col, dict):
-                table = col.get("table")
-                field = col.get("column")
-            elif isinstance(col, str):
-                if "." in col:
-                    table, field = col.split(".")
-                else:
-                    table = base_table
-                    field = col
-            else:
+            if not isinstance(col, (ColumnRef, str)):
                 continue
-            if table == join_table:
-                add_fields[field] = f"${join_table}.{field}"
+            ref = ColumnRef.of(col)
+            table = ref.table or base_table
+            field = ref.column
+            if table != base_table:
+                add_fields[field] = f"${table}.{field}"
             
             clean_projection[field] = 1
         if add_fields:
             pipeline.append({"$addFields": add_fields})
         pipeline.append({"$project": clean_projection})
-        return {
-            "string": f"db.{base_table}.aggregate({pipeline})",
-            "collection": base_table,
-            "pipeline": pipeline
-            }
+        return MongoQuery(collection=base_table, pipeline=pipeline)
+    def _join_page_stages(self, node, ctx):
+        # ORDER BY / OFFSET / LIMIT over the joined documents, before the final
+        # projection drops the columns they sort on
+        stages = []
+        if node.order_by:
+            sort = {}
+            for item in node.order_by:
+                ref = ColumnRef.of(item.column)
+                path = ref.column if ref.table in (None, ctx.base_table) else f"{ref.table}.{ref.column}"
+                sort[path] = 1 if item.direction.upper() == "ASC" else -1
+            stages.append({"$sort": sort})
+        return stages + self._page_stages(node)
     def _split_conditions(self, node):
         if isinstance(node, Comparison):
-            if isinstance(node.value, dict):
+            if isinstance(node.value, ColumnRef):
                 return node, []
             else:
                 return None, [node]
@@ -181,60 +316,8 @@ class MongoDBGenerator:
             filters = left_filters + right_filters
             return join, filters
         return None, []
-    def _generate_lookup(self, node):
-        join = node.join
-        #print("DEBUG JOIN:", node.join, type(node.join))
-        base_table = join.get("left_table")
-        foreign_table = join.get("right_table")
-        pipeline = []
-        # $lookup
-        pipeline.append({
-            "$lookup": {
-                "from": foreign_table,
-                "localField": join.get("left_col"),
-                "foreignField": join.get("right_col"),
-                "as": foreign_table
-            }
-        })
-        pipeline.append({
-            "$unwind": f"${foreign_table}"
-            })
-        if hasattr(node, "filter_condition") and node.filter_condition:
-            pipeline.append({
-               "$match": self._generate_filter(node.filter_condition)
-                })
-        # $project
-        projection = {}
-        for col in node.columns:
-            # --- normalize ---
-            if isinstance(col, dict):
-                table = col.get("table")
-                field = col.get("column")
-            elif isinstance(col, str):
-                if "." in col:
-                    table, field = col.split(".")
-                else:
-                    table = None
-                    field = col
-            else:
-                continue
-            # --- assign projection ---
-            if table == foreign_table:
-                projection[f"{table}.{field}"] = 1
-            else:
-                projection[field] = 1
-        pipeline.append({"$project": projection})
-        return {
-                "string": f"db.{base_table}.aggregate({json.dumps(pipeline, indent=2)})",
-                "collection": base_table,
-                "pipeline": pipeline
-                }
-    def _generate_aggregate(self, node):
-        pipeline = []
-        # WHERE → $match
-        if node.where:
-            match_stage = {"$match": self._generate_filter(node.where)}
-            pipeline.append(match_stage)
+    def _group_stages(self, node, ctx):
+        # $group for GROUP BY / aggregates, then HAVING as a $match on its output
         group_stage = {}
         if node.group_by:
             if len(node.group_by) == 1:
@@ -245,15 +328,30 @@ class MongoDBGenerator:
                         }
         else:
             group_stage["_id"] = None
-        for col in node.columns:
+        # HAVING may filter on aggregates the SELECT list doesn't show
+        having_aggregates = []
+        pending = [node.having] if node.having else []
+        while pending:
+            term = pending.pop()
+            if isinstance(term, LogicalCondition):
+                pending += [term.right, term.left]
+            elif isinstance(term, Comparison) and isinstance(term.identifier, Aggregate):
+                having_aggregates.append(term.identifier)
+        distinct_sizes = {}
+        for col in list(node.columns) + having_aggregates:
             if isinstance(col, Aggregate):
                 func = col.func
                 column = col.column
-                if func == "COUNT":
+                field = self._aggregate_field(col)
+                if func == "COUNT" and col.distinct:
+                    # collect the values, then count them once grouped (NULL never counts)
+                    group_stage[field] = {"$addToSet": f"${column}"}
+                    distinct_sizes[field] = {"$size": {"$setDifference": [f"${field}", [None]]}}
+                elif func == "COUNT":
                     if column == "*":
-                        group_stage["count"] = { "$sum": 1 }
+                        group_stage[field] = { "$sum": 1 }
                     else:
-                        group_stage[f"count_{column}"] = {
+                        group_stage[field] = {
                                 "$sum": {
                                     "$cond": [
                                         {"$ne": [f"${column}", None]},
@@ -269,43 +367,153 @@ class MongoDBGenerator:
                             "AVG": "$avg",
                             "SUM": "$sum"
                             }[func]
-                    group_stage[f"{func.lower()}_{column}"] = {mongo_operator: f"${column}"}
-        pipeline.append({ "$group": group_stage })
-        # HAVING → $match AFTER $group
+                    group_stage[field] = {mongo_operator: f"${column}"}
+        stages = [{ "$group": group_stage }]
+        if distinct_sizes:
+            stages.append({"$set": distinct_sizes})
+        # HAVING → $match AFTER $group, where the group keys are under _id
         if node.having:
-            pipeline.append({
-                "$match": self._generate_filter(node.having)
+            stages.append({
+                "$match": self._group_key_fields(self._generate_filter(node.having, ctx), node.group_by)
                 })
+        return stages
+    def _group_key_fields(self, doc, group_by):
+        group_by = group_by or []
+        if len(group_by) == 1:
+            keys = {group_by[0]: "_id"}
+        else:
+            keys = {col: f"_id.{col}" for col in group_by}
+        renamed = {}
+        for k, v in doc.items():
+            if k in ("$and", "$or"):
+                renamed[k] = [self._group_key_fields(d, group_by) for d in v]
+            else:
+                renamed[keys.get(k, k)] = v
+        return renamed
+    def _aggregate_field(self, agg):
+        # output field of an aggregate: count, count_age, count_distinct_city, sum_amount
+        if agg.func == "COUNT":
+            if agg.column == "*":
+                return "count"
+            return f"count_distinct_{agg.column}" if agg.distinct else f"count_{agg.column}"
+        return f"{agg.func.lower()}_{agg.column}"
+    def _count_field(self, node):
+        # output field of an ungrouped single-COUNT query, None for anything else
+        if node.group_by or node.having or node.limit == 0 or node.offset is not None or len(node.columns) != 1:
+            return None
+        col = node.columns[0]
+        if not isinstance(col, Aggregate) or col.func != "COUNT":
+            return None
+        return self._aggregate_field(col)
+    def _generate_count(self, node, ctx, field):
+        """
+        COUNT without GROUP BY as a count operation: countDocuments(filter), or
+        estimatedDocumentCount() from the collection metadata when there is no
+        filter. Unlike $group, it also yields a row (of 0) for no matches.
+        """
+        filter_doc = self._generate_filter(node.where, ctx) if node.where else {}
+        column = node.columns[0].column
+        if column != "*":
+            # COUNT(col) skips NULLs, and missing fields are NULL
+            not_null = {str(column): {"$ne": None}}
+            filter_doc = {"$and": [filter_doc, not_null]} if filter_doc else not_null
+        result = MongoQuery(collection=node.table, count=field)
+        if filter_doc:
+            result["filter"] = filter_doc
+        return result
+    def _distinct_command(self, node, ctx, column):
+        """
+        True if DISTINCT over `column` should run as the distinct command: it
+        returns every value in one reply (capped at 16MB) and cannot sort or
+        limit, so it is used for small results only (and never behind
+        semi-join stages, which need a pipeline). The expected number of
+        values comes from the catalog's "distinct" statistics; without one the
+        result could be any size, so $group is used.
+        """
+        if node.order_by or node.limit is not None or node.offset is not None or ctx.pipeline_only:
+            return False
+        catalog = ctx.analysis.catalog if ctx.analysis is not None else None
+        expected = catalog.cardinality(node.table, column) if catalog is not None else None
+        return expected is not None and expected <= DISTINCT_COMMAND_MAX_VALUES
+    def _generate_distinct(self, node, ctx):
+        # SELECT DISTINCT: distinct(col, filter) or $group on the selected columns
+        columns = [ColumnRef.of(col).column for col in node.columns]
+        filter_doc = self._generate_filter(node.where, ctx) if node.where else {}
+        if len(columns) == 1 and self._distinct_command(node, ctx, columns[0]):
+            return MongoQuery(collection=node.table, distinct=columns[0], filter=filter_doc)
+        return self._generate_aggregate(node.replace(group_by=tuple(columns), distinct=False), ctx)
+    def _generate_count_distinct(self, node, ctx, field):
+        # ungrouped COUNT(DISTINCT col): the distinct command's length, or group per value and $count
+        column = node.columns[0].column
+        not_null = {column: {"$ne": None}}
+        filter_doc = self._generate_filter(node.where, ctx) if node.where else {}
+        filter_doc = {"$and": [filter_doc, not_null]} if filter_doc else not_null
+        if self._distinct_command(node, ctx, column):
+            return MongoQuery(collection=node.table, distinct=column, filter=filter_doc, count=field)
+        return MongoQuery(collection=node.table, pipeline=[
+            {"$match": filter_doc},
+            {"$group": {"_id": f"${column}"}},
+            {"$count": field},
+        ])
+    def _index_sort(self, node, ctx):
+        """
+        Sort for ahead of $group when ORDER BY is on the group keys and the
+        catalog lists an index that starts with them and holds every column the
+        query reads: the server then walks that index in order (a covered scan,
+        or DISTINCT_SCAN for a bare $group) instead of the collection. Without
+        such an index the sort would be a blocking in-memory sort, so None.
+        """
+        catalog = ctx.analysis.catalog if ctx.analysis is not None else None
+        if catalog is None or not node.group_by or not node.order_by:
+            return None
+        keys = [ColumnRef.of(item.column).column for item in node.order_by]
+        directions = {item.direction for item in node.order_by}
+        if sorted(keys) != sorted(node.group_by) or len(directions) != 1:
+            return None
+        read = set(keys)
+        read.update(col.column for col in node.columns if isinstance(col, Aggregate) and col.column != "*")
+        pending = [node.where] if node.where else []
+        while pending:
+            term = pending.pop()
+            if isinstance(term, LogicalCondition):
+                pending += [term.left, term.right]
+            elif isinstance(term, Comparison):
+                read.add(ColumnRef.of(term.identifier).column)
+        direction = 1 if directions == {"ASC"} else -1
+        for index in catalog.indexes(node.table):
+            if index[:len(keys)] == keys and read <= set(index):
+                return {key: direction for key in keys}
+        return None
+    def _generate_aggregate(self, node, ctx):
+        pipeline = []
+        # WHERE → $match
+        if node.where:
+            match_stage = {"$match": self._generate_filter(node.where, ctx)}
+            pipeline.append(match_stage)
+        index_sort = self._index_sort(node, ctx)
+        if index_sort:
+            pipeline.append({"$sort": index_sort})
+        pipeline += self._group_stages(node, ctx)
         # ORDER BY after GROUP
         if node.order_by:
             sort_doc = {}
             for item in node.order_by:
                 direction = 1 if item.direction.upper() == "ASC" else -1
+                column = ColumnRef.of(item.column).column
                 # If sorting by grouped column → map to _id
-                if node.group_by and item.column in node.group_by:
+                if node.group_by and column in node.group_by:
                     if len(node.group_by) == 1:
                         sort_doc["_id"] = direction
                     else:
-                        sort_doc[f"_id.{item.column}"] = direction
+                        sort_doc[f"_id.{column}"] = direction
                 else:
                     # Sorting by aggregate field
-                    sort_doc[item.column] = direction
+                    sort_doc[column] = direction
             pipeline.append({"$sort": sort_doc})
 
-        # LIMIT after GROUP
-        if node.limit is not None:
-            pipeline.append({"$limit": node.limit})
+        # OFFSET / LIMIT after GROUP
+        pipeline += self._page_stages(node)
 
-        #return f"db.{node.table}.aggregate({pipeline})"
-        result = {
-                "string": f"db.{node.table}.aggregate({pipeline})",
-                "collection": node.table,
-                "pipeline": pipeline
-                }
-        if node.order_by:
-            result["sort"] = self._generate_sort(node.order_by)
-        if node.limit is not None:
-            result["limit"] = node.limit
         # $project to rename _id back to group_by column name(s)
         project_stage = {}
         if node.group_by:
@@ -319,111 +527,61 @@ class MongoDBGenerator:
         # also expose aggregate fields
         for col in node.columns:
             if isinstance(col, Aggregate):
-                func = col.func
-                column = col.column
-                if func == "COUNT":
-                    if column == "*":
-                        project_stage["count"] = 1
-                    else:
-                        project_stage[f"count_{column}"] = 1
-                elif func in ["MIN", "MAX", "AVG", "SUM"]:
-                    project_stage[f"{func.lower()}_{column}"] = 1
+                project_stage[self._aggregate_field(col)] = 1
 
         pipeline.append({"$project": project_stage})
 
-        return {
-            "string": f"db.{node.table}.aggregate({pipeline})",
-            "collection": node.table,
-            "pipeline": pipeline
-        }
-        return result
+        return MongoQuery(collection=node.table, pipeline=pipeline)
 
 
-    def _generate_find(self, node: SelectQuery):
+    def _generate_find(self, node: SelectQuery, ctx):
         collection = node.table
-        filter_doc = self._generate_filter(node.where) if node.where else {}
+        filter_doc = self._generate_filter(node.where, ctx) if node.where else {}
         projection = self._generate_projection(node.columns)
 
-        
-        # Format as MongoDB shell command (custom format, not JSON)
-        filter_str = self._format_mongo_shell(filter_doc)
-        
-        if projection:
-            proj_str = self._format_mongo_shell(projection)
-            query = f"db.{collection}.find({filter_str}, {proj_str})"
-        else:
-            query = f"db.{collection}.find({filter_str})"
-
+        # the mongosh string is rendered lazily by MongoQuery (see codegen/shell.py)
+        result = MongoQuery(collection=collection, filter=filter_doc, projection=projection)
         if node.order_by:
-            sort_doc = self._generate_sort(node.order_by)
-            sort_str = self._format_mongo_shell(sort_doc)
-            #print("DEBUG order_by:", node.order_by)
-            #print("DEBUG sort_doc:", sort_doc)
-            query += f".sort({sort_str})"
-
-        if node.limit is not None:
-            query += f".limit({node.limit})"
-        #return query
-        result={
-                "string": query,
-                "collection": collection,
-                "filter": filter_doc,
-                "projection": projection
-                }
-        if node.order_by:
-            result["sort"] = sort_doc
+            result["sort"] = self._generate_sort(node.order_by)
+        if node.offset is not None:
+            result["skip"] = node.offset
         if node.limit is not None:
             result["limit"] = node.limit
         return result
-    def _format_mongo_shell(self, obj):
-        """Recursively formats Python objects to MongoDB shell syntax (keys unquoted)."""
-        if isinstance(obj, dict):
-            # { key: value, key2: value2 }
-            items = []
-            for k, v in obj.items():
-                formatted_value = self._format_mongo_shell(v)
-                items.append(f"{k}: {formatted_value}")
-            return "{ " + ", ".join(items) + " }"
-        
-        elif isinstance(obj, list):
-            # [ item1, item2 ]
-            items = [self._format_mongo_shell(i) for i in obj]
-            return "[ " + ", ".join(items) + " ]"
-        
-        elif isinstance(obj, str):
-            # Strings must be quoted
-            return f'"{obj}"'
-        
-        else:
-            # Numbers, booleans, etc.
-            return str(obj)
-
+    def _page_stages(self, node):
+        # OFFSET / LIMIT as pipeline stages; $skip has to run first
+        stages = []
+        if node.offset is not None:
+            stages.append({"$skip": node.offset})
+        if node.limit is not None:
+            stages.append({"$limit": node.limit})
+        return stages
     def _generate_projection(self, columns):
-        if columns == ['*']:
+        if columns == ('*',):
             return None
     
         projection = {}
     
         for col in columns:
-            if isinstance(col, dict):
-                column_name = col["column"]
+            if isinstance(col, ColumnRef):
+                column_name = col.column
             else:
                 column_name = col
         
             projection[column_name] = 1
 
         return projection
-    def _generate_filter(self, node):
+    def _generate_filter(self, node, ctx):
         if isinstance(node, LogicalCondition):
-            return self._handle_logical(node)
+            return self._handle_logical(node, ctx)
         elif isinstance(node, Comparison):
-            return self._handle_comparison(node)
+            return self._handle_comparison(node, ctx)
         else:
             raise ValueError(f"Unknown filter node: {type(node)}")
 
-    def _handle_logical(self, node: LogicalCondition):
-        left = self._generate_filter(node.left)
-        right = self._generate_filter(node.right)
+    def _handle_logical(self, node: LogicalCondition, ctx):
+        left = self._generate_filter(node.left, ctx)
+        right = self._generate_filter(node.right, ctx)
         
         op_map = {
             'AND': '$and',
@@ -437,30 +595,19 @@ class MongoDBGenerator:
         # Combine if valid
         return {mongo_op: [left, right]}
 
-    def _handle_comparison(self, node: Comparison):
+    def _handle_comparison(self, node: Comparison, ctx):
         field = node.identifier
         value = node.value
         operator = node.operator
         identifier=node.identifier
         if isinstance(identifier, Aggregate):
-            func = identifier.func
-            column = identifier.column
-            if func == "COUNT":
-                if column == "*":
-                    field = "count"
-                else:
-                    field = f"count_{column}"
-            else:
-                field = f"{func.lower()}_{column}"
+            field = self._aggregate_field(identifier)
         else:
-            if isinstance(identifier, dict):
-                if identifier["table"]:
-                    if hasattr(self, "current_base_table") and identifier["table"] == self.current_base_table:
-                        field = identifier["column"]
-                    else:
-                            field = f"{identifier['table']}.{identifier['column']}"
+            if isinstance(identifier, ColumnRef):
+                if identifier.table and identifier.table != ctx.base_table:
+                    field = str(identifier)
                 else:
-                    field = identifier["column"]
+                    field = identifier.column
             else:
                 field = identifier
         # Direct equality check
@@ -477,7 +624,8 @@ class MongoDBGenerator:
             return {field: {'$gte': lower, '$lte': upper}}
         # IN
         if operator == "IN":
-            return {field: {'$in': value}}
+            # a new list, so generated documents never alias the AST's literal list
+            return {field: {'$in': in_values(value)}}
 
         op_map = {
             '>': '$gt',
@@ -497,60 +645,166 @@ class MongoDBGenerator:
             if not isinstance(item, OrderByItem):
                 continue
             direction = 1 if item.direction.upper() == "ASC" else -1
-            sort_doc[item.column] = direction
+            sort_doc[ColumnRef.of(item.column).column] = direction
         return sort_doc
-    def _generate_in_subquery(self, node):
-        condition = node.where
+    def _generate_in_subquery(self, node, ctx):
+        """
+        `col IN (SELECT ...)` terms AND-ed into WHERE, each planned with the
+        semi-join strategy semi_join.choose_strategy picks (or the one the
+        generator was built with). IN lists longer than in_list_max are
+        joined the way the temp strategy joins a subquery. A plain SELECT
+        becomes a find (every subquery inlined) or a pipeline; for joins,
+        grouping, DISTINCT and COUNT the semi-join stages run ahead of the
+        pipeline the rest of the query generates.
+        """
+        base_table = ctx.base_table
+        terms = self._conjuncts(node.where)
+        semi_terms = [t for t in terms if isinstance(t, Comparison) and t.operator == "IN_SUBQUERY"
+                      or self._is_spilled(t, base_table)]
+        rest = [t for t in terms if not any(t is s for s in semi_terms)]
+        if any(self._contains_in_subquery(t) for t in rest):
+            raise ValueError("IN (subquery) is only supported in AND-ed WHERE conditions")
+        catalog = ctx.analysis.catalog if ctx.analysis is not None else None
 
-        # assume simple condition: id IN (subquery)
-        identifier = condition.identifier
-        subquery = condition.value
+        filters = []
+        prepare = []
+        lookups = []
+        aliases = []
+        for i, term in enumerate(semi_terms):
+            identifier = term.identifier
+            if isinstance(identifier, ColumnRef) and identifier.table not in (None, base_table):
+                raise ValueError(f"IN (subquery) must test a column of '{base_table}'")
+            base_field = identifier.column if isinstance(identifier, ColumnRef) else identifier
+            if term.operator == "IN":
+                name = f"tmp_{i}"
+                alias = f"{name}_match"
+                aliases.append(alias)
+                prepare.append({"name": name, "temp": True, "values": spill_values(term.value)})
+                lookups.append({
+                    "$lookup": {
+                        "from": Prepared(name),
+                        "localField": base_field,
+                        "foreignField": "_id",
+                        "as": alias
+                    }
+                })
+                lookups.append({"$match": {alias: {"$ne": []}}})
+                continue
+            subquery = term.value
+            sub_table = subquery.table
+            if not isinstance(subquery.columns[0], (ColumnRef, str)) or subquery.columns == ('*',):
+                raise ValueError("IN (subquery) must select a single column")
+            sub_column = ColumnRef.of(subquery.columns[0]).column
+            sub_ctx = GenerationContext(sub_table, ctx.analysis)
+            sub_filters = self._conjuncts(subquery.where)
+            grouped = bool(subquery.group_by) or self._has_aggregate(subquery)
+            # subquery filters and grouping; a grouped subquery selects a group key
+            sub_stages = [{"$match": self._generate_filter(subquery.where, sub_ctx)}] if subquery.where else []
+            if grouped:
+                sub_stages += self._group_stages(subquery, sub_ctx)
+            strategy = self.semi_join or choose_strategy(
+                catalog, base_table, rest, sub_table, sub_column, sub_filters, grouped)
 
-        # base table
-        base_table = node.table
+            if strategy == LOOKUP:
+                alias = sub_table if sub_table not in aliases else f"{sub_table}_{i}"
+                aliases.append(alias)
+                lookups.append({
+                    "$lookup": {
+                        "from": sub_table,
+                        "localField": base_field,
+                        "foreignField": sub_column,
+                        # one match is enough to keep the outer document
+                        "pipeline": sub_stages + [{"$limit": 1}],
+                        "as": alias
+                    }
+                })
+                #  match non-empty (IN logic)
+                lookups.append({"$match": {alias: {"$ne": []}}})
+                continue
 
-        # extract base field
-        if isinstance(identifier, dict):
-            base_field = identifier["column"]
-        else:
-            base_field = identifier
+            # the subquery's distinct values, as the _id of each result document
+            if not grouped:
+                distinct_stages = [{"$group": {"_id": f"${sub_column}"}}]
+            elif len(subquery.group_by) == 1:
+                distinct_stages = [{"$project": {"_id": 1}}]
+            else:
+                distinct_stages = [{"$group": {"_id": f"$_id.{sub_column}"}}]
+            if strategy == DISTINCT:
+                name = f"in_{i}"
+                if grouped:
+                    prepare.append({"name": name, "collection": sub_table, "field": "_id",
+                                    "pipeline": sub_stages + distinct_stages})
+                else:
+                    prepare.append({"name": name, "collection": sub_table, "distinct": sub_column,
+                                    "filter": self._generate_filter(subquery.where, sub_ctx) if subquery.where else {}})
+                filters.append({base_field: {"$in": Prepared(name)}})
+            elif strategy == TEMP:
+                name = f"tmp_{i}"
+                alias = f"{name}_match"
+                aliases.append(alias)
+                prepare.append({"name": name, "collection": sub_table, "temp": True,
+                                "pipeline": sub_stages + distinct_stages + [{"$out": Prepared(name)}]})
+                lookups.append({
+                    "$lookup": {
+                        "from": Prepared(name),
+                        "localField": base_field,
+                        "foreignField": "_id",
+                        "as": alias
+                    }
+                })
+                lookups.append({"$match": {alias: {"$ne": []}}})
+            else:
+                raise ValueError(f"Unknown semi-join strategy: {strategy}")
 
-        # extract subquery info
-        sub_table = subquery.table
-        sub_column = subquery.columns[0]["column"]
+        if self._is_plain_select(node):
+            result = self._semi_join_find(node, ctx, [self._generate_filter(t, ctx) for t in rest] + filters,
+                                          lookups, aliases)
+        else:
+            # the rest of the query, behind the semi-join stages
+            sub_ctx = GenerationContext(base_table, ctx.analysis)
+            sub_ctx.pipeline_only = True
+            where = None
+            for term in rest:
+                where = term if where is None else LogicalCondition(where, "AND", term)
+            stages = [{"$match": filters[0] if len(filters) == 1 else {"$and": filters}}] if filters else []
+            stages += lookups
+            if aliases:
+                stages.append({"$project": {alias: 0 for alias in aliases}})
+            result = MongoQuery(collection=base_table, pipeline=stages + self._as_pipeline(
+                self._generate_select(node.replace(where=where), sub_ctx)))
+        if prepare:
+            result["prepare"] = prepare
+        return result
+    def _as_pipeline(self, mongo_data):
+        # count plans as $match + $count; the executor gives an empty $count its row of 0
+        if "pipeline" in mongo_data:
+            return mongo_data["pipeline"]
+        stages = [{"$match": mongo_data["filter"]}] if mongo_data.get("filter") else []
+        return stages + [{"$count": mongo_data["count"]}]
+    def _semi_join_find(self, node, ctx, filters, lookups, aliases):
+        if len(filters) > 1:
+            filter_doc = {"$and": filters}
+        else:
+            filter_doc = filters[0] if filters else {}
+        projection = self._generate_projection(node.columns)
 
+        if not lookups:
+            # every subquery is inlined: a plain find over the prepared values
+            result = MongoQuery(collection=node.table, filter=filter_doc, projection=projection)
+            if node.order_by:
+                result["sort"] = self._generate_sort(node.order_by)
+            if node.offset is not None:
+                result["skip"] = node.offset
+            if node.limit is not None:
+                result["limit"] = node.limit
+            return result
         pipeline = []
-
-        #  $lookup
-        pipeline.append({
-            "$lookup": {
-                "from": sub_table,
-                "localField": base_field,
-                "foreignField": sub_column,
-                "as": sub_table
-            }
-        })
-
-        #  match non-empty (IN logic)
-        pipeline.append({
-            "$match": {
-                sub_table: {"$ne": []}
-            }
-        })
-
-        # optional projection (reuse your logic)
-        projection = {}
-        for col in node.columns:
-            if isinstance(col, dict):
-                projection[col["column"]] = 1
-            elif isinstance(col, str):
-                projection[col] = 1
-
-        if projection:
-            pipeline.append({"$project": projection})
-
-        return {
-            "string": f"db.{base_table}.aggregate({pipeline})",
-            "collection": base_table,
-            "pipeline": pipeline
-        }
+        if filter_doc:
+            pipeline.append({"$match": filter_doc})
+        pipeline += lookups
+        if node.order_by:
+            pipeline.append({"$sort": self._generate_sort(node.order_by)})
+        pipeline += self._page_stages(node)
+        # drop the lookup arrays: keep the selected columns, or everything else for SELECT *
+        pipeline.append({"$project": projection or {alias: 0 for alias in aliases}})
+        return MongoQuery(collection=node.table, pipeline=pipeline)
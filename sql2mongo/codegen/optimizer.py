@@ -1,46 +1,51 @@
-import re
-import ast
+from sql2mongo.ast.nodes import Parameter
+from sql2mongo.codegen.in_list import InList
+from sql2mongo.codegen.ir import NEVER_DOC
+from sql2mongo.codegen.rules import RuleEngine
+from sql2mongo.codegen.shell import MongoQuery, render
+
+
+def _has_parameter(values):
+    return any(isinstance(v, Parameter) for v in values)
+
+
+def _single_value(values):
+    # an $in that binding left with one distinct value is an equality
+    return isinstance(values, list) and not _has_parameter(values) and len(set(values)) <= 1
+
+
+def _foldable(doc):
+    # one comparison per field can't fold into anything, whatever its value
+    return any(key in ("$and", "$or") or (isinstance(value, dict) and
+                                          (len(value) > 1 or _single_value(value.get("$in"))))
+               for key, value in doc.items())
+
+
+# stages that add documents of their own, so an always-false $match doesn't empty the result
+_DOCUMENT_SOURCES = ("$unionWith", "$facet", "$documents")
 
 
 class MongoOptimizer:
-    def _format_mongo_shell(self, obj):
-        if isinstance(obj, dict):
-            items = [f"{k}: {self._format_mongo_shell(v)}" for k, v in obj.items()]
-            return "{ " + ", ".join(items) + " }"
-        elif isinstance(obj, list):
-            items = [self._format_mongo_shell(i) for i in obj]
-            return "[ " + ", ".join(items) + " ]"
-        elif isinstance(obj, str):
-            return f'"{obj}"'
-        else:
-            return str(obj)
-
-    def _rebuild_find_query(self, mongo_data):
-        collection = mongo_data["collection"]
-        filter_dict = mongo_data.get("filter", {})
-        projection = mongo_data.get("projection")
-
-        filter_str = self._format_mongo_shell(filter_dict) if filter_dict else "{}"
-        
-        if projection:
-            proj_str = self._format_mongo_shell(projection)
-            query = f"db.{collection}.find({filter_str}, {proj_str})"
-        else:
-            query = f"db.{collection}.find({filter_str})"
-            
-        if "sort" in mongo_data:
-            sort_str = self._format_mongo_shell(mongo_data["sort"])
-            query += f".sort({sort_str})"
-            
-        if "limit" in mongo_data:
-            query += f".limit({mongo_data['limit']})"
-            
-        return query
+    """
+    Rewrites generated query data with the rules of a RuleEngine (see
+    codegen/rules.py); `hits` counts how often each rule fired.
+    """
+    def __init__(self, engine=None):
+        self.engine = engine or RuleEngine()
+
+    @property
+    def hits(self):
+        return self.engine.hits
+
     def _sort_in_operator(self, doc):
         if isinstance(doc, dict):
             for k, v in doc.items():
                 if isinstance(v, dict) and "$in" in v:
-                    v["$in"] = sorted(set(v["$in"]))
+                    # unbound placeholders can't be ordered; canonicalize() sorts after binding,
+                    # and prepared value lists only exist when the plan runs
+                    if isinstance(v["$in"], list) and not isinstance(v["$in"], InList) \
+                            and not _has_parameter(v["$in"]):
+                        v["$in"] = InList.of(v["$in"])
                 else:
                     self._sort_in_operator(v)
         elif isinstance(doc, list):
@@ -48,200 +53,67 @@ class MongoOptimizer:
                 self._sort_in_operator(item)
         return doc
     def optimize(self, mongo_data):
+        """Optimizes generated query data in place and returns it as a MongoQuery."""
+        if not isinstance(mongo_data, MongoQuery):
+            mongo_data = MongoQuery(mongo_data)
         if "filter" in mongo_data:
-            optimized_filter = self._optimize_filter(mongo_data["filter"])
+            optimized_filter = self.engine.optimize_filter(mongo_data["filter"])
             #  fix order
             optimized_filter = self._sort_in_operator(optimized_filter)
             mongo_data["filter"] = optimized_filter
-            # regenerate string (optional but good)
-            mongo_data["string"] = self._rebuild_find_query(mongo_data)
-            return mongo_data
         elif "pipeline" in mongo_data:
-            optimized_pipeline = self._optimize_pipeline(mongo_data["pipeline"])
-            mongo_data["pipeline"] = optimized_pipeline
-            # regenerate string
-            mongo_data["string"] = self._rebuild_aggregate_query(mongo_data)
-
-            return mongo_data
-        return mongo_data
-    # ---------------- FIND ----------------
-    def _optimize_find(self, query):
-
-        collection = re.search(r"db\.(\w+)\.find", query).group(1)
-
-        match = re.search(r"find\((.*)\)", query, re.DOTALL)
-        if not match:
-            return query
-
-        filter_str = match.group(1).strip()
-
-        try:
-            filter_doc = self._safe_eval(filter_str)
-        except Exception as e:
-            # print("⚠️ Optimizer parse failed:", e)
-            return query
-
-        optimized = self._optimize_filter(filter_doc)
-
-        return f"db.{collection}.find({optimized})"
-
-
-    # ---------------- CORE LOGIC ----------------
-    def _optimize_filter(self, doc):
-
-        #  OR OPTIMIZATION
-        if "$or" in doc:
-
-            flat = self._flatten_or(doc["$or"])
-
-            # --- CASE 1: OR → IN (equality)
-            field = None
-            values = []
-
-            all_equal = True
-
-            for cond in flat:
-                if not (isinstance(cond, dict) and len(cond) == 1):
-                    all_equal = False
-                    break
-
-                k, v = list(cond.items())[0]
-
-                if isinstance(v, dict):
-                    all_equal = False
-                    break
-
-                if field is None:
-                    field = k
-                elif field != k:
-                    all_equal = False
-                    break
-
-                values.append(v)
-
-            if all_equal:
-                # remove duplicates
-                values = list(set(values))
-                return {field: {"$in": values}}
-
-            # --- CASE 2: RANGE OPTIMIZATION (>, <)
-            field = None
-            gt_values = []
-            lt_values = []
-
-            valid_range = True
-
-            for cond in flat:
-                if not (isinstance(cond, dict) and len(cond) == 1):
-                    valid_range = False
-                    break
-
-                k, expr = list(cond.items())[0]
-
-                if field is None:
-                    field = k
-                elif field != k:
-                    valid_range = False
-                    break
-
-                if not isinstance(expr, dict):
-                    valid_range = False
-                    break
-
-                if "$gt" in expr:
-                    gt_values.append(expr["$gt"])
-                elif "$lt" in expr:
-                    lt_values.append(expr["$lt"])
-                else:
-                    valid_range = False
-                    break
-
-            if valid_range:
-                if gt_values:
-                    return {field: {"$gt": min(gt_values)}}
-                if lt_values:
-                    return {field: {"$lt": max(lt_values)}}
-
-            # fallback → flattened OR
-            return {"$or": flat}
-
-        #  AND MERGE
-        if "$and" in doc:
-
-            merged = {}
-
-            for cond in doc["$and"]:
-                for k, v in cond.items():
-                    if k not in merged:
-                        merged[k] = v
-                    else:
-                        if isinstance(v, dict) and isinstance(merged[k], dict):
-                            merged[k].update(v)
-
-            return merged
-
-        return doc
-
-
-    # ---------------- FLATTEN OR ----------------
-    def _flatten_or(self, conditions):
-
-        result = []
-
-        for cond in conditions:
-            if isinstance(cond, dict) and "$or" in cond:
-                result.extend(self._flatten_or(cond["$or"]))
-            else:
-                result.append(cond)
-
-        return result
-
-
-    # ---------------- AGGREGATE ----------------
-    def _optimize_aggregate(self, query):
-
-        collection = re.search(r"db\.(\w+)\.aggregate", query).group(1)
-
-        pipeline_str = re.search(r"aggregate\((.*)\)", query, re.DOTALL).group(1)
-
-        try:
-            pipeline = ast.literal_eval(pipeline_str)
-        except:
-            return query
-
-        new_pipeline = self._optimize_pipeline(pipeline)
-
-        return f"db.{collection}.aggregate({new_pipeline})"
-
-    def _optimize_pipeline(self, pipeline):
-        match_stages = []
-        rest = []
+            optimized_pipeline = self.engine.optimize_pipeline(mongo_data["pipeline"])
+            # $lookup sub-pipelines get the filter rules too
+            mongo_data["pipeline"] = self._canonical_pipeline(optimized_pipeline)
+        self._mark_empty(mongo_data)
+        # the string is re-rendered from the optimized data on next access
+        return mongo_data.invalidate()
+
+    def _mark_empty(self, mongo_data):
+        # a filter no document satisfies: the executor answers without the database
+        if "filter" in mongo_data:
+            empty = mongo_data["filter"] == NEVER_DOC
+        else:
+            pipeline = mongo_data.get("pipeline") or []
+            empty = any(stage == {"$match": NEVER_DOC} for stage in pipeline) and \
+                not any(next(iter(stage)) in _DOCUMENT_SOURCES for stage in pipeline)
+        if empty:
+            mongo_data["empty"] = True
+            mongo_data.pop("prepare", None)
+
+    def render(self, mongo_data):
+        """Builds the mongosh string for already optimized find/aggregate data."""
+        return render(mongo_data)
+
+    def canonicalize(self, mongo_data):
+        """
+        Re-applies the value-dependent normalizations of optimize() to data whose
+        literals were substituted after optimization (see PlanCache.bind):
+        the filter rules on the filter or on each $match stage, which may find
+        that the new values contradict each other, and the $in ordering. Returns a MongoQuery whose string
+        reflects the new values.
+        """
+        mongo_data = MongoQuery(mongo_data)
+        if "filter" in mongo_data:
+            mongo_data["filter"] = self._canonical_filter(mongo_data["filter"])
+        elif "pipeline" in mongo_data:
+            mongo_data["pipeline"] = self._canonical_pipeline(mongo_data["pipeline"])
+        self._mark_empty(mongo_data)
+        return mongo_data.invalidate()
+
+    def _canonical_filter(self, filter_doc):
+        if _foldable(filter_doc):
+            filter_doc = self.engine.optimize_filter(filter_doc)
+        return self._sort_in_operator(filter_doc)
+
+    def _canonical_pipeline(self, pipeline):
+        # the conditions of $match stages, including those inside $lookup sub-pipelines
+        stages = []
         for stage in pipeline:
-            if "$match" in stage:
-                match_stages.append(stage)
-            else:
-                rest.append(stage)
-        return match_stages + rest
-
-    def _rebuild_aggregate_query(self, mongo_data):
-        return f"db.{mongo_data['collection']}.aggregate({mongo_data['pipeline']})"
-
-
-    # ---------------- SAFE PARSER ----------------
-    def _safe_eval(self, text):
-
-        text = text.strip()
-
-        if not text:
-            return {}
-
-        #  Quote Mongo operators
-        text = re.sub(r'(\$\w+)', r'"\1"', text)
-
-        #  Quote field names
-        text = re.sub(r'([a-zA-Z_]\w*)\s*:', r'"\1":', text)
-
-        #  Fix quotes
-        text = text.replace("'", '"')
-
-        return ast.literal_eval(text)
+            (op, spec), = stage.items()
+            if op == "$match":
+                stage = {op: self._canonical_filter(spec)}
+            elif op == "$lookup" and "pipeline" in spec:
+                stage = {op: dict(spec, pipeline=self._canonical_pipeline(spec["pipeline"]))}
+            stages.append(stage)
+        return stages
@@ -0,0 +1,459 @@
+"""
+Rewrite rules over the filter and pipeline IR (see codegen/ir.py) and the
+driver that applies them.
+
+A rule is a precondition, matches(node), and a rewrite, apply(node), that
+returns an equivalent node. Filter rules are tried on every node of a filter
+tree, children first; pipeline rules see the whole stage list. RuleEngine
+applies the first rule whose precondition holds, again and again, until none
+does, and counts how often each rule fired.
+
+Rules that compare literal values skip placeholders (Parameter, Prepared).
+Literal slots of cached plans are values too: a rule that drops or merges
+one leaves the plan uncached (see PlanCache), which keeps the template right
+for every later binding.
+"""
+import threading
+from collections import Counter
+
+from sql2mongo.codegen import intervals
+from sql2mongo.codegen.in_list import in_values
+from sql2mongo.codegen.ir import And, Or, FieldCond, Never, Match, is_constant, conjuncts, conjunction, rename_fields, \
+    lift_filter, lower_filter, lift_pipeline, lower_pipeline
+
+
+class Rule:
+    name = None
+
+    def matches(self, node):
+        raise NotImplementedError
+
+    def apply(self, node):
+        raise NotImplementedError
+
+
+# ---------------- FILTER RULES ----------------
+class FlattenOr(Rule):
+    """Or(a, Or(b, c)) -> Or(a, b, c)"""
+    name = "flatten_or"
+
+    def matches(self, node):
+        return isinstance(node, Or) and any(isinstance(term, Or) for term in node.terms)
+
+    def apply(self, node):
+        terms = []
+        for term in node.terms:
+            terms.extend(term.terms if isinstance(term, Or) else [term])
+        return Or(terms)
+
+
+class FlattenAnd(Rule):
+    """And(a, And(b, c)) -> And(a, b, c), so conditions on one field meet"""
+    name = "flatten_and"
+
+    def matches(self, node):
+        return isinstance(node, And) and any(isinstance(term, And) for term in node.terms)
+
+    def apply(self, node):
+        terms = []
+        for term in node.terms:
+            terms.extend(term.terms if isinstance(term, And) else [term])
+        return And(terms)
+
+
+class UnwrapSingleton(Rule):
+    """And(a) -> a, Or(a) -> a"""
+    name = "unwrap_singleton"
+
+    def matches(self, node):
+        return isinstance(node, (And, Or)) and len(node.terms) == 1
+
+    def apply(self, node):
+        return node.terms[0]
+
+
+def _same_field_singles(node):
+    """(field, [(op, value), ...]) when every term is a one-operator condition on one field."""
+    if len(node.terms) < 2 or not all(isinstance(term, FieldCond) and term.single() for term in node.terms):
+        return None, None
+    field = node.terms[0].field
+    if any(term.field != field for term in node.terms):
+        return None, None
+    return field, [term.single() for term in node.terms]
+
+
+def _value_list(term):
+    # a = v or a IN (...): a condition that is just a list of values for one field
+    single = isinstance(term, FieldCond) and term.single()
+    return bool(single) and ((single[0] == "$eq" and not isinstance(single[1], dict))
+                             or (single[0] == "$in" and isinstance(single[1], list)))
+
+
+class OrToIn(Rule):
+    """a = 1 OR b = 2 OR a IN (1, 3) -> a IN (1, 3) OR b = 2"""
+    name = "or_to_in"
+
+    def _field(self, node):
+        # first field with more than one value list among the terms
+        seen = set()
+        for term in node.terms:
+            if _value_list(term):
+                if term.field in seen:
+                    return term.field
+                seen.add(term.field)
+        return None
+
+    def matches(self, node):
+        return isinstance(node, Or) and self._field(node) is not None
+
+    def apply(self, node):
+        field = self._field(node)
+        values, terms, position = [], [], None
+        for term in node.terms:
+            if _value_list(term) and term.field == field:
+                op, value = term.single()
+                values.extend(value if op == "$in" else [value])
+                if position is None:
+                    position = len(terms)
+                    terms.append(None)
+            else:
+                terms.append(term)
+        terms[position] = FieldCond(field, (("$in", in_values(values)),))
+        return Or(terms)
+
+
+class FactorConjuncts(Rule):
+    """(a AND b) OR (a AND c) -> a AND (b OR c); a OR (a AND b) -> a"""
+    name = "factor_conjuncts"
+
+    def _common(self, node):
+        groups = [conjuncts(term) for term in node.terms]
+        return [term for term in groups[0] if all(term in group for group in groups[1:])]
+
+    def matches(self, node):
+        return isinstance(node, Or) and len(node.terms) > 1 and bool(self._common(node))
+
+    def apply(self, node):
+        common = self._common(node)
+        rests = [[term for term in conjuncts(branch) if term not in common] for branch in node.terms]
+        if not all(rests):
+            # a branch that is only the common part already covers the others
+            return conjunction(common)
+        return And(common + [Or(conjunction(rest) for rest in rests)])
+
+
+class OrWidestBound(Rule):
+    """a > 5 OR a > 10 -> a > 5; a < 5 OR a < 10 -> a < 10"""
+    name = "or_widest_bound"
+
+    def matches(self, node):
+        if not isinstance(node, Or):
+            return False
+        field, singles = _same_field_singles(node)
+        if field is None or len({op for op, _ in singles}) != 1 or singles[0][0] not in ("$gt", "$gte", "$lt", "$lte"):
+            return False
+        values = [v for _, v in singles]
+        if not all(is_constant(v) for v in values):
+            # bounds only known at bind time can't be compared
+            return False
+        try:
+            min(values)
+        except TypeError:
+            return False
+        return True
+
+    def apply(self, node):
+        field, singles = _same_field_singles(node)
+        op = singles[0][0]
+        values = [v for _, v in singles]
+        return FieldCond(field, ((op, min(values) if op in ("$gt", "$gte") else max(values)),))
+
+
+class MergeFieldConds(Rule):
+    """{a: {$gt: 1}} AND {a: {$ne: 5}} -> {a: {$gt: 1, $ne: 5}} when no operator repeats"""
+    name = "merge_field_conds"
+
+    def _pair(self, node):
+        seen = {}
+        for i, term in enumerate(node.terms):
+            if not isinstance(term, FieldCond):
+                continue
+            j = seen.get(term.field)
+            if j is not None and not set(node.terms[j].operators()) & set(term.operators()):
+                return j, i
+            seen.setdefault(term.field, i)
+        return None
+
+    def matches(self, node):
+        return isinstance(node, And) and self._pair(node) is not None
+
+    def apply(self, node):
+        j, i = self._pair(node)
+        terms = list(node.terms)
+        terms[j] = FieldCond(terms[j].field, terms[j].ops + terms[i].ops)
+        del terms[i]
+        return And(terms)
+
+
+def _intersected(ops):
+    """FieldCond operators narrowed by interval algebra, EMPTY, or None when it can't tell."""
+    return intervals.intersect(ops) if intervals.applies(ops) else None
+
+
+class NormalizeInterval(Rule):
+    """{a: {$gte: 1, $lte: 9, $in: [0, 5]}} -> {a: 5}; {a: {$gt: 50, $lt: 10}} -> Never"""
+    name = "normalize_interval"
+
+    def matches(self, node):
+        if not isinstance(node, FieldCond):
+            return False
+        ops = _intersected(node.ops)
+        return ops is not None and (ops == intervals.EMPTY or node != FieldCond(node.field, ops))
+
+    def apply(self, node):
+        ops = _intersected(node.ops)
+        return Never() if ops == intervals.EMPTY else FieldCond(node.field, ops)
+
+
+class IntersectFieldConds(Rule):
+    """{a: {$gt: 10}} AND {a: {$gt: 20}} -> {a: {$gt: 20}}, where MergeFieldConds would repeat $gt"""
+    name = "intersect_field_conds"
+
+    def _pair(self, node):
+        seen = {}
+        for i, term in enumerate(node.terms):
+            if not isinstance(term, FieldCond):
+                continue
+            j = seen.get(term.field)
+            if j is not None and _intersected(node.terms[j].ops + term.ops) is not None:
+                return j, i
+            seen.setdefault(term.field, i)
+        return None
+
+    def matches(self, node):
+        return isinstance(node, And) and self._pair(node) is not None
+
+    def apply(self, node):
+        j, i = self._pair(node)
+        terms = list(node.terms)
+        ops = _intersected(terms[j].ops + terms[i].ops)
+        if ops == intervals.EMPTY:
+            return Never()
+        terms[j] = FieldCond(terms[j].field, ops)
+        del terms[i]
+        return And(terms)
+
+
+class AndNever(Rule):
+    """a AND Never -> Never"""
+    name = "and_never"
+
+    def matches(self, node):
+        return isinstance(node, And) and any(isinstance(term, Never) for term in node.terms)
+
+    def apply(self, node):
+        return Never()
+
+
+class OrNever(Rule):
+    """a OR Never -> a; Never OR Never -> Never"""
+    name = "or_never"
+
+    def matches(self, node):
+        return isinstance(node, Or) and any(isinstance(term, Never) for term in node.terms)
+
+    def apply(self, node):
+        terms = [term for term in node.terms if not isinstance(term, Never)]
+        return Or(terms) if terms else Never()
+
+
+def _shape(node):
+    # order key that looks at fields and operators but never at values, so a
+    # cached template sorts the same way for every binding
+    if isinstance(node, FieldCond):
+        return 0, node.field, tuple(node.operators())
+    if isinstance(node, (And, Or)):
+        return (1 if isinstance(node, And) else 2), tuple(_shape(term) for term in node.terms)
+    if isinstance(node, Never):
+        return 4,
+    return 3, tuple(node.doc)
+
+
+class SortTerms(Rule):
+    """
+    Puts the terms of And/Or in canonical order (field conditions by field,
+    then nested And, Or and the rest), so equivalent filters come out
+    identical.
+    """
+    name = "sort_terms"
+
+    def matches(self, node):
+        if not isinstance(node, (And, Or)):
+            return False
+        keys = [_shape(term) for term in node.terms]
+        return keys != sorted(keys)
+
+    def apply(self, node):
+        return node.with_terms(sorted(node.terms, key=_shape))
+
+
+# ---------------- PIPELINE RULES ----------------
+# stages that reshape documents without adding, dropping or reordering them
+RESHAPE_STAGES = ("$project", "$addFields", "$set", "$unset")
+
+
+def _first(stages, test):
+    return next((i for i in range(1, len(stages)) if test(stages[i - 1], stages[i], stages[:i])), None)
+
+
+class MergeMatches(Rule):
+    """Adjacent $match stages -> one $match on the conjunction."""
+    name = "merge_matches"
+
+    def _position(self, stages):
+        return _first(stages, lambda before, stage, prefix: isinstance(before, Match) and isinstance(stage, Match))
+
+    def matches(self, stages):
+        return self._position(stages) is not None
+
+    def apply(self, stages):
+        i = self._position(stages)
+        merged = Match(conjunction(conjuncts(stages[i - 1].condition) + conjuncts(stages[i].condition)))
+        return stages[:i - 1] + [merged] + stages[i + 1:]
+
+
+class PushMatchUp(Rule):
+    """
+    Moves the conjuncts of a $match ahead of the stage before it when that
+    stage passes every field they read through unchanged (see Stage.source),
+    renaming the fields to what the stage read them from: a HAVING term on
+    the group key, {_id: "Pune"} after {$group: {_id: "$city"}}, becomes
+    {city: "Pune"} before it, while terms on aggregates stay after $group.
+    """
+    name = "push_match_up"
+
+    def _split(self, stages):
+        for i in range(1, len(stages)):
+            stage, before = stages[i], stages[i - 1]
+            if not isinstance(stage, Match) or isinstance(before, Match):
+                continue
+            moved, kept = [], []
+            for term in conjuncts(stage.condition):
+                renamed = rename_fields(term, before.source)
+                if renamed is None:
+                    kept.append(term)
+                else:
+                    moved.append(renamed)
+            if moved:
+                return i, moved, kept
+        return None
+
+    def matches(self, stages):
+        return self._split(stages) is not None
+
+    def apply(self, stages):
+        i, moved, kept = self._split(stages)
+        result = stages[:i - 1] + [Match(conjunction(moved)), stages[i - 1]]
+        if kept:
+            result.append(Match(conjunction(kept)))
+        return result + stages[i + 1:]
+
+
+class LimitBeforeReshape(Rule):
+    """
+    Moves $skip/$limit up past a reshaping stage, so each $sort is directly
+    followed by its $limit and runs as a bounded top-k sort that keeps only
+    skip + limit documents.
+    """
+    name = "limit_before_reshape"
+
+    def _position(self, stages):
+        return _first(stages, lambda before, stage, prefix: stage.op in ("$skip", "$limit")
+                      and before.op in RESHAPE_STAGES)
+
+    def matches(self, stages):
+        return self._position(stages) is not None
+
+    def apply(self, stages):
+        i = self._position(stages)
+        return stages[:i - 1] + [stages[i], stages[i - 1]] + stages[i + 1:]
+
+
+class DropOverriddenSort(Rule):
+    """$sort directly followed by another $sort: only the second one counts."""
+    name = "drop_overridden_sort"
+
+    def _position(self, stages):
+        return _first(stages, lambda before, stage, prefix: before.op == "$sort" and stage.op == "$sort")
+
+    def matches(self, stages):
+        return self._position(stages) is not None
+
+    def apply(self, stages):
+        i = self._position(stages)
+        return stages[:i - 1] + stages[i:]
+
+
+FILTER_RULES = (FlattenOr(), FlattenAnd(), UnwrapSingleton(), AndNever(), OrNever(), OrToIn(), FactorConjuncts(),
+                OrWidestBound(), NormalizeInterval(), IntersectFieldConds(), MergeFieldConds(), SortTerms())
+PIPELINE_RULES = (MergeMatches(), PushMatchUp(), LimitBeforeReshape(), DropOverriddenSort())
+
+
+class RuleEngine:
+    """
+    Applies rules until no precondition holds. `hits` counts the rewrites of
+    each rule over the engine's lifetime; an engine is safe to share between
+    threads.
+    """
+    # a safety net against rules that undo each other; every rewrite keeps the
+    # query equivalent, so stopping early only leaves it less optimized
+    MAX_REWRITES = 1000
+
+    def __init__(self, filter_rules=FILTER_RULES, pipeline_rules=PIPELINE_RULES):
+        self.filter_rules = tuple(filter_rules)
+        self.pipeline_rules = tuple(pipeline_rules)
+        self.hits = Counter()
+        self._lock = threading.Lock()
+
+    def optimize_filter(self, doc):
+        """Optimized copy of a filter document."""
+        hits = Counter()
+        node = lower_filter(self.rewrite_filter(lift_filter(doc), hits))
+        self._count(hits)
+        return node
+
+    def optimize_pipeline(self, pipeline):
+        """Optimized copy of a pipeline, including the conditions of its $match stages."""
+        hits = Counter()
+        stages = self.rewrite_pipeline(lift_pipeline(pipeline), hits)
+        self._count(hits)
+        return lower_pipeline(stages)
+
+    def rewrite_filter(self, node, hits):
+        if isinstance(node, (And, Or)):
+            node = node.with_terms([self.rewrite_filter(term, hits) for term in node.terms])
+        for _ in range(self.MAX_REWRITES):
+            rule = next((rule for rule in self.filter_rules if rule.matches(node)), None)
+            if rule is None:
+                break
+            hits[rule.name] += 1
+            node = rule.apply(node)
+            if isinstance(node, (And, Or)):
+                node = node.with_terms([self.rewrite_filter(term, hits) for term in node.terms])
+        return node
+
+    def rewrite_pipeline(self, stages, hits):
+        for _ in range(self.MAX_REWRITES):
+            stages = [Match(self.rewrite_filter(stage.condition, hits)) if isinstance(stage, Match) else stage
+                      for stage in stages]
+            rule = next((rule for rule in self.pipeline_rules if rule.matches(stages)), None)
+            if rule is None:
+                break
+            hits[rule.name] += 1
+            stages = rule.apply(stages)
+        return stages
+
+    def _count(self, hits):
+        if hits:
+            with self._lock:
+                self.hits.update(hits)
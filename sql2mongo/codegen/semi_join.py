@@ -0,0 +1,98 @@
+"""
+Strategy selection for `col IN (SELECT ...)` semi-joins.
+
+  lookup    $lookup into the subquery's collection whose pipeline applies the
+            subquery's filters and stops at the first match ($limit 1)
+  distinct  two-phase: run the subquery first, collect its distinct values and
+            inline them as {col: {$in: values}}
+  temp      materialize the subquery's distinct values into a temporary
+            collection ($out), then $lookup on its _id index
+
+Plans for the last two carry "prepare" steps that the executor runs before
+the main query (see sql2mongo.executor); their results are referenced through
+Prepared placeholders. choose_strategy() compares rough costs, counted in
+documents touched, from the catalog's statistics. Without statistics the
+lookup plan is kept.
+"""
+from sql2mongo.codegen.join_order import DEFAULT_ROWS, RANGE_SELECTIVITY, distinct_values, selectivity
+
+LOOKUP, DISTINCT, TEMP = "lookup", "distinct", "temp"
+STRATEGIES = (LOOKUP, DISTINCT, TEMP)
+
+# largest value list worth inlining as $in (documents are capped at 16MB and
+# the planner handles huge $in lists poorly)
+INLINE_MAX_VALUES = 10000
+PROBE_COST = 1.0        # one index seek
+WRITE_COST = 2.0        # one document written to the temporary collection
+TEMP_SETUP_COST = 1000  # creating, indexing and dropping the temporary collection
+
+
+class Prepared:
+    """
+    Placeholder for a value a prepare step produces when the plan runs: the
+    value list of a distinct step or the name of a temporary collection.
+    Renders as its name, the variable it is bound to in the mongosh string.
+    """
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __eq__(self, other):
+        return isinstance(other, Prepared) and other.name == self.name
+
+    def __hash__(self):
+        return hash(("Prepared", self.name))
+
+    def __str__(self):
+        return self.name
+
+    __repr__ = __str__
+
+
+def resolve_prepared(obj, values):
+    """Copy of query data with every Prepared replaced by values[name]."""
+    if isinstance(obj, Prepared):
+        return values[obj.name]
+    if isinstance(obj, dict):
+        return {k: resolve_prepared(v, values) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [resolve_prepared(item, values) for item in obj]
+    return obj
+
+
+def _rows(catalog, table):
+    rows = catalog.rows(table)
+    return DEFAULT_ROWS if rows is None else max(rows, 1)
+
+
+def estimate_costs(catalog, outer_table, outer_filters, sub_table, sub_column, sub_filters, grouped):
+    """Estimated cost of each strategy, None where it does not apply."""
+    outer_rows = _rows(catalog, outer_table) * selectivity(catalog, outer_table, outer_filters)
+    sub_rows = _rows(catalog, sub_table)
+    # at least one matching document, or a 0.0 estimate would make probes endless
+    sub_selectivity = max(selectivity(catalog, sub_table, sub_filters), 1 / sub_rows)
+    # distinct values of the subquery column: from the catalog, else at most one
+    # per outer document it can match
+    distinct = distinct_values(catalog, sub_table, sub_column)
+    if distinct is None:
+        distinct = min(sub_rows, _rows(catalog, outer_table))
+    values = min(sub_rows * sub_selectivity, distinct)
+    if grouped:
+        values *= RANGE_SELECTIVITY
+    per_key = sub_rows / max(distinct, 1)
+    # an ungrouped probe stops at its first match; a grouped one reads the whole key
+    per_probe = per_key if grouped else min(per_key, 1 / sub_selectivity)
+    return {
+        LOOKUP: outer_rows * (PROBE_COST + per_probe),
+        DISTINCT: sub_rows + values * PROBE_COST if values <= INLINE_MAX_VALUES else None,
+        TEMP: TEMP_SETUP_COST + sub_rows + values * WRITE_COST + outer_rows * PROBE_COST,
+    }
+
+
+def choose_strategy(catalog, outer_table, outer_filters, sub_table, sub_column, sub_filters, grouped):
+    """Cheapest strategy for one IN (subquery) term."""
+    if catalog is None or (catalog.rows(outer_table) is None and catalog.rows(sub_table) is None):
+        return LOOKUP
+    costs = estimate_costs(catalog, outer_table, outer_filters, sub_table, sub_column, sub_filters, grouped)
+    return min((cost, i, name) for i, (name, cost) in enumerate(costs.items()) if cost is not None)[2]
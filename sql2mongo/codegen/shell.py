@@ -0,0 +1,179 @@
+"""
+mongosh rendering of generated queries.
+
+Generated queries are MongoQuery dicts whose "string" entry is only rendered
+when someone reads it. Services that execute the filter/pipeline dicts never
+pay for formatting, and repeated reads hit the cached string.
+"""
+import re
+
+from sql2mongo.codegen.semi_join import Prepared
+
+_CONTAINERS = (dict, list)
+# keys mongosh takes unquoted; others (dotted paths like "orders.amount") are quoted
+_PLAIN_KEY = re.compile(r"[A-Za-z_$][\w$]*")
+
+
+def _key(key):
+    return key if _PLAIN_KEY.fullmatch(key) else '"' + key + '"'
+
+
+def _scalar(obj):
+    if isinstance(obj, str):
+        return '"' + obj + '"'
+    if obj is None:
+        return "null"
+    if obj is True or obj is False:
+        return "true" if obj else "false"
+    if isinstance(obj, Prepared):
+        # the variable the prepare step's result is bound to
+        return obj.name
+    return str(obj)
+
+
+def _flat_list(items):
+    # single join for lists of scalars (IN lists); None if an item is a container
+    types = set(map(type, items))
+    if types == {int}:
+        return "[ " + ", ".join(map(str, items)) + " ]"
+    if types == {str}:
+        return '[ "' + '", "'.join(items) + '" ]'
+    if any(issubclass(t, _CONTAINERS) for t in types):
+        return None
+    return "[ " + ", ".join(map(_scalar, items)) + " ]"
+
+
+def format_shell(obj):
+    """
+    Formats dicts/lists as mongosh literals: identifier keys unquoted, strings
+    in double quotes, everything else via str(). Uses an explicit frame stack
+    instead of recursion, so arbitrarily deep documents format fine, and lists
+    of scalars are joined in one pass.
+    """
+    if isinstance(obj, list):
+        flat = _flat_list(obj)
+        if flat is not None:
+            return flat
+    elif not isinstance(obj, dict):
+        return _scalar(obj)
+
+    # frame: (is_dict, item iterator, formatted parts, key in the parent dict)
+    is_dict = isinstance(obj, dict)
+    stack = [(is_dict, iter(obj.items()) if is_dict else iter(obj), [], None)]
+    while True:
+        is_dict, items, parts, key = stack[-1]
+        for entry in items:
+            if is_dict:
+                child_key, value = entry
+            else:
+                value = entry
+            if isinstance(value, _CONTAINERS):
+                text = _flat_list(value) if isinstance(value, list) else None
+                if text is None:
+                    child_is_dict = isinstance(value, dict)
+                    stack.append((child_is_dict, iter(value.items()) if child_is_dict else iter(value),
+                                  [], child_key if is_dict else None))
+                    break
+            else:
+                text = _scalar(value)
+            parts.append(f"{_key(child_key)}: {text}" if is_dict else text)
+        else:
+            stack.pop()
+            text = ("{ " + ", ".join(parts) + " }") if is_dict else ("[ " + ", ".join(parts) + " ]")
+            if not stack:
+                return text
+            parent_is_dict, _, parent_parts, _ = stack[-1]
+            parent_parts.append(f"{_key(key)}: {text}" if parent_is_dict else text)
+
+
+def _render_prepare(step):
+    # one prepare step of a two-phase plan, bound to a variable named after it
+    name = step["name"]
+    if "values" in step:
+        return (f'const {name} = "{name}_" + new ObjectId().toString();\n'
+                f'db.getCollection({name}).insertMany({format_shell(list(step["values"]))}.map(v => ({{ _id: v }})));')
+    collection = step["collection"]
+    if "distinct" in step:
+        return (f'const {name} = db.{collection}.distinct("{step["distinct"]}", '
+                f'{format_shell(step.get("filter") or {})});')
+    if step.get("temp"):
+        return (f'const {name} = "{name}_" + new ObjectId().toString();\n'
+                f'db.{collection}.aggregate({format_shell(step["pipeline"])});')
+    return (f'const {name} = db.{collection}.aggregate({format_shell(step["pipeline"])})'
+            f'.toArray().map(d => d.{step["field"]});')
+
+
+def render(mongo_data):
+    """Builds the mongosh string for a find, count, distinct or aggregate query dict."""
+    prepare = mongo_data.get("prepare")
+    if prepare:
+        lines = [_render_prepare(step) for step in prepare]
+        lines.append(_render_query(mongo_data))
+        lines += [f"db.getCollection({step['name']}).drop();" for step in prepare if step.get("temp")]
+        return "\n".join(lines)
+    return _render_query(mongo_data)
+
+
+def _render_query(mongo_data):
+    collection = mongo_data["collection"]
+    if mongo_data.get("empty"):
+        # what the query would return; running it can't change that
+        pipeline = mongo_data.get("pipeline")
+        counted = "count" in mongo_data or bool(pipeline and "$count" in pipeline[-1])
+        return ("0" if counted else "[]") + " // no document can match the filter"
+    if "distinct" in mongo_data:
+        filter_str = format_shell(mongo_data["filter"]) if mongo_data["filter"] else "{}"
+        query = f'db.{collection}.distinct("{mongo_data["distinct"]}", {filter_str})'
+        return query + ".length" if "count" in mongo_data else query
+    if "count" in mongo_data:
+        if "filter" in mongo_data:
+            return f"db.{collection}.countDocuments({format_shell(mongo_data['filter'])})"
+        return f"db.{collection}.estimatedDocumentCount()"
+    if "filter" in mongo_data:
+        filter_doc = mongo_data.get("filter")
+        filter_str = format_shell(filter_doc) if filter_doc else "{}"
+        projection = mongo_data.get("projection")
+        if projection:
+            query = f"db.{collection}.find({filter_str}, {format_shell(projection)})"
+        else:
+            query = f"db.{collection}.find({filter_str})"
+        if "sort" in mongo_data:
+            query += f".sort({format_shell(mongo_data['sort'])})"
+        if "skip" in mongo_data:
+            query += f".skip({mongo_data['skip']})"
+        if "limit" in mongo_data:
+            query += f".limit({mongo_data['limit']})"
+        return query
+    if "pipeline" in mongo_data:
+        return f"db.{collection}.aggregate({format_shell(mongo_data['pipeline'])})"
+    return ""
+
+
+class MongoQuery(dict):
+    """
+    Generated query data (collection, filter/projection, count, distinct or
+    pipeline, ...).
+
+    The "string" entry is rendered on first access and cached; anything that
+    changes the query in place must call invalidate() afterwards.
+    """
+    __slots__ = ()
+
+    def __missing__(self, key):
+        if key != "string":
+            raise KeyError(key)
+        value = self["string"] = render(self)
+        return value
+
+    def __contains__(self, key):
+        return key == "string" or dict.__contains__(self, key)
+
+    def get(self, key, default=None):
+        if key == "string":
+            return self["string"]
+        return dict.get(self, key, default)
+
+    def invalidate(self):
+        """Drops the cached string after the query was changed in place."""
+        self.pop("string", None)
+        return self
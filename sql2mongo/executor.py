@@ -0,0 +1,102 @@
+"""
+Runs generated query data against a database.
+
+`db` is a pymongo Database or anything with the same collection API
+(db[name].find / aggregate / distinct / count_documents / drop), such as
+the in-process Evaluator. Plans with "prepare" steps (see codegen/semi_join.py) run those
+first, substitute their results into the main query and drop any temporary
+collections afterwards. Plans marked "empty" are answered without the
+database.
+"""
+import uuid
+
+from sql2mongo.codegen.semi_join import resolve_prepared
+
+
+def run_prepare(db, prepare):
+    """Runs prepare steps; returns ({name: value}, temporary collection names)."""
+    values = {}
+    temp = []
+    try:
+        for step in prepare:
+            name = step["name"]
+            if "values" in step:
+                # a long IN list, one document per value; values bound into a cached
+                # template can repeat, and _id must be unique
+                values[name] = f"{name}_{uuid.uuid4().hex}"
+                temp.append(values[name])
+                db[values[name]].insert_many({"_id": value} for value in dict.fromkeys(step["values"]))
+                continue
+            collection = db[step["collection"]]
+            if "distinct" in step:
+                values[name] = list(collection.distinct(step["distinct"], step.get("filter") or {}))
+            elif step.get("temp"):
+                # unique per run, so concurrent runs of a cached plan never share it
+                values[name] = f"{name}_{uuid.uuid4().hex}"
+                temp.append(values[name])
+                list(collection.aggregate(resolve_prepared(step["pipeline"], values)))
+            else:
+                field = step["field"]
+                values[name] = [doc[field] for doc in collection.aggregate(step["pipeline"]) if field in doc]
+    except Exception:
+        drop_temp(db, temp)
+        raise
+    return values, temp
+
+
+def drop_temp(db, names):
+    for name in names:
+        db[name].drop()
+
+
+def _count_field(mongo_data):
+    """The result field of a count, which like SQL's COUNT gives a row even when nothing matches."""
+    if "count" in mongo_data:
+        return mongo_data["count"]
+    pipeline = mongo_data.get("pipeline")
+    # $count outputs no document at all for no input
+    if pipeline and "$count" in pipeline[-1]:
+        return pipeline[-1]["$count"]
+    return None
+
+
+def execute(db, mongo_data):
+    """Runs find/count/distinct/aggregate query data and returns the result documents as a list."""
+    if mongo_data.get("empty"):
+        # the optimizer proved no document matches; the database isn't asked
+        field = _count_field(mongo_data)
+        return [] if field is None else [{field: 0}]
+    prepare = mongo_data.get("prepare")
+    temp = []
+    if prepare:
+        values, temp = run_prepare(db, prepare)
+        mongo_data = resolve_prepared({k: v for k, v in mongo_data.items() if k != "prepare"}, values)
+    try:
+        collection = db[mongo_data["collection"]]
+        if "distinct" in mongo_data:
+            field = mongo_data["distinct"]
+            values = collection.distinct(field, mongo_data["filter"])
+            if "count" in mongo_data:
+                return [{mongo_data["count"]: len(values)}]
+            return [{field: value} for value in values]
+        if "count" in mongo_data:
+            # one row holding the count, like the SQL result
+            if "filter" in mongo_data:
+                count = collection.count_documents(mongo_data["filter"])
+            else:
+                count = collection.estimated_document_count()
+            return [{mongo_data["count"]: count}]
+        if "pipeline" in mongo_data:
+            rows = list(collection.aggregate(mongo_data["pipeline"]))
+            field = _count_field(mongo_data)
+            return [{field: 0}] if not rows and field is not None else rows
+        cursor = collection.find(mongo_data.get("filter") or {}, mongo_data.get("projection"))
+        if "sort" in mongo_data:
+            cursor = cursor.sort(list(mongo_data["sort"].items()))
+        if "skip" in mongo_data:
+            cursor = cursor.skip(mongo_data["skip"])
+        if "limit" in mongo_data:
+            cursor = cursor.limit(mongo_data["limit"])
+        return list(cursor)
+    finally:
+        drop_temp(db, temp)
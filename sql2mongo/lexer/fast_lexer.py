@@ -0,0 +1,115 @@
+import re
+
+from sql2mongo.lexer.sql_lexer import SqlLexer, LexerError
+
+
+class Token:
+    """Compact token with the attributes PLY's LRParser reads."""
+    __slots__ = ("type", "value", "lineno", "lexpos", "lexer")
+
+    def __init__(self, type, value, lineno, lexpos):
+        self.type = type
+        self.value = value
+        self.lineno = lineno
+        self.lexpos = lexpos
+
+    def __repr__(self):
+        return f"Token({self.type},{self.value!r},{self.lineno},{self.lexpos})"
+
+
+# One alternation per token class; operators and punctuation share a group and
+# are typed with a dict lookup. Leading blanks are folded into every match so
+# whitespace never costs a loop iteration.
+MASTER_RE = re.compile(
+    r"[ \t]*(?:"
+    r"(?P<WORD>[a-zA-Z_][a-zA-Z0-9_]*)"
+    r"|(?P<NUMBER>\d+)"
+    r"|(?P<STRING>'[^']*')"
+    r"|(?P<PLACEHOLDER>\?|:[a-zA-Z_][a-zA-Z0-9_]*)"
+    r"|(?P<OP>[!<>]=|[=<>,;*().])"
+    r"|(?P<NEWLINE>[\r\n]+)"
+    r"|(?P<ERROR>.)"
+    r"|(?P<END>$))",
+    re.DOTALL,
+)
+
+OP_TYPES = {
+    "!=": "NE", ">=": "GE", "<=": "LE",
+    "=": "EQ", ">": "GT", "<": "LT",
+    ",": "COMMA", ";": "SEMICOLON", "*": "STAR",
+    "(": "LPAREN", ")": "RPAREN", ".": "DOT",
+}
+
+# Upper bound on remembered word -> token type entries per lexer
+WORD_CACHE_SIZE = 4096
+
+
+class FastSqlLexer:
+    """
+    Single-regex scanner producing the same token stream as SqlLexer.
+
+    Drop-in for the PLY lexer: it exposes build/input/token/tokenize and can
+    be handed to SqlParser via SqlParser(lexer_backend="fast"). Positions are
+    carried on each token only, so parse(tracking=True) is not supported.
+    """
+    tokens = SqlLexer.tokens
+    reserved = SqlLexer.reserved
+
+    def __init__(self):
+        self._stream = iter(())
+        self.lineno = 1
+        self.lexpos = 0
+        self._word_types = {}
+
+    def build(self, **kwargs):
+        # Nothing to compile per instance; kept for SqlLexer API parity
+        self.lexer = self
+        return self
+
+    def _word_type(self, word):
+        word_type = self.reserved.get(word.upper(), "IDENTIFIER")
+        if len(self._word_types) < WORD_CACHE_SIZE:
+            self._word_types[word] = word_type
+        return word_type
+
+    def iter_tokens(self, data):
+        """Yields Token objects for `data`, raising LexerError on bad input."""
+        word_types = self._word_types
+        lineno = 1
+        for m in MASTER_RE.finditer(data):
+            kind = m.lastgroup
+            text = m.group(kind)
+            if kind == "WORD":
+                pos = m.start(kind)
+                word_type = word_types.get(text) or self._word_type(text)
+                yield Token(word_type, text, lineno, pos)
+            elif kind == "OP":
+                pos = m.start(kind)
+                yield Token(OP_TYPES[text], text, lineno, pos)
+            elif kind == "NUMBER":
+                pos = m.start(kind)
+                yield Token("NUMBER", int(text), lineno, pos)
+            elif kind == "STRING":
+                pos = m.start(kind)
+                yield Token("STRING", text[1:-1], lineno, pos)
+            elif kind == "PLACEHOLDER":
+                pos = m.start(kind)
+                yield Token("PLACEHOLDER", text, lineno, pos)
+            elif kind == "NEWLINE":
+                lineno += max(text.count("\n"), text.count("\r"))
+                continue
+            elif kind == "ERROR":
+                pos = m.start(kind)
+                column = pos - (data.rfind("\n", 0, pos) + 1) + 1
+                raise LexerError(f"Illegal character '{text}'", lineno, column)
+            else:
+                break
+
+    def input(self, data):
+        self._stream = self.iter_tokens(data)
+
+    def token(self):
+        return next(self._stream, None)
+
+    def tokenize(self, data):
+        return list(self.iter_tokens(data))
@@ -0,0 +1,10 @@
+# lextab.py. This file automatically created by PLY (version 3.11). Don't edit!
+_tabversion   = '3.10'
+_lextokens    = set(('AND', 'ASC', 'AVG', 'BETWEEN', 'BY', 'COMMA', 'COUNT', 'DESC', 'DISTINCT', 'DOT', 'EQ', 'FROM', 'GE', 'GROUP', 'GT', 'HAVING', 'IDENTIFIER', 'IN', 'JOIN', 'LE', 'LIMIT', 'LPAREN', 'LT', 'MAX', 'MIN', 'NE', 'NUMBER', 'OFFSET', 'ON', 'OR', 'ORDER', 'PLACEHOLDER', 'RPAREN', 'SELECT', 'SEMICOLON', 'STAR', 'STRING', 'SUM', 'WHERE'))
+_lexreflags   = 64
+_lexliterals  = ''
+_lexstateinfo = {'INITIAL': 'inclusive'}
+_lexstatere   = {'INITIAL': [("(?P<t_IDENTIFIER>[a-zA-Z_][a-zA-Z0-9_]*)|(?P<t_NUMBER>\\d+)|(?P<t_STRING>'[^']*')|(?P<t_PLACEHOLDER>\\?|:[a-zA-Z_][a-zA-Z0-9_]*)|(?P<t_newline>(\\r\\n|\\n|\\r)+)|(?P<t_DOT>\\.)|(?P<t_GE>>=)|(?P<t_LE><=)|(?P<t_LPAREN>\\()|(?P<t_NE>!=)|(?P<t_RPAREN>\\))|(?P<t_STAR>\\*)|(?P<t_COMMA>,)|(?P<t_EQ>=)|(?P<t_GT>>)|(?P<t_LT><)|(?P<t_SEMICOLON>;)", [None, ('t_IDENTIFIER', 'IDENTIFIER'), ('t_NUMBER', 'NUMBER'), ('t_STRING', 'STRING'), ('t_PLACEHOLDER', 'PLACEHOLDER'), ('t_newline', 'newline'), None, (None, 'DOT'), (None, 'GE'), (None, 'LE'), (None, 'LPAREN'), (None, 'NE'), (None, 'RPAREN'), (None, 'STAR'), (None, 'COMMA'), (None, 'EQ'), (None, 'GT'), (None, 'LT'), (None, 'SEMICOLON')])]}
+_lexstateignore = {'INITIAL': ' \t'}
+_lexstateerrorf = {'INITIAL': 't_error'}
+_lexstateeoff = {}
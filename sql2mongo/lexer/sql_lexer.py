@@ -1,5 +1,8 @@
 import ply.lex as lex
 
+# Prebuilt lexer table shipped with the package (see sql2mongo/build_tables.py)
+LEXTAB = "sql2mongo.lexer.lextab"
+
 class LexerError(Exception):
     def __init__(self, message, line, column):
         self.message = message
@@ -46,6 +49,9 @@ class SqlLexer:
         'DOT',
         'JOIN',
         'ON',
+        'PLACEHOLDER',
+        'DISTINCT',
+        'OFFSET',
     )
 
     # Regular expression rules for simple tokens
@@ -87,6 +93,8 @@ class SqlLexer:
         'HAVING':'HAVING',
         'JOIN':'JOIN',
         'ON':'ON',
+        'DISTINCT':'DISTINCT',
+        'OFFSET':'OFFSET',
     }
 
     def t_IDENTIFIER(self, t):
@@ -105,6 +113,11 @@ class SqlLexer:
         t.value = t.value[1:-1] # Remove quotes
         return t
 
+    def t_PLACEHOLDER(self, t):
+        r'\?|:[a-zA-Z_][a-zA-Z0-9_]*'
+        # '?' (positional) or ':name' (named); bound later by CompiledQuery
+        return t
+
     def t_newline(self, t):
         r'(\r\n|\n|\r)+'
         # Correctly evaluate line increments adjusting for 2-element \r\n characters
@@ -120,6 +133,9 @@ class SqlLexer:
         # t.lexer.skip(1)
 
     def build(self, **kwargs):
+        # Load the prebuilt lextab instead of re-validating every rule on startup
+        kwargs.setdefault("optimize", True)
+        kwargs.setdefault("lextab", LEXTAB)
         self.lexer = lex.lex(module=self, **kwargs)
         return self.lexer
 
@@ -140,7 +156,11 @@ class SqlLexer:
         return tokens
 
 # Helper function to expose the lexer easily
-def get_lexer():
-    l = SqlLexer()
+def get_lexer(backend="ply"):
+    if backend == "fast":
+        from sql2mongo.lexer.fast_lexer import FastSqlLexer
+        l = FastSqlLexer()
+    else:
+        l = SqlLexer()
     l.build()
     return l
@@ -0,0 +1,133 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from sql2mongo.parser.sql_parser import SqlParser
+
+
+class ParserPoolExhausted(Exception):
+    pass
+
+
+class ParserPool:
+    """
+    Checkout/return pool of pre-built SqlParser instances.
+
+    A PLY parser and the lexer it drives keep per-parse state, so one SqlParser
+    must never be used by two threads at once. The pool hands each caller its
+    own instance and exposes the same parse/tokenize/parse_tokens methods as
+    SqlParser, so it can be dropped in wherever a parser is expected.
+
+    When every parser is checked out, `fallback` decides what happens after
+    waiting up to `timeout` seconds:
+      - "build": construct a temporary parser that is discarded on release
+      - "wait":  keep blocking (timeout=None) or raise ParserPoolExhausted
+      - "error": raise ParserPoolExhausted without waiting
+    """
+    FALLBACKS = ("build", "wait", "error")
+
+    def __init__(self, size=4, fallback="build", timeout=None, lexer_backend="ply"):
+        if size < 1:
+            raise ValueError("ParserPool size must be at least 1")
+        if fallback not in self.FALLBACKS:
+            raise ValueError(f"Unknown fallback policy '{fallback}'")
+        self.size = size
+        self.fallback = fallback
+        self.timeout = timeout
+        self.lexer_backend = lexer_backend
+
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._overflow = set()
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.fallbacks = 0
+        self.exhausted = 0
+
+        for _ in range(size):
+            self._idle.put_nowait(self._build())
+
+    def _build(self):
+        return SqlParser(lexer_backend=self.lexer_backend)
+
+    def _wait_timeout(self):
+        if self.fallback == "error":
+            return 0
+        if self.fallback == "build":
+            return self.timeout or 0
+        return self.timeout
+
+    def acquire(self):
+        """Checks out a parser; pair every call with release()."""
+        try:
+            parser = self._idle.get_nowait()
+            waited = 0.0
+        except queue.Empty:
+            parser = None
+            timeout = self._wait_timeout()
+            start = time.perf_counter()
+            if timeout != 0:
+                try:
+                    parser = self._idle.get(timeout=timeout)
+                except queue.Empty:
+                    pass
+            waited = time.perf_counter() - start
+
+        with self._lock:
+            self.checkouts += 1
+            if waited:
+                self.waits += 1
+                self.wait_time += waited
+                self.max_wait = max(self.max_wait, waited)
+            if parser is None:
+                if self.fallback != "build":
+                    self.exhausted += 1
+                    raise ParserPoolExhausted(
+                        f"All {self.size} parsers are in use (fallback='{self.fallback}')")
+                self.fallbacks += 1
+                parser = self._build()
+                self._overflow.add(id(parser))
+        return parser
+
+    def release(self, parser):
+        with self._lock:
+            if id(parser) in self._overflow:
+                self._overflow.discard(id(parser))
+                return
+        self._idle.put_nowait(parser)
+
+    @contextmanager
+    def checkout(self):
+        parser = self.acquire()
+        try:
+            yield parser
+        finally:
+            self.release(parser)
+
+    def parse(self, data):
+        with self.checkout() as parser:
+            return parser.parse(data)
+
+    def tokenize(self, data):
+        with self.checkout() as parser:
+            return parser.tokenize(data)
+
+    def parse_tokens(self, tokens):
+        with self.checkout() as parser:
+            return parser.parse_tokens(tokens)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "idle": self._idle.qsize(),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_time": self.wait_time,
+                "max_wait": self.max_wait,
+                "fallbacks": self.fallbacks,
+                "exhausted": self.exhausted,
+            }
@@ -6,9 +6,9 @@ _tabversion = '3.10'
 
 _lr_method = 'LALR'
 
-_lr_signature = 'leftORleftANDAND ASC AVG BETWEEN BY COMMA COUNT DESC DOT EQ FROM GE GROUP GT HAVING IDENTIFIER IN JOIN LE LIMIT LPAREN LT MAX MIN NE NUMBER ON OR ORDER RPAREN SELECT SEMICOLON STAR STRING SUM WHEREquery : SELECT select_list FROM table_list where_clause_opt group_by_clause_opt having_clause_opt order_by_clause_opt limit_clause_opt SEMICOLONselect_list : STARtable_list : IDENTIFIERtable_list : table_list COMMA IDENTIFIER\n        table_list : IDENTIFIER JOIN IDENTIFIER ON condition\n        select_list : column_listcolumn_list : columncolumn_list : column_list COMMA columncolumn : identifiercolumn : COUNT LPAREN STAR RPAREN\n                  | COUNT LPAREN IDENTIFIER RPAREN\n                  | MIN LPAREN IDENTIFIER RPAREN\n                  | MAX LPAREN IDENTIFIER RPAREN\n                  | AVG LPAREN IDENTIFIER RPAREN\n                  | SUM LPAREN IDENTIFIER RPARENwhere_clause_opt : WHERE condition\n                            | emptygroup_by_clause_opt : GROUP BY group_list\n                               | emptygroup_list : IDENTIFIERgroup_list : group_list COMMA IDENTIFIERhaving_clause_opt : HAVING condition\n                             | emptycondition : condition AND term\n                     | condition OR termcondition : termterm : comparisonaggregate_expr : COUNT LPAREN STAR RPAREN\n                          | COUNT LPAREN IDENTIFIER RPAREN\n                          | MIN LPAREN IDENTIFIER RPAREN\n                          | MAX LPAREN IDENTIFIER RPAREN\n                          | AVG LPAREN IDENTIFIER RPAREN\n                          | SUM LPAREN IDENTIFIER RPARENcomparison : identifier operator identifier\n                  | identifier operator literal\n                  | aggregate_expr operator literalcomparison : IDENTIFIER BETWEEN literal AND literalliteral_list : literalliteral_list : literal_list COMMA literal\n        comparison : identifier IN LPAREN query_no_semicolon RPAREN\n        \n        query_no_semicolon : SELECT select_list FROM table_list where_clause_opt group_by_clause_opt having_clause_opt order_by_clause_opt limit_clause_opt\n        comparison : identifier IN LPAREN literal_list RPARENoperator : EQ\n                    | NE\n                    | GT\n                    | LT\n                    | GE\n                    | LEliteral : NUMBERliteral : STRINGorder_by_clause_opt : ORDER BY order_list\n                               | emptyorder_list : order_itemorder_list : order_list COMMA order_itemorder_item : IDENTIFIER\n                      | aggregate_exprorder_item : IDENTIFIER ASC\n                      | IDENTIFIER DESC\n                      | aggregate_expr ASC\n                      | aggregate_expr DESClimit_clause_opt : LIMIT NUMBER\n                            | emptyempty :identifier : IDENTIFIER\n                      | IDENTIFIER DOT IDENTIFIER'
+_lr_signature = 'leftORleftANDAND ASC AVG BETWEEN BY COMMA COUNT DESC DISTINCT DOT EQ FROM GE GROUP GT HAVING IDENTIFIER IN JOIN LE LIMIT LPAREN LT MAX MIN NE NUMBER OFFSET ON OR ORDER PLACEHOLDER RPAREN SELECT SEMICOLON STAR STRING SUM WHEREquery : SELECT distinct_opt select_list FROM table_list where_clause_opt group_by_clause_opt having_clause_opt order_by_clause_opt limit_clause_opt offset_clause_opt SEMICOLONdistinct_opt : DISTINCT\n                        | emptyselect_list : STARtable_list : IDENTIFIERtable_list : table_list COMMA IDENTIFIER\n        table_list : join_chain\n        \n        join_chain : IDENTIFIER JOIN IDENTIFIER ON condition\n        \n        join_chain : join_chain JOIN IDENTIFIER ON condition\n        select_list : column_listcolumn_list : columncolumn_list : column_list COMMA columncolumn : identifiercolumn : COUNT LPAREN STAR RPAREN\n                  | COUNT LPAREN IDENTIFIER RPAREN\n                  | COUNT LPAREN DISTINCT IDENTIFIER RPAREN\n                  | MIN LPAREN IDENTIFIER RPAREN\n                  | MAX LPAREN IDENTIFIER RPAREN\n                  | AVG LPAREN IDENTIFIER RPAREN\n                  | SUM LPAREN IDENTIFIER RPARENwhere_clause_opt : WHERE condition\n                            | emptygroup_by_clause_opt : GROUP BY group_list\n                               | emptygroup_list : IDENTIFIERgroup_list : group_list COMMA IDENTIFIERhaving_clause_opt : HAVING condition\n                             | emptycondition : condition AND term\n                     | condition OR termcondition : termterm : comparisonaggregate_expr : COUNT LPAREN STAR RPAREN\n                          | COUNT LPAREN IDENTIFIER RPAREN\n                          | COUNT LPAREN DISTINCT IDENTIFIER RPAREN\n                          | MIN LPAREN IDENTIFIER RPAREN\n                          | MAX LPAREN IDENTIFIER RPAREN\n                          | AVG LPAREN IDENTIFIER RPAREN\n                          | SUM LPAREN IDENTIFIER RPARENcomparison : identifier operator identifier\n                  | identifier operator literal\n                  | aggregate_expr operator literalcomparison : IDENTIFIER BETWEEN literal AND literalliteral_list : literalliteral_list : literal_list COMMA literal\n        comparison : identifier IN LPAREN query_no_semicolon RPAREN\n        \n        query_no_semicolon : SELECT distinct_opt select_list FROM table_list where_clause_opt group_by_clause_opt having_clause_opt order_by_clause_opt limit_clause_opt offset_clause_opt\n        comparison : identifier IN LPAREN literal_list RPARENoperator : EQ\n                    | NE\n                    | GT\n                    | LT\n                    | GE\n                    | LEliteral : NUMBERliteral : STRINGliteral : PLACEHOLDERorder_by_clause_opt : ORDER BY order_list\n                               | emptyorder_list : order_itemorder_list : order_list COMMA order_itemorder_item : IDENTIFIER\n                      | aggregate_exprorder_item : IDENTIFIER ASC\n                      | IDENTIFIER DESC\n                      | aggregate_expr ASC\n                      | aggregate_expr DESClimit_clause_opt : LIMIT NUMBER\n                            | emptyoffset_clause_opt : OFFSET NUMBER\n                             | emptyempty :identifier : IDENTIFIER\n                      | IDENTIFIER DOT IDENTIFIER'
     
-_lr_action_items = {'SELECT':([0,93,],[2,110,]),'$end':([1,119,],[0,-1,]),'STAR':([2,16,75,110,],[4,25,96,4,]),'COUNT':([2,15,34,60,63,64,80,106,110,131,],[8,8,53,53,53,53,53,53,8,53,]),'MIN':([2,15,34,60,63,64,80,106,110,131,],[10,10,54,54,54,54,54,54,10,54,]),'MAX':([2,15,34,60,63,64,80,106,110,131,],[11,11,55,55,55,55,55,55,11,55,]),'AVG':([2,15,34,60,63,64,80,106,110,131,],[12,12,56,56,56,56,56,56,12,56,]),'SUM':([2,15,34,60,63,64,80,106,110,131,],[13,13,57,57,57,57,57,57,13,57,]),'IDENTIFIER':([2,14,15,16,17,18,19,20,21,33,34,36,60,62,63,64,65,67,68,69,70,71,72,75,76,77,78,79,80,106,107,110,131,137,],[9,23,9,26,27,28,29,30,31,46,52,58,52,86,52,52,9,-43,-44,-45,-46,-47,-48,97,98,99,100,101,52,123,125,9,123,23,]),'FROM':([3,4,5,6,7,9,24,27,37,38,39,40,41,42,129,],[14,-2,-6,-7,-9,-64,-8,-65,-10,-11,-12,-13,-14,-15,137,]),'COMMA':([5,6,7,9,22,23,24,27,37,38,39,40,41,42,46,48,49,85,86,87,88,89,90,91,92,94,102,109,111,113,114,115,116,117,118,121,122,123,124,125,126,127,130,132,133,134,135,136,138,139,],[15,-7,-9,-64,33,-3,-8,-65,-10,-11,-12,-13,-14,-15,-4,-26,-27,107,-20,-24,-25,-34,-35,-49,-50,-36,-5,128,-38,-28,-29,-30,-31,-32,-33,131,-53,-55,-56,-21,-40,-42,-37,-57,-58,-59,-60,-39,-54,33,]),'LPAREN':([8,10,11,12,13,53,54,55,56,57,66,],[16,18,19,20,21,75,76,77,78,79,93,]),'AND':([9,27,47,48,49,84,87,88,89,90,91,92,94,95,102,126,127,130,],[-64,-65,63,-26,-27,63,-24,-25,-34,-35,-49,-50,-36,112,63,-40,-42,-37,]),'OR':([9,27,47,48,49,84,87,88,89,90,91,92,94,102,126,127,130,],[-64,-65,64,-26,-27,64,-24,-25,-34,-35,-49,-50,-36,64,-40,-42,-37,]),'GROUP':([9,22,23,27,32,35,46,47,48,49,87,88,89,90,91,92,94,102,126,127,130,139,140,],[-64,-63,-3,-65,44,-17,-4,-16,-26,-27,-24,-25,-34,-35,-49,-50,-36,-5,-40,-42,-37,-63,44,]),'HAVING':([9,22,23,27,32,35,43,45,46,47,48,49,85,86,87,88,89,90,91,92,94,102,125,126,127,130,139,140,141,],[-64,-63,-3,-65,-63,-17,60,-19,-4,-16,-26,-27,-18,-20,-24,-25,-34,-35,-49,-50,-36,-5,-21,-40,-42,-37,-63,-63,60,]),'ORDER':([9,22,23,27,32,35,43,45,46,47,48,49,59,61,84,85,86,87,88,89,90,91,92,94,102,125,126,127,130,139,140,141,142,],[-64,-63,-3,-65,-63,-17,-63,-19,-4,-16,-26,-27,82,-23,-22,-18,-20,-24,-25,-34,-35,-49,-50,-36,-5,-21,-40,-42,-37,-63,-63,-63,82,]),'LIMIT':([9,22,23,27,32,35,43,45,46,47,48,49,59,61,81,83,84,85,86,87,88,89,90,91,92,94,102,113,114,115,116,117,118,121,122,123,124,125,126,127,130,132,133,134,135,138,139,140,141,142,143,],[-64,-63,-3,-65,-63,-17,-63,-19,-4,-16,-26,-27,-63,-23,104,-52,-22,-18,-20,-24,-25,-34,-35,-49,-50,-36,-5,-28,-29,-30,-31,-32,-33,-51,-53,-55,-56,-21,-40,-42,-37,-57,-58,-59,-60,-54,-63,-63,-63,-63,104,]),'SEMICOLON':([9,22,23,27,32,35,43,45,46,47,48,49,59,61,81,83,84,85,86,87,88,89,90,91,92,94,102,103,105,113,114,115,116,117,118,120,121,122,123,124,125,126,127,130,132,133,134,135,138,],[-64,-63,-3,-65,-63,-17,-63,-19,-4,-16,-26,-27,-63,-23,-63,-52,-22,-18,-20,-24,-25,-34,-35,-49,-50,-36,-5,119,-62,-28,-29,-30,-31,-32,-33,-61,-51,-53,-55,-56,-21,-40,-42,-37,-57,-58,-59,-60,-54,]),'RPAREN':([9,23,25,26,27,28,29,30,31,35,45,46,47,48,49,61,83,84,85,86,87,88,89,90,91,92,94,96,97,98,99,100,101,102,105,108,109,111,113,114,115,116,117,118,120,121,122,123,124,125,126,127,130,132,133,134,135,136,138,139,140,141,142,143,144,],[-64,-3,37,38,-65,39,40,41,42,-17,-19,-4,-16,-26,-27,-23,-52,-22,-18,-20,-24,-25,-34,-35,-49,-50,-36,113,114,115,116,117,118,-5,-62,126,127,-38,-28,-29,-30,-31,-32,-33,-61,-51,-53,-55,-56,-21,-40,-42,-37,-57,-58,-59,-60,-39,-54,-63,-63,-63,-63,-63,-41,]),'WHERE':([9,22,23,27,46,48,49,87,88,89,90,91,92,94,102,126,127,130,139,],[-64,34,-3,-65,-4,-26,-27,-24,-25,-34,-35,-49,-50,-36,-5,-40,-42,-37,34,]),'DOT':([9,52,],[17,17,]),'JOIN':([23,],[36,]),'IN':([27,50,52,],[-65,66,-64,]),'EQ':([27,50,51,52,113,114,115,116,117,118,],[-65,67,67,-64,-28,-29,-30,-31,-32,-33,]),'NE':([27,50,51,52,113,114,115,116,117,118,],[-65,68,68,-64,-28,-29,-30,-31,-32,-33,]),'GT':([27,50,51,52,113,114,115,116,117,118,],[-65,69,69,-64,-28,-29,-30,-31,-32,-33,]),'LT':([27,50,51,52,113,114,115,116,117,118,],[-65,70,70,-64,-28,-29,-30,-31,-32,-33,]),'GE':([27,50,51,52,113,114,115,116,117,118,],[-65,71,71,-64,-28,-29,-30,-31,-32,-33,]),'LE':([27,50,51,52,113,114,115,116,117,118,],[-65,72,72,-64,-28,-29,-30,-31,-32,-33,]),'BY':([44,82,],[62,106,]),'BETWEEN':([52,],[74,]),'ON':([58,],[80,]),'NUMBER':([65,67,68,69,70,71,72,73,74,93,104,112,128,],[91,-43,-44,-45,-46,-47,-48,91,91,91,120,91,91,]),'STRING':([65,67,68,69,70,71,72,73,74,93,112,128,],[92,-43,-44,-45,-46,-47,-48,92,92,92,92,92,]),'ASC':([113,114,115,116,117,118,123,124,],[-28,-29,-30,-31,-32,-33,132,134,]),'DESC':([113,114,115,116,117,118,123,124,],[-28,-29,-30,-31,-32,-33,133,135,]),}
+_lr_action_items = {'SELECT':([0,104,],[2,123,]),'$end':([1,148,],[0,-1,]),'DISTINCT':([2,19,84,123,],[4,31,109,4,]),'STAR':([2,3,4,5,19,84,123,145,],[-72,7,-2,-3,29,107,-72,7,]),'COUNT':([2,3,4,5,18,39,69,72,73,89,90,119,123,145,150,],[-72,11,-2,-3,11,60,60,60,60,60,60,60,-72,11,60,]),'MIN':([2,3,4,5,18,39,69,72,73,89,90,119,123,145,150,],[-72,13,-2,-3,13,61,61,61,61,61,61,61,-72,13,61,]),'MAX':([2,3,4,5,18,39,69,72,73,89,90,119,123,145,150,],[-72,14,-2,-3,14,62,62,62,62,62,62,62,-72,14,62,]),'AVG':([2,3,4,5,18,39,69,72,73,89,90,119,123,145,150,],[-72,15,-2,-3,15,63,63,63,63,63,63,63,-72,15,63,]),'SUM':([2,3,4,5,18,39,69,72,73,89,90,119,123,145,150,],[-72,16,-2,-3,16,64,64,64,64,64,64,64,-72,16,64,]),'IDENTIFIER':([2,3,4,5,17,18,19,20,21,22,23,24,31,38,39,41,42,69,71,72,73,74,76,77,78,79,80,81,84,85,86,87,88,89,90,109,119,120,123,145,150,158,],[-72,12,-2,-3,26,12,30,32,33,34,35,36,45,53,59,65,66,59,96,59,59,12,-49,-50,-51,-52,-53,-54,108,110,111,112,113,59,59,128,139,141,-72,12,139,26,]),'FROM':([6,7,8,9,10,12,28,32,43,44,46,47,48,49,67,156,],[17,-4,-10,-11,-13,-73,-12,-74,-14,-15,-17,-18,-19,-20,-16,158,]),'COMMA':([8,9,10,12,25,26,27,28,32,43,44,46,47,48,49,53,55,56,67,95,96,97,98,99,100,101,102,103,105,114,115,122,124,126,127,129,130,131,132,137,138,139,140,141,142,143,146,147,151,152,153,154,155,157,159,],[18,-11,-13,-73,38,-5,-7,-12,-74,-14,-15,-17,-18,-19,-20,-6,-31,-32,-16,120,-25,-29,-30,-40,-41,-55,-56,-57,-42,-8,-9,144,-44,-33,-34,-36,-37,-38,-39,150,-60,-62,-63,-26,-46,-48,-43,-35,-64,-65,-66,-67,-45,-61,38,]),'LPAREN':([11,13,14,15,16,60,61,62,63,64,75,],[19,21,22,23,24,84,85,86,87,88,104,]),'AND':([12,32,54,55,56,94,97,98,99,100,101,102,103,105,106,114,115,142,143,146,],[-73,-74,72,-31,-32,72,-29,-30,-40,-41,-55,-56,-57,-42,125,72,72,-46,-48,-43,]),'OR':([12,32,54,55,56,94,97,98,99,100,101,102,103,105,114,115,142,143,146,],[-73,-74,73,-31,-32,73,-29,-30,-40,-41,-55,-56,-57,-42,73,73,-46,-48,-43,]),'GROUP':([12,25,26,27,32,37,40,53,54,55,56,97,98,99,100,101,102,103,105,114,115,142,143,146,159,160,],[-73,-72,-5,-7,-74,51,-22,-6,-21,-31,-32,-29,-30,-40,-41,-55,-56,-57,-42,-8,-9,-46,-48,-43,-72,51,]),'HAVING':([12,25,26,27,32,37,40,50,52,53,54,55,56,95,96,97,98,99,100,101,102,103,105,114,115,141,142,143,146,159,160,161,],[-73,-72,-5,-7,-74,-72,-22,69,-24,-6,-21,-31,-32,-23,-25,-29,-30,-40,-41,-55,-56,-57,-42,-8,-9,-26,-46,-48,-43,-72,-72,69,]),'ORDER':([12,25,26,27,32,37,40,50,52,53,54,55,56,68,70,94,95,96,97,98,99,100,101,102,103,105,114,115,141,142,143,146,159,160,161,162,],[-73,-72,-5,-7,-74,-72,-22,-72,-24,-6,-21,-31,-32,92,-28,-27,-23,-25,-29,-30,-40,-41,-55,-56,-57,-42,-8,-9,-26,-46,-48,-43,-72,-72,-72,92,]),'LIMIT':([12,25,26,27,32,37,40,50,52,53,54,55,56,68,70,91,93,94,95,96,97,98,99,100,101,102,103,105,114,115,126,127,129,130,131,132,137,138,139,140,141,142,143,146,147,151,152,153,154,157,159,160,161,162,163,],[-73,-72,-5,-7,-74,-72,-22,-72,-24,-6,-21,-31,-32,-72,-28,117,-59,-27,-23,-25,-29,-30,-40,-41,-55,-56,-57,-42,-8,-9,-33,-34,-36,-37,-38,-39,-58,-60,-62,-63,-26,-46,-48,-43,-35,-64,-65,-66,-67,-61,-72,-72,-72,-72,117,]),'OFFSET':([12,25,26,27,32,37,40,50,52,53,54,55,56,68,70,91,93,94,95,96,97,98,99,100,101,102,103,105,114,115,116,118,126,127,129,130,131,132,136,137,138,139,140,141,142,143,146,147,151,152,153,154,157,159,160,161,162,163,164,],[-73,-72,-5,-7,-74,-72,-22,-72,-24,-6,-21,-31,-32,-72,-28,-72,-59,-27,-23,-25,-29,-30,-40,-41,-55,-56,-57,-42,-8,-9,134,-69,-33,-34,-36,-37,-38,-39,-68,-58,-60,-62,-63,-26,-46,-48,-43,-35,-64,-65,-66,-67,-61,-72,-72,-72,-72,-72,134,]),'SEMICOLON':([12,25,26,27,32,37,40,50,52,53,54,55,56,68,70,91,93,94,95,96,97,98,99,100,101,102,103,105,114,115,116,118,126,127,129,130,131,132,133,135,136,137,138,139,140,141,142,143,146,147,149,151,152,153,154,157,],[-73,-72,-5,-7,-74,-72,-22,-72,-24,-6,-21,-31,-32,-72,-28,-72,-59,-27,-23,-25,-29,-30,-40,-41,-55,-56,-57,-42,-8,-9,-72,-69,-33,-34,-36,-37,-38,-39,148,-71,-68,-58,-60,-62,-63,-26,-46,-48,-43,-35,-70,-64,-65,-66,-67,-61,]),'RPAREN':([12,26,27,29,30,32,33,34,35,36,40,45,52,53,54,55,56,70,93,94,95,96,97,98,99,100,101,102,103,105,107,108,110,111,112,113,114,115,118,121,122,124,126,127,128,129,130,131,132,135,136,137,138,139,140,141,142,143,146,147,149,151,152,153,154,155,157,159,160,161,162,163,164,165,],[-73,-5,-7,43,44,-74,46,47,48,49,-22,67,-24,-6,-21,-31,-32,-28,-59,-27,-23,-25,-29,-30,-40,-41,-55,-56,-57,-42,126,127,129,130,131,132,-8,-9,-69,142,143,-44,-33,-34,147,-36,-37,-38,-39,-71,-68,-58,-60,-62,-63,-26,-46,-48,-43,-35,-70,-64,-65,-66,-67,-45,-61,-72,-72,-72,-72,-72,-72,-47,]),'JOIN':([12,26,27,32,55,56,97,98,99,100,101,102,103,105,114,115,142,143,146,],[-73,41,42,-74,-31,-32,-29,-30,-40,-41,-55,-56,-57,-42,-8,-9,-46,-48,-43,]),'WHERE':([12,25,26,27,32,53,55,56,97,98,99,100,101,102,103,105,114,115,142,143,146,159,],[-73,39,-5,-7,-74,-6,-31,-32,-29,-30,-40,-41,-55,-56,-57,-42,-8,-9,-46,-48,-43,39,]),'DOT':([12,59,],[20,20,]),'IN':([32,57,59,],[-74,75,-73,]),'EQ':([32,57,58,59,126,127,129,130,131,132,147,],[-74,76,76,-73,-33,-34,-36,-37,-38,-39,-35,]),'NE':([32,57,58,59,126,127,129,130,131,132,147,],[-74,77,77,-73,-33,-34,-36,-37,-38,-39,-35,]),'GT':([32,57,58,59,126,127,129,130,131,132,147,],[-74,78,78,-73,-33,-34,-36,-37,-38,-39,-35,]),'LT':([32,57,58,59,126,127,129,130,131,132,147,],[-74,79,79,-73,-33,-34,-36,-37,-38,-39,-35,]),'GE':([32,57,58,59,126,127,129,130,131,132,147,],[-74,80,80,-73,-33,-34,-36,-37,-38,-39,-35,]),'LE':([32,57,58,59,126,127,129,130,131,132,147,],[-74,81,81,-73,-33,-34,-36,-37,-38,-39,-35,]),'BY':([51,92,],[71,119,]),'BETWEEN':([59,],[83,]),'ON':([65,66,],[89,90,]),'NUMBER':([74,76,77,78,79,80,81,82,83,104,117,125,134,144,],[101,-49,-50,-51,-52,-53,-54,101,101,101,136,101,149,101,]),'STRING':([74,76,77,78,79,80,81,82,83,104,125,144,],[102,-49,-50,-51,-52,-53,-54,102,102,102,102,102,]),'PLACEHOLDER':([74,76,77,78,79,80,81,82,83,104,125,144,],[103,-49,-50,-51,-52,-53,-54,103,103,103,103,103,]),'ASC':([126,127,129,130,131,132,139,140,147,],[-33,-34,-36,-37,-38,-39,151,153,-35,]),'DESC':([126,127,129,130,131,132,139,140,147,],[-33,-34,-36,-37,-38,-39,152,154,-35,]),}
 
 _lr_action = {}
 for _k, _v in _lr_action_items.items():
@@ -17,7 +17,7 @@ for _k, _v in _lr_action_items.items():
       _lr_action[_x][_k] = _y
 del _lr_action_items
 
-_lr_goto_items = {'query':([0,],[1,]),'select_list':([2,110,],[3,129,]),'column_list':([2,110,],[5,5,]),'column':([2,15,110,],[6,24,6,]),'identifier':([2,15,34,60,63,64,65,80,110,],[7,7,50,50,50,50,89,50,7,]),'table_list':([14,137,],[22,139,]),'where_clause_opt':([22,139,],[32,140,]),'empty':([22,32,43,59,81,139,140,141,142,143,],[35,45,61,83,105,35,45,61,83,105,]),'group_by_clause_opt':([32,140,],[43,141,]),'condition':([34,60,80,],[47,84,102,]),'term':([34,60,63,64,80,],[48,48,87,88,48,]),'comparison':([34,60,63,64,80,],[49,49,49,49,49,]),'aggregate_expr':([34,60,63,64,80,106,131,],[51,51,51,51,51,124,124,]),'having_clause_opt':([43,141,],[59,142,]),'operator':([50,51,],[65,73,]),'order_by_clause_opt':([59,142,],[81,143,]),'group_list':([62,],[85,]),'literal':([65,73,74,93,112,128,],[90,94,95,111,130,136,]),'limit_clause_opt':([81,143,],[103,144,]),'query_no_semicolon':([93,],[108,]),'literal_list':([93,],[109,]),'order_list':([106,],[121,]),'order_item':([106,131,],[122,138,]),}
+_lr_goto_items = {'query':([0,],[1,]),'distinct_opt':([2,123,],[3,145,]),'empty':([2,25,37,50,68,91,116,123,159,160,161,162,163,164,],[5,40,52,70,93,118,135,5,40,52,70,93,118,135,]),'select_list':([3,145,],[6,156,]),'column_list':([3,145,],[8,8,]),'column':([3,18,145,],[9,28,9,]),'identifier':([3,18,39,69,72,73,74,89,90,145,],[10,10,57,57,57,57,99,57,57,10,]),'table_list':([17,158,],[25,159,]),'join_chain':([17,158,],[27,27,]),'where_clause_opt':([25,159,],[37,160,]),'group_by_clause_opt':([37,160,],[50,161,]),'condition':([39,69,89,90,],[54,94,114,115,]),'term':([39,69,72,73,89,90,],[55,55,97,98,55,55,]),'comparison':([39,69,72,73,89,90,],[56,56,56,56,56,56,]),'aggregate_expr':([39,69,72,73,89,90,119,150,],[58,58,58,58,58,58,140,140,]),'having_clause_opt':([50,161,],[68,162,]),'operator':([57,58,],[74,82,]),'order_by_clause_opt':([68,162,],[91,163,]),'group_list':([71,],[95,]),'literal':([74,82,83,104,125,144,],[100,105,106,124,146,155,]),'limit_clause_opt':([91,163,],[116,164,]),'query_no_semicolon':([104,],[121,]),'literal_list':([104,],[122,]),'offset_clause_opt':([116,164,],[133,165,]),'order_list':([119,],[137,]),'order_item':([119,150,],[138,157,]),}
 
 _lr_goto = {}
 for _k, _v in _lr_goto_items.items():
@@ -27,69 +27,78 @@ for _k, _v in _lr_goto_items.items():
 del _lr_goto_items
 _lr_productions = [
   ("S' -> query","S'",1,None,None,None),
-  ('query -> SELECT select_list FROM table_list where_clause_opt group_by_clause_opt having_clause_opt order_by_clause_opt limit_clause_opt SEMICOLON','query',10,'p_query','sql_parser.py',19),
-  ('select_list -> STAR','select_list',1,'p_select_list_star','sql_parser.py',38),
-  ('table_list -> IDENTIFIER','table_list',1,'p_table_list_single','sql_parser.py',41),
-  ('table_list -> table_list COMMA IDENTIFIER','table_list',3,'p_table_list_comma','sql_parser.py',47),
-  ('table_list -> IDENTIFIER JOIN IDENTIFIER ON condition','table_list',5,'p_table_list_join','sql_parser.py',57),
-  ('select_list -> column_list','select_list',1,'p_select_list_columns','sql_parser.py',69),
-  ('column_list -> column','column_list',1,'p_column_list_single','sql_parser.py',73),
-  ('column_list -> column_list COMMA column','column_list',3,'p_column_list_multi','sql_parser.py',77),
-  ('column -> identifier','column',1,'p_column_identifier','sql_parser.py',81),
-  ('column -> COUNT LPAREN STAR RPAREN','column',4,'p_column_aggregate','sql_parser.py',85),
-  ('column -> COUNT LPAREN IDENTIFIER RPAREN','column',4,'p_column_aggregate','sql_parser.py',86),
-  ('column -> MIN LPAREN IDENTIFIER RPAREN','column',4,'p_column_aggregate','sql_parser.py',87),
-  ('column -> MAX LPAREN IDENTIFIER RPAREN','column',4,'p_column_aggregate','sql_parser.py',88),
-  ('column -> AVG LPAREN IDENTIFIER RPAREN','column',4,'p_column_aggregate','sql_parser.py',89),
-  ('column -> SUM LPAREN IDENTIFIER RPAREN','column',4,'p_column_aggregate','sql_parser.py',90),
-  ('where_clause_opt -> WHERE condition','where_clause_opt',2,'p_where_clause_opt','sql_parser.py',97),
-  ('where_clause_opt -> empty','where_clause_opt',1,'p_where_clause_opt','sql_parser.py',98),
-  ('group_by_clause_opt -> GROUP BY group_list','group_by_clause_opt',3,'p_group_by_clause_opt','sql_parser.py',105),
-  ('group_by_clause_opt -> empty','group_by_clause_opt',1,'p_group_by_clause_opt','sql_parser.py',106),
-  ('group_list -> IDENTIFIER','group_list',1,'p_group_list_single','sql_parser.py',112),
-  ('group_list -> group_list COMMA IDENTIFIER','group_list',3,'p_group_list_multiple','sql_parser.py',116),
-  ('having_clause_opt -> HAVING condition','having_clause_opt',2,'p_having_clause_opt','sql_parser.py',120),
-  ('having_clause_opt -> empty','having_clause_opt',1,'p_having_clause_opt','sql_parser.py',121),
-  ('condition -> condition AND term','condition',3,'p_condition_visual','sql_parser.py',128),
-  ('condition -> condition OR term','condition',3,'p_condition_visual','sql_parser.py',129),
-  ('condition -> term','condition',1,'p_condition_term','sql_parser.py',132),
-  ('term -> comparison','term',1,'p_term','sql_parser.py',135),
-  ('aggregate_expr -> COUNT LPAREN STAR RPAREN','aggregate_expr',4,'p_aggregate_expr','sql_parser.py',138),
-  ('aggregate_expr -> COUNT LPAREN IDENTIFIER RPAREN','aggregate_expr',4,'p_aggregate_expr','sql_parser.py',139),
-  ('aggregate_expr -> MIN LPAREN IDENTIFIER RPAREN','aggregate_expr',4,'p_aggregate_expr','sql_parser.py',140),
-  ('aggregate_expr -> MAX LPAREN IDENTIFIER RPAREN','aggregate_expr',4,'p_aggregate_expr','sql_parser.py',141),
-  ('aggregate_expr -> AVG LPAREN IDENTIFIER RPAREN','aggregate_expr',4,'p_aggregate_expr','sql_parser.py',142),
-  ('aggregate_expr -> SUM LPAREN IDENTIFIER RPAREN','aggregate_expr',4,'p_aggregate_expr','sql_parser.py',143),
-  ('comparison -> identifier operator identifier','comparison',3,'p_comparison','sql_parser.py',150),
-  ('comparison -> identifier operator literal','comparison',3,'p_comparison','sql_parser.py',151),
-  ('comparison -> aggregate_expr operator literal','comparison',3,'p_comparison','sql_parser.py',152),
-  ('comparison -> IDENTIFIER BETWEEN literal AND literal','comparison',5,'p_comparison_between','sql_parser.py',159),
-  ('literal_list -> literal','literal_list',1,'p_literal_list_single','sql_parser.py',166),
-  ('literal_list -> literal_list COMMA literal','literal_list',3,'p_literal_list_multi','sql_parser.py',170),
-  ('comparison -> identifier IN LPAREN query_no_semicolon RPAREN','comparison',5,'p_comparison_in_subquery','sql_parser.py',175),
-  ('query_no_semicolon -> SELECT select_list FROM table_list where_clause_opt group_by_clause_opt having_clause_opt order_by_clause_opt limit_clause_opt','query_no_semicolon',9,'p_query_no_semicolon','sql_parser.py',185),
-  ('comparison -> identifier IN LPAREN literal_list RPAREN','comparison',5,'p_comparison_in','sql_parser.py',207),
-  ('operator -> EQ','operator',1,'p_operator','sql_parser.py',214),
-  ('operator -> NE','operator',1,'p_operator','sql_parser.py',215),
-  ('operator -> GT','operator',1,'p_operator','sql_parser.py',216),
-  ('operator -> LT','operator',1,'p_operator','sql_parser.py',217),
-  ('operator -> GE','operator',1,'p_operator','sql_parser.py',218),
-  ('operator -> LE','operator',1,'p_operator','sql_parser.py',219),
-  ('literal -> NUMBER','literal',1,'p_literal_number','sql_parser.py',223),
-  ('literal -> STRING','literal',1,'p_literal_string','sql_parser.py',227),
-  ('order_by_clause_opt -> ORDER BY order_list','order_by_clause_opt',3,'p_order_by_clause_opt','sql_parser.py',231),
-  ('order_by_clause_opt -> empty','order_by_clause_opt',1,'p_order_by_clause_opt','sql_parser.py',232),
-  ('order_list -> order_item','order_list',1,'p_order_list_single','sql_parser.py',238),
-  ('order_list -> order_list COMMA order_item','order_list',3,'p_order_list_multiple','sql_parser.py',242),
-  ('order_item -> IDENTIFIER','order_item',1,'p_order_item_default','sql_parser.py',246),
-  ('order_item -> aggregate_expr','order_item',1,'p_order_item_default','sql_parser.py',247),
-  ('order_item -> IDENTIFIER ASC','order_item',2,'p_order_item_direction','sql_parser.py',255),
-  ('order_item -> IDENTIFIER DESC','order_item',2,'p_order_item_direction','sql_parser.py',256),
-  ('order_item -> aggregate_expr ASC','order_item',2,'p_order_item_direction','sql_parser.py',257),
-  ('order_item -> aggregate_expr DESC','order_item',2,'p_order_item_direction','sql_parser.py',258),
-  ('limit_clause_opt -> LIMIT NUMBER','limit_clause_opt',2,'p_limit_clause_opt','sql_parser.py',266),
-  ('limit_clause_opt -> empty','limit_clause_opt',1,'p_limit_clause_opt','sql_parser.py',267),
-  ('empty -> <empty>','empty',0,'p_empty','sql_parser.py',274),
-  ('identifier -> IDENTIFIER','identifier',1,'p_identifier','sql_parser.py',278),
-  ('identifier -> IDENTIFIER DOT IDENTIFIER','identifier',3,'p_identifier','sql_parser.py',279),
+  ('query -> SELECT distinct_opt select_list FROM table_list where_clause_opt group_by_clause_opt having_clause_opt order_by_clause_opt limit_clause_opt offset_clause_opt SEMICOLON','query',12,'p_query','sql_parser.py',36),
+  ('distinct_opt -> DISTINCT','distinct_opt',1,'p_distinct_opt','sql_parser.py',57),
+  ('distinct_opt -> empty','distinct_opt',1,'p_distinct_opt','sql_parser.py',58),
+  ('select_list -> STAR','select_list',1,'p_select_list_star','sql_parser.py',61),
+  ('table_list -> IDENTIFIER','table_list',1,'p_table_list_single','sql_parser.py',64),
+  ('table_list -> table_list COMMA IDENTIFIER','table_list',3,'p_table_list_comma','sql_parser.py',70),
+  ('table_list -> join_chain','table_list',1,'p_table_list_join','sql_parser.py',80),
+  ('join_chain -> IDENTIFIER JOIN IDENTIFIER ON condition','join_chain',5,'p_join_chain_first','sql_parser.py',85),
+  ('join_chain -> join_chain JOIN IDENTIFIER ON condition','join_chain',5,'p_join_chain_next','sql_parser.py',93),
+  ('select_list -> column_list','select_list',1,'p_select_list_columns','sql_parser.py',101),
+  ('column_list -> column','column_list',1,'p_column_list_single','sql_parser.py',105),
+  ('column_list -> column_list COMMA column','column_list',3,'p_column_list_multi','sql_parser.py',109),
+  ('column -> identifier','column',1,'p_column_identifier','sql_parser.py',113),
+  ('column -> COUNT LPAREN STAR RPAREN','column',4,'p_column_aggregate','sql_parser.py',117),
+  ('column -> COUNT LPAREN IDENTIFIER RPAREN','column',4,'p_column_aggregate','sql_parser.py',118),
+  ('column -> COUNT LPAREN DISTINCT IDENTIFIER RPAREN','column',5,'p_column_aggregate','sql_parser.py',119),
+  ('column -> MIN LPAREN IDENTIFIER RPAREN','column',4,'p_column_aggregate','sql_parser.py',120),
+  ('column -> MAX LPAREN IDENTIFIER RPAREN','column',4,'p_column_aggregate','sql_parser.py',121),
+  ('column -> AVG LPAREN IDENTIFIER RPAREN','column',4,'p_column_aggregate','sql_parser.py',122),
+  ('column -> SUM LPAREN IDENTIFIER RPAREN','column',4,'p_column_aggregate','sql_parser.py',123),
+  ('where_clause_opt -> WHERE condition','where_clause_opt',2,'p_where_clause_opt','sql_parser.py',132),
+  ('where_clause_opt -> empty','where_clause_opt',1,'p_where_clause_opt','sql_parser.py',133),
+  ('group_by_clause_opt -> GROUP BY group_list','group_by_clause_opt',3,'p_group_by_clause_opt','sql_parser.py',140),
+  ('group_by_clause_opt -> empty','group_by_clause_opt',1,'p_group_by_clause_opt','sql_parser.py',141),
+  ('group_list -> IDENTIFIER','group_list',1,'p_group_list_single','sql_parser.py',147),
+  ('group_list -> group_list COMMA IDENTIFIER','group_list',3,'p_group_list_multiple','sql_parser.py',151),
+  ('having_clause_opt -> HAVING condition','having_clause_opt',2,'p_having_clause_opt','sql_parser.py',155),
+  ('having_clause_opt -> empty','having_clause_opt',1,'p_having_clause_opt','sql_parser.py',156),
+  ('condition -> condition AND term','condition',3,'p_condition_visual','sql_parser.py',163),
+  ('condition -> condition OR term','condition',3,'p_condition_visual','sql_parser.py',164),
+  ('condition -> term','condition',1,'p_condition_term','sql_parser.py',167),
+  ('term -> comparison','term',1,'p_term','sql_parser.py',170),
+  ('aggregate_expr -> COUNT LPAREN STAR RPAREN','aggregate_expr',4,'p_aggregate_expr','sql_parser.py',173),
+  ('aggregate_expr -> COUNT LPAREN IDENTIFIER RPAREN','aggregate_expr',4,'p_aggregate_expr','sql_parser.py',174),
+  ('aggregate_expr -> COUNT LPAREN DISTINCT IDENTIFIER RPAREN','aggregate_expr',5,'p_aggregate_expr','sql_parser.py',175),
+  ('aggregate_expr -> MIN LPAREN IDENTIFIER RPAREN','aggregate_expr',4,'p_aggregate_expr','sql_parser.py',176),
+  ('aggregate_expr -> MAX LPAREN IDENTIFIER RPAREN','aggregate_expr',4,'p_aggregate_expr','sql_parser.py',177),
+  ('aggregate_expr -> AVG LPAREN IDENTIFIER RPAREN','aggregate_expr',4,'p_aggregate_expr','sql_parser.py',178),
+  ('aggregate_expr -> SUM LPAREN IDENTIFIER RPAREN','aggregate_expr',4,'p_aggregate_expr','sql_parser.py',179),
+  ('comparison -> identifier operator identifier','comparison',3,'p_comparison','sql_parser.py',188),
+  ('comparison -> identifier operator literal','comparison',3,'p_comparison','sql_parser.py',189),
+  ('comparison -> aggregate_expr operator literal','comparison',3,'p_comparison','sql_parser.py',190),
+  ('comparison -> IDENTIFIER BETWEEN literal AND literal','comparison',5,'p_comparison_between','sql_parser.py',197),
+  ('literal_list -> literal','literal_list',1,'p_literal_list_single','sql_parser.py',204),
+  ('literal_list -> literal_list COMMA literal','literal_list',3,'p_literal_list_multi','sql_parser.py',208),
+  ('comparison -> identifier IN LPAREN query_no_semicolon RPAREN','comparison',5,'p_comparison_in_subquery','sql_parser.py',213),
+  ('query_no_semicolon -> SELECT distinct_opt select_list FROM table_list where_clause_opt group_by_clause_opt having_clause_opt order_by_clause_opt limit_clause_opt offset_clause_opt','query_no_semicolon',11,'p_query_no_semicolon','sql_parser.py',223),
+  ('comparison -> identifier IN LPAREN literal_list RPAREN','comparison',5,'p_comparison_in','sql_parser.py',247),
+  ('operator -> EQ','operator',1,'p_operator','sql_parser.py',254),
+  ('operator -> NE','operator',1,'p_operator','sql_parser.py',255),
+  ('operator -> GT','operator',1,'p_operator','sql_parser.py',256),
+  ('operator -> LT','operator',1,'p_operator','sql_parser.py',257),
+  ('operator -> GE','operator',1,'p_operator','sql_parser.py',258),
+  ('operator -> LE','operator',1,'p_operator','sql_parser.py',259),
+  ('literal -> NUMBER','literal',1,'p_literal_number','sql_parser.py',263),
+  ('literal -> STRING','literal',1,'p_literal_string','sql_parser.py',267),
+  ('literal -> PLACEHOLDER','literal',1,'p_literal_placeholder','sql_parser.py',271),
+  ('order_by_clause_opt -> ORDER BY order_list','order_by_clause_opt',3,'p_order_by_clause_opt','sql_parser.py',276),
+  ('order_by_clause_opt -> empty','order_by_clause_opt',1,'p_order_by_clause_opt','sql_parser.py',277),
+  ('order_list -> order_item','order_list',1,'p_order_list_single','sql_parser.py',283),
+  ('order_list -> order_list COMMA order_item','order_list',3,'p_order_list_multiple','sql_parser.py',287),
+  ('order_item -> IDENTIFIER','order_item',1,'p_order_item_default','sql_parser.py',291),
+  ('order_item -> aggregate_expr','order_item',1,'p_order_item_default','sql_parser.py',292),
+  ('order_item -> IDENTIFIER ASC','order_item',2,'p_order_item_direction','sql_parser.py',300),
+  ('order_item -> IDENTIFIER DESC','order_item',2,'p_order_item_direction','sql_parser.py',301),
+  ('order_item -> aggregate_expr ASC','order_item',2,'p_order_item_direction','sql_parser.py',302),
+  ('order_item -> aggregate_expr DESC','order_item',2,'p_order_item_direction','sql_parser.py',303),
+  ('limit_clause_opt -> LIMIT NUMBER','limit_clause_opt',2,'p_limit_clause_opt','sql_parser.py',311),
+  ('limit_clause_opt -> empty','limit_clause_opt',1,'p_limit_clause_opt','sql_parser.py',312),
+  ('offset_clause_opt -> OFFSET NUMBER','offset_clause_opt',2,'p_offset_clause_opt','sql_parser.py',319),
+  ('offset_clause_opt -> empty','offset_clause_opt',1,'p_offset_clause_opt','sql_parser.py',320),
+  ('empty -> <empty>','empty',0,'p_empty','sql_parser.py',327),
+  ('identifier -> IDENTIFIER','identifier',1,'p_identifier','sql_parser.py',331),
+  ('identifier -> IDENTIFIER DOT IDENTIFIER','identifier',3,'p_identifier','sql_parser.py',332),
 ]
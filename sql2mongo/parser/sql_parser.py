@@ -1,13 +1,30 @@
 import ply.yacc as yacc
 from sql2mongo.lexer.sql_lexer import SqlLexer
-from sql2mongo.ast.nodes import SelectQuery, LogicalCondition, Comparison,OrderByItem,Aggregate
+from sql2mongo.lexer.fast_lexer import FastSqlLexer
+from sql2mongo.ast.nodes import SelectQuery, LogicalCondition, Comparison,OrderByItem,Aggregate,Parameter,ColumnRef,Join
+
+# Prebuilt LALR table shipped with the package (see sql2mongo/build_tables.py)
+TABMODULE = "sql2mongo.parser.parsetab"
+
+# Interchangeable token sources; both expose build/input/token
+LEXER_BACKENDS = {
+    "ply": SqlLexer,
+    "fast": FastSqlLexer,
+}
 
 class SqlParser:
-    def __init__(self):
-        self.lexer = SqlLexer()
+    def __init__(self, lexer_backend="ply", **yacc_kwargs):
+        self.lexer = LEXER_BACKENDS[lexer_backend]()
         self.lexer.build()
         self.tokens = self.lexer.tokens
-        self.parser = yacc.yacc(module=self)
+        # optimize=True trusts the shipped parsetab without re-checking the grammar
+        # signature; debug/write_tables are off so startup never writes parser.out
+        # or regenerates tables. Rebuild them with `make tables` after grammar edits.
+        yacc_kwargs.setdefault("tabmodule", TABMODULE)
+        yacc_kwargs.setdefault("optimize", True)
+        yacc_kwargs.setdefault("debug", False)
+        yacc_kwargs.setdefault("write_tables", False)
+        self.parser = yacc.yacc(module=self, **yacc_kwargs)
 
     # Precedence rules
     precedence = (
@@ -16,8 +33,8 @@ class SqlParser:
     )
 
     def p_query(self, p):
-        '''query : SELECT select_list FROM table_list where_clause_opt group_by_clause_opt having_clause_opt order_by_clause_opt limit_clause_opt SEMICOLON'''
-        table_data = p[4]
+        '''query : SELECT distinct_opt select_list FROM table_list where_clause_opt group_by_clause_opt having_clause_opt order_by_clause_opt limit_clause_opt offset_clause_opt SEMICOLON'''
+        table_data = p[5]
         if isinstance(table_data, dict):
             base_table = table_data["base"]
             joins = table_data["joins"]
@@ -25,18 +42,24 @@ class SqlParser:
             base_table = table_data[0] if isinstance(table_data, list) and len(table_data) == 1 else table_data
             joins = []
         p[0] = SelectQuery(
-            columns=p[2],
+            columns=p[3],
             table=base_table,
             joins=joins,   
-            where=p[5],
-            group_by=p[6],
-            having=p[7],
-            order_by=p[8],
-            limit=p[9]
+            where=p[6],
+            group_by=p[7],
+            having=p[8],
+            order_by=p[9],
+            limit=p[10],
+            offset=p[11],
+            distinct=p[2]
         )
+    def p_distinct_opt(self, p):
+        '''distinct_opt : DISTINCT
+                        | empty'''
+        p[0] = p[1] is not None
     def p_select_list_star(self, p):
         '''select_list : STAR'''
-        p[0] = ['*']
+        p[0] = ('*',)
     def p_table_list_single(self, p):
         '''table_list : IDENTIFIER'''
         p[0] = {
@@ -47,23 +70,32 @@ class SqlParser:
         '''table_list : table_list COMMA IDENTIFIER'''
         # keep old behavior for implicit joins
         if isinstance(p[1], dict):
-            tables = [p[1]["base"]] + [j["table"] for j in p[1]["joins"]]
+            tables = [p[1]["base"]] + [j.table for j in p[1]["joins"]]
         else:
             tables = p[1]
         tables.append(p[3])
         p[0] = tables   # keep implicit join untouched
     def p_table_list_join(self, p):
         '''
-        table_list : IDENTIFIER JOIN IDENTIFIER ON condition
+        table_list : join_chain
+        '''
+        p[0] = p[1]
+    def p_join_chain_first(self, p):
+        '''
+        join_chain : IDENTIFIER JOIN IDENTIFIER ON condition
         '''
         p[0] = {
             "base": p[1],
-            "joins": [
-                {
-                    "table": p[3],
-                    "condition": p[5]
-                }
-            ]
+            "joins": [Join(table=p[3], condition=p[5])]
+        }
+    def p_join_chain_next(self, p):
+        '''
+        join_chain : join_chain JOIN IDENTIFIER ON condition
+        '''
+        # each further JOIN ... ON appends to the joins of the FROM table
+        p[0] = {
+            "base": p[1]["base"],
+            "joins": p[1]["joins"] + [Join(table=p[3], condition=p[5])]
         }
     def p_select_list_columns(self, p):
         '''select_list : column_list'''
@@ -84,11 +116,14 @@ class SqlParser:
     def p_column_aggregate(self, p):
         '''column : COUNT LPAREN STAR RPAREN
                   | COUNT LPAREN IDENTIFIER RPAREN
+                  | COUNT LPAREN DISTINCT IDENTIFIER RPAREN
                   | MIN LPAREN IDENTIFIER RPAREN
                   | MAX LPAREN IDENTIFIER RPAREN
                   | AVG LPAREN IDENTIFIER RPAREN
                   | SUM LPAREN IDENTIFIER RPAREN'''
-        if p[1].upper() == "COUNT" and p[3] == "*":
+        if len(p) == 6:
+            p[0] = Aggregate("COUNT", p[4], distinct=True)
+        elif p[1].upper() == "COUNT" and p[3] == "*":
             p[0] = Aggregate("COUNT", "*")
         else:
             p[0] = Aggregate(p[1].upper(), p[3])
@@ -137,11 +172,14 @@ class SqlParser:
     def p_aggregate_expr(self, p):
         '''aggregate_expr : COUNT LPAREN STAR RPAREN
                           | COUNT LPAREN IDENTIFIER RPAREN
+                          | COUNT LPAREN DISTINCT IDENTIFIER RPAREN
                           | MIN LPAREN IDENTIFIER RPAREN
                           | MAX LPAREN IDENTIFIER RPAREN
                           | AVG LPAREN IDENTIFIER RPAREN
                           | SUM LPAREN IDENTIFIER RPAREN'''
-        if p[1].upper() == "COUNT" and p[3] == "*":
+        if len(p) == 6:
+            p[0] = Aggregate("COUNT", p[4], distinct=True)
+        elif p[1].upper() == "COUNT" and p[3] == "*":
             p[0] = Aggregate("COUNT", "*")
         else:
             p[0] = Aggregate(p[1].upper(), p[3])
@@ -158,7 +196,7 @@ class SqlParser:
     def p_comparison_between(self, p):
         '''comparison : IDENTIFIER BETWEEN literal AND literal'''
         p[0] = Comparison(
-                identifier=p[1],
+                identifier=ColumnRef(None, p[1]),
                 operator="BETWEEN",
                 value=(p[3], p[5])
                 )
@@ -168,7 +206,9 @@ class SqlParser:
 
     def p_literal_list_multi(self, p):
         '''literal_list : literal_list COMMA literal'''
-        p[0] = p[1] + [p[3]]
+        # extend in place: copying would make long IN lists quadratic
+        p[1].append(p[3])
+        p[0] = p[1]
 
     def p_comparison_in_subquery(self, p):
         '''
@@ -182,9 +222,9 @@ class SqlParser:
         )
     def p_query_no_semicolon(self, p):
         '''
-        query_no_semicolon : SELECT select_list FROM table_list where_clause_opt group_by_clause_opt having_clause_opt order_by_clause_opt limit_clause_opt
+        query_no_semicolon : SELECT distinct_opt select_list FROM table_list where_clause_opt group_by_clause_opt having_clause_opt order_by_clause_opt limit_clause_opt offset_clause_opt
         '''
-        table_data = p[4]
+        table_data = p[5]
 
         if isinstance(table_data, dict):
             base_table = table_data["base"]
@@ -194,14 +234,16 @@ class SqlParser:
             base_table = table_data
 
         p[0] = SelectQuery(
-            columns=p[2],
+            columns=p[3],
             table=base_table,
             joins=table_data["joins"] if isinstance(table_data, dict) else [],
-            where=p[5],
-            group_by=p[6],
-            having=p[7],
-            order_by=p[8],
-            limit=p[9]
+            where=p[6],
+            group_by=p[7],
+            having=p[8],
+            order_by=p[9],
+            limit=p[10],
+            offset=p[11],
+            distinct=p[2]
         )
     def p_comparison_in(self, p):
         '''comparison : identifier IN LPAREN literal_list RPAREN'''
@@ -227,6 +269,11 @@ class SqlParser:
         '''literal : STRING'''
         p[0] = p[1]
 
+    def p_literal_placeholder(self, p):
+        '''literal : PLACEHOLDER'''
+        name = None if p[1] == "?" else p[1][1:]
+        p[0] = Parameter(name=name, position=p.lexpos(1))
+
     def p_order_by_clause_opt(self, p):
         '''order_by_clause_opt : ORDER BY order_list
                                | empty'''
@@ -270,6 +317,14 @@ class SqlParser:
         else:
             p[0] = None
 
+    def p_offset_clause_opt(self, p):
+        '''offset_clause_opt : OFFSET NUMBER
+                             | empty'''
+        if len(p) == 3:
+            p[0] = p[2]
+        else:
+            p[0] = None
+
     def p_empty(self, p):
         '''empty :'''
         pass
@@ -278,15 +333,9 @@ class SqlParser:
         '''identifier : IDENTIFIER
                       | IDENTIFIER DOT IDENTIFIER'''
         if len(p) == 2:
-            p[0] = {
-                "table": None,
-                "column": p[1]
-            }
+            p[0] = ColumnRef(None, p[1])
         else:
-            p[0] = {
-                "table": p[1],
-                "column": p[3]
-            }
+            p[0] = ColumnRef(p[1], p[3])
 
     def p_error(self, p):
         if p:
@@ -297,6 +346,25 @@ class SqlParser:
     def parse(self, data):
         return self.parser.parse(data, lexer=self.lexer.lexer)
 
+    def tokenize(self, data):
+        return self.lexer.tokenize(data)
+
+    def parse_tokens(self, tokens):
+        """Parses an already tokenized statement (see tokenize)."""
+        return self.parser.parse(lexer=TokenStream(tokens))
+
+
+class TokenStream:
+    """Minimal lexer interface over a pre-built token list."""
+    def __init__(self, tokens):
+        self._tokens = iter(tokens)
+
+    def input(self, data):
+        pass
+
+    def token(self):
+        return next(self._tokens, None)
+
 # Helper function
-def get_parser():
-    return SqlParser()
+def get_parser(lexer_backend="ply"):
+    return SqlParser(lexer_backend=lexer_backend)
@@ -0,0 +1,164 @@
+"""
+Literal-agnostic query fingerprints and an LRU cache of generated plans.
+
+Queries that differ only in their NUMBER/STRING literals share a fingerprint.
+On a miss the statement is compiled once with every literal wrapped in a slot
+object that carries its position; the optimized output, with the slots still
+in place, becomes the plan template. Later hits only copy the template with
+the new literals bound into the slots.
+
+A template is stored only when each slot survives exactly once in the output.
+Rewrites that inspect literal values (OR range merges, duplicate IN values,
+etc.) drop or merge slots, and such plans are never cached.
+"""
+import threading
+from collections import OrderedDict
+
+from sql2mongo.schema_loader import schema_hash
+from sql2mongo.schema_catalog import SchemaCatalog
+
+class Slot:
+    """Marker mixin for literal values that remember their token position."""
+    index = None
+
+
+class IntSlot(int, Slot):
+    def __new__(cls, value, index):
+        obj = super().__new__(cls, value)
+        obj.index = index
+        return obj
+
+
+class StrSlot(str, Slot):
+    def __new__(cls, value, index):
+        obj = super().__new__(cls, value)
+        obj.index = index
+        return obj
+
+
+def fingerprint(tokens):
+    """
+    Returns (fingerprint, literals) for a token list. Literals are replaced by
+    typed placeholders, keywords are upper-cased and identifiers and bind
+    placeholders are kept as is.
+    """
+    parts = []
+    literals = []
+    for tok in tokens:
+        if tok.type == "NUMBER":
+            parts.append("?int")
+            literals.append(tok.value)
+        elif tok.type == "STRING":
+            parts.append("?string")
+            literals.append(tok.value)
+        elif tok.type in ("IDENTIFIER", "PLACEHOLDER"):
+            parts.append(tok.value)
+        else:
+            parts.append(tok.type)
+    return " ".join(parts), literals
+
+
+def slot_tokens(tokens):
+    """Wraps literal token values in slots, in place. Returns the tokens."""
+    index = 0
+    for tok in tokens:
+        if tok.type == "NUMBER":
+            tok.value = IntSlot(tok.value, index)
+            index += 1
+        elif tok.type == "STRING":
+            tok.value = StrSlot(tok.value, index)
+            index += 1
+    return tokens
+
+
+def _count_slots(obj, counts):
+    if isinstance(obj, Slot):
+        counts[obj.index] = counts.get(obj.index, 0) + 1
+    elif isinstance(obj, dict):
+        for k, v in obj.items():
+            _count_slots(k, counts)
+            _count_slots(v, counts)
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            _count_slots(item, counts)
+    return counts
+
+
+def _bind(obj, literals):
+    if isinstance(obj, Slot):
+        return literals[obj.index]
+    if isinstance(obj, dict):
+        return {_bind(k, literals): _bind(v, literals) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_bind(item, literals) for item in obj]
+    if isinstance(obj, tuple):
+        return tuple(_bind(item, literals) for item in obj)
+    return obj
+
+
+class PlanCache:
+    """
+    Bounded LRU map of (fingerprint, schema hash) -> plan template.
+    """
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+
+    def key(self, fingerprint, schema):
+        digest = schema.hash if isinstance(schema, SchemaCatalog) else schema_hash(schema)
+        return (fingerprint, digest)
+
+    def get(self, key):
+        with self._lock:
+            template = self._plans.get(key)
+            if template is None:
+                self.misses += 1
+                return None
+            self._plans.move_to_end(key)
+            self.hits += 1
+            return template
+
+    def put(self, key, template, literal_count):
+        """
+        Stores `template` if every one of the `literal_count` slots appears in it
+        exactly once. Returns True when the plan was cached.
+        """
+        counts = _count_slots(template, {})
+        if len(counts) != literal_count or any(n != 1 for n in counts.values()):
+            with self._lock:
+                self.bypasses += 1
+            return False
+        with self._lock:
+            self._plans[key] = template
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.maxsize:
+                self._plans.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def bind(self, template, literals):
+        """Returns a fresh copy of `template` with `literals` substituted into its slots."""
+        return _bind(template, literals)
+
+    def clear(self):
+        with self._lock:
+            self._plans.clear()
+
+    def __len__(self):
+        return len(self._plans)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._plans),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypasses": self.bypasses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,96 @@
+"""
+Prepared statements: SQL with '?' or ':name' placeholders compiled once and
+bound to concrete values many times.
+"""
+from sql2mongo.ast.nodes import SelectQuery, LogicalCondition, Comparison, Parameter
+from sql2mongo.semantic.semantic_analyzer import SemanticAnalyzer, SemanticError
+
+
+def collect_parameters(node, found=None):
+    """Returns every Parameter in the query AST (subqueries included), in source order."""
+    found = [] if found is None else found
+    if isinstance(node, Parameter):
+        found.append(node)
+    elif isinstance(node, SelectQuery):
+        for clause in (node.where, node.having):
+            collect_parameters(clause, found)
+        for join in node.joins:
+            collect_parameters(join.condition, found)
+    elif isinstance(node, LogicalCondition):
+        collect_parameters(node.left, found)
+        collect_parameters(node.right, found)
+    elif isinstance(node, Comparison):
+        collect_parameters(node.value, found)
+    elif isinstance(node, (list, tuple)):
+        for item in node:
+            collect_parameters(item, found)
+    return sorted(found, key=lambda p: p.position)
+
+
+def _bind(obj, values):
+    # `values` maps each Parameter node to its bound value
+    if isinstance(obj, Parameter):
+        return values[obj]
+    if isinstance(obj, dict):
+        return {k: _bind(v, values) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_bind(item, values) for item in obj]
+    if isinstance(obj, tuple):
+        return tuple(_bind(item, values) for item in obj)
+    return obj
+
+
+class CompiledQuery:
+    """
+    A validated, generated and optimized plan whose placeholders are filled in
+    by bind(). Positional statements take a sequence, named ones a mapping.
+    """
+    def __init__(self, sql, template, parameters, analysis, optimizer):
+        self.sql = sql
+        self.template = template
+        self.parameters = parameters
+        self.optimizer = optimizer
+
+        named = {p.name is not None for p in parameters}
+        if len(named) > 1:
+            raise SemanticError("Cannot mix positional '?' and named ':name' placeholders")
+        self.named = named == {True}
+        # Parameter -> (bind key, column, declared type); keys are names or positions
+        self._slots = {}
+        for index, param in enumerate(parameters):
+            column, expected_type = analysis.parameters.get(param, (None, None))
+            key = param.name if self.named else index
+            self._slots[param] = (key, column, expected_type)
+
+    @property
+    def collection(self):
+        return self.template.get("collection")
+
+    @property
+    def param_types(self):
+        """Maps each parameter key (index or name) to its declared column type."""
+        return {key: expected_type for key, _, expected_type in self._slots.values()}
+
+    def _normalize(self, params):
+        if self.named:
+            params = params or {}
+            if not hasattr(params, "keys"):
+                raise SemanticError("Named placeholders require a mapping of parameters")
+            missing = sorted({p.name for p in self.parameters} - set(params))
+            if missing:
+                raise SemanticError(f"Missing value for parameter(s): {', '.join(missing)}")
+            return params
+        params = list(params or ())
+        if len(params) != len(self.parameters):
+            raise SemanticError(
+                f"Expected {len(self.parameters)} parameter(s) but got {len(params)}")
+        return params
+
+    def bind(self, params=None):
+        """Returns a fresh MongoQuery with `params` substituted into the template."""
+        params = self._normalize(params)
+        values = {}
+        for param, (key, column, expected_type) in self._slots.items():
+            SemanticAnalyzer.check_value_type(column, expected_type, params[key])
+            values[param] = params[key]
+        return self.optimizer.canonicalize(_bind(self.template, values))
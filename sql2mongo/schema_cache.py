@@ -0,0 +1,118 @@
+"""
+Bounded cache of parsed schemas for long-running services.
+
+Clients tend to send the same schema with every request. The cache keys each
+schema on a hash of its raw bytes and keeps the validated SchemaCatalog and a
+SemanticAnalyzer for it, so a repeated upload costs one hash instead of a
+json.loads, a validation pass and an index build. The key doubles as a schema
+ID: clients can register a schema once and send only the ID afterwards.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from sql2mongo.schema_loader import SchemaError, parse_schema, validate_schema, schema_hash
+from sql2mongo.schema_catalog import SchemaCatalog
+from sql2mongo.semantic.semantic_analyzer import SemanticAnalyzer
+
+
+def raw_schema_id(raw):
+    """Schema ID for raw JSON bytes or text."""
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()
+
+
+class CachedSchema:
+    """A validated schema with its catalog and analyzer."""
+    def __init__(self, schema_id, schema):
+        self.id = schema_id
+        self.catalog = SchemaCatalog(schema)
+        self.analyzer = SemanticAnalyzer(self.catalog)
+
+
+class SchemaCache:
+    """
+    Bounded LRU map of schema ID -> CachedSchema.
+    """
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self._schemas = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, schema_id):
+        with self._lock:
+            entry = self._schemas.get(schema_id)
+            if entry is None:
+                self.misses += 1
+            else:
+                self._schemas.move_to_end(schema_id)
+                self.hits += 1
+            return entry
+
+    def _store(self, entry):
+        with self._lock:
+            # keep the first entry if another thread parsed the same schema meanwhile
+            entry = self._schemas.setdefault(entry.id, entry)
+            self._schemas.move_to_end(entry.id)
+            while len(self._schemas) > self.maxsize:
+                self._schemas.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def load(self, raw):
+        """Returns the CachedSchema for raw JSON bytes or text, parsing it on a miss."""
+        schema_id = raw_schema_id(raw)
+        entry = self._lookup(schema_id)
+        if entry is None:
+            entry = self._store(CachedSchema(schema_id, parse_schema(raw)))
+        return entry
+
+    def load_dict(self, schema):
+        """Like load(), for a schema that arrived already decoded (e.g. inside a JSON body)."""
+        schema_id = schema_hash(schema)
+        entry = self._lookup(schema_id)
+        if entry is None:
+            entry = self._store(CachedSchema(schema_id, validate_schema(schema)))
+        return entry
+
+    def register(self, raw):
+        """Caches a schema and returns its ID."""
+        return self.load(raw).id
+
+    def get(self, schema_id):
+        """Returns the CachedSchema registered under `schema_id`."""
+        entry = self._lookup(schema_id)
+        if entry is None:
+            raise SchemaError(f"Unknown schema id '{schema_id}'; register the schema again.")
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._schemas.clear()
+
+    def __len__(self):
+        return len(self._schemas)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._schemas),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_default_cache = None
+
+def get_schema_cache():
+    """Returns the process-wide SchemaCache, building it on first use."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = SchemaCache()
+    return _default_cache
@@ -0,0 +1,104 @@
+from collections.abc import Mapping
+
+from sql2mongo.schema_loader import STATS_KEY, schema_hash
+
+
+class SchemaCatalog(Mapping):
+    """
+    Read-only, precomputed view of a schema dict.
+
+    Built once per schema, it keeps a per-table column type map, a
+    column -> tables inverted index and a stable content hash, so resolving an
+    unqualified column never scans the tables of the schema. It is a Mapping of
+    table -> {column: type}, so it can be used wherever a schema dict is read.
+
+    Planner statistics come from the schema's "$stats" entry or `stats`
+    (e.g. from collect_stats); they are part of the hash, since plans depend
+    on them.
+    """
+    def __init__(self, schema, stats=None):
+        self.stats = {table: dict(s) for table, s in schema.get(STATS_KEY, {}).items()}
+        for table, table_stats in (stats or {}).items():
+            self.stats.setdefault(table, {}).update(table_stats)
+        self.tables = {table: dict(columns) for table, columns in schema.items() if table != STATS_KEY}
+        index = {}
+        for table, columns in self.tables.items():
+            for column in columns:
+                index.setdefault(column, []).append(table)
+        self.column_tables = {column: tuple(tables) for column, tables in index.items()}
+        self.hash = schema_hash(dict(self.tables, **{STATS_KEY: self.stats}) if self.stats else self.tables)
+
+    @classmethod
+    def of(cls, schema):
+        """Returns `schema` if it already is a catalog, else builds one."""
+        return schema if isinstance(schema, cls) else cls(schema)
+
+    def __getitem__(self, table):
+        return self.tables[table]
+
+    def __contains__(self, table):
+        return table in self.tables
+
+    def __iter__(self):
+        return iter(self.tables)
+
+    def __len__(self):
+        return len(self.tables)
+
+    def __eq__(self, other):
+        if isinstance(other, SchemaCatalog):
+            return self.hash == other.hash
+        return Mapping.__eq__(self, other)
+
+    def __hash__(self):
+        return hash(self.hash)
+
+    def column_type(self, table, column):
+        """Declared type of table.column, or None if either does not exist."""
+        columns = self.tables.get(table)
+        return None if columns is None else columns.get(column)
+
+    def with_stats(self, stats):
+        """A catalog of the same tables with `stats` merged over the current statistics."""
+        return SchemaCatalog(dict(self.tables, **{STATS_KEY: self.stats}), stats)
+
+    def rows(self, table):
+        """Estimated document count of `table`, or None if unknown."""
+        return self.stats.get(table, {}).get("rows")
+
+    def selectivity(self, table, column):
+        """Estimated share of `table` kept by a filter on `column`, or None if unknown."""
+        return self.stats.get(table, {}).get("selectivity", {}).get(column)
+
+    def cardinality(self, table, column):
+        """Estimated number of distinct values of `column`, or None if unknown."""
+        return self.stats.get(table, {}).get("distinct", {}).get(column)
+
+    def indexes(self, table):
+        """Key columns of each index on `table`, e.g. [["_id"], ["city", "age"]]."""
+        return self.stats.get(table, {}).get("indexes", [])
+
+    def tables_with(self, column):
+        """Every table that has `column`, in schema order."""
+        return self.column_tables.get(column, ())
+
+    def resolve(self, column, tables):
+        """Returns the tables among `tables` that have `column`."""
+        candidates = self.column_tables.get(column, ())
+        if len(candidates) <= len(tables):
+            return [t for t in candidates if t in tables]
+        return [t for t in tables if column in self.tables.get(t, ())]
+
+
+def collect_stats(db, tables):
+    """
+    Row counts and index keys for `tables` read from a live database (a
+    pymongo Database or anything with the same collection API), in the
+    "$stats" format.
+    """
+    stats = {}
+    for table in tables:
+        collection = db[table]
+        indexes = [[field for field, _ in info["key"]] for info in collection.index_information().values()]
+        stats[table] = {"rows": collection.estimated_document_count(), "indexes": indexes}
+    return stats
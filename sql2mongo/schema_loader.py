@@ -1,9 +1,13 @@
+import hashlib
 import json
 import os
 
 class SchemaError(Exception):
     pass
 
+# reserved top-level key for planner statistics; MongoDB collection names can't contain '$'
+STATS_KEY = "$stats"
+
 def load_schema(file_path):
     """
     Loads and validates a schema from a JSON file.
@@ -27,11 +31,39 @@ def load_schema(file_path):
         raise SchemaError("Invalid JSON format.")
     except Exception as e:
         raise SchemaError(f"Error reading file: {e}")
-        
+
+    return validate_schema(schema)
+
+
+def parse_schema(raw):
+    """
+    Parses and validates a schema from raw JSON bytes or text.
+
+    Raises:
+        SchemaError: If the JSON is invalid or has an invalid structure.
+    """
+    try:
+        schema = json.loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise SchemaError("Invalid JSON format.")
+    return validate_schema(schema)
+
+
+def validate_schema(schema):
+    """
+    Checks the table -> {column: type} structure of a schema dict and returns it.
+    An optional "$stats" entry holds planner statistics (see validate_stats).
+
+    Raises:
+        SchemaError: If the structure or a column type is invalid.
+    """
     if not isinstance(schema, dict):
         raise SchemaError("Invalid schema structure. Top level must be a dictionary.")
         
     for table, columns in schema.items():
+        if table == STATS_KEY:
+            validate_stats(columns)
+            continue
         if not isinstance(columns, dict):
             raise SchemaError(f"Invalid schema structure. Table '{table}' must map to a dictionary of columns.")
         for col, type_ in columns.items():
@@ -39,3 +71,51 @@ def load_schema(file_path):
                 raise SchemaError(f"Invalid column type '{type_}' for column '{col}' in table '{table}'. Supported types: 'int', 'string'.")
     
     return schema
+
+
+def validate_stats(stats):
+    """
+    Checks planner statistics:
+    table -> {"rows": int, "selectivity": {column: fraction}, "distinct": {column: int},
+              "indexes": [[column, ...], ...]}.
+    "rows" estimates the collection size, each selectivity the share of its
+    documents a filter on that column keeps, each "distinct" entry the
+    number of distinct values in that column and "indexes" the key columns
+    of each index; all are optional per table.
+
+    Raises:
+        SchemaError: If the structure or a value is invalid.
+    """
+    if not isinstance(stats, dict):
+        raise SchemaError(f"Invalid schema structure. '{STATS_KEY}' must map tables to statistics.")
+    for table, table_stats in stats.items():
+        if not isinstance(table_stats, dict):
+            raise SchemaError(f"Invalid statistics for table '{table}'. Expected a dictionary.")
+        rows = table_stats.get("rows")
+        if rows is not None and (not isinstance(rows, int) or isinstance(rows, bool) or rows < 0):
+            raise SchemaError(f"Invalid row count for table '{table}'. Expected a non-negative integer.")
+        selectivity = table_stats.get("selectivity", {})
+        if not isinstance(selectivity, dict):
+            raise SchemaError(f"Invalid selectivity for table '{table}'. Expected a dictionary.")
+        for col, fraction in selectivity.items():
+            if not isinstance(fraction, (int, float)) or isinstance(fraction, bool) or not 0 < fraction <= 1:
+                raise SchemaError(f"Invalid selectivity for column '{col}' in table '{table}'. Expected a fraction in (0, 1].")
+        distinct = table_stats.get("distinct", {})
+        if not isinstance(distinct, dict):
+            raise SchemaError(f"Invalid distinct counts for table '{table}'. Expected a dictionary.")
+        for col, count in distinct.items():
+            if not isinstance(count, int) or isinstance(count, bool) or count < 0:
+                raise SchemaError(f"Invalid distinct count for column '{col}' in table '{table}'. Expected a non-negative integer.")
+        indexes = table_stats.get("indexes", [])
+        if not isinstance(indexes, list) or not all(
+                isinstance(keys, list) and keys and all(isinstance(k, str) for k in keys) for keys in indexes):
+            raise SchemaError(f"Invalid indexes for table '{table}'. Expected a list of column lists.")
+    return stats
+
+
+def schema_hash(schema):
+    """
+    Stable content hash of a schema dict, independent of key order.
+    """
+    canonical = json.dumps(schema, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
@@ -1,76 +1,99 @@
-from sql2mongo.ast.nodes import SelectQuery, LogicalCondition, Comparison,Aggregate
+from sql2mongo.ast.nodes import SelectQuery, LogicalCondition, Comparison,Aggregate,Parameter,ColumnRef
+from sql2mongo.schema_catalog import SchemaCatalog
 
 class SemanticError(Exception):
     pass
 
+class AnalysisContext:
+    """
+    Per-query results of semantic analysis. The analyzer keeps them here instead
+    of on the AST, so a shared analyzer (and shared ASTs) stay safe across threads.
+
+    `bound` is the query with every column resolved in the same walk that
+    validates it: each ColumnRef carries its table and type, subqueries are
+    bound too, and the code generator consumes this tree as is.
+    """
+    def __init__(self, parameters=None, catalog=None):
+        self.catalog = catalog        # SchemaCatalog the query was validated against
+        self.bound = None             # resolved SelectQuery
+        self.has_in_subquery = False  # WHERE contains IN (SELECT ...)
+        self.join = None              # implicit-join condition, see extract_join_condition
+        self.join_condition = None    # the implicit-join Comparison itself (bound)
+        self.filter_condition = None  # WHERE minus the implicit-join condition (bound)
+        self.resolved_columns = []    # [{"table": ..., "column": ...}] for the SELECT list
+        self.parameters = {} if parameters is None else parameters  # Parameter -> (column, type)
+
+    def subquery(self):
+        # subqueries get their own join/column state but share placeholder types
+        return AnalysisContext(parameters=self.parameters, catalog=self.catalog)
+
 class SemanticAnalyzer:
     def __init__(self, schema):
-        self.schema = schema
+        # table/column lookups go through the catalog's precomputed indexes
+        self.schema = SchemaCatalog.of(schema)
 
-    def validate_query(self, ast):
+    def validate_query(self, ast, ctx=None):
+        """Validates `ast` against the schema and returns its AnalysisContext."""
+        ctx = AnalysisContext(catalog=self.schema) if ctx is None else ctx
+        if ctx.catalog is None:
+            ctx.catalog = self.schema
         if isinstance(ast, SelectQuery):
-            self.validate_select(ast)
+            self.validate_select(ast, ctx)
         else:
             raise SemanticError(f"Unsupported query type: {type(ast)}")
+        return ctx
 
-    def validate_select(self, node: SelectQuery):
-        # 1. Validate Table Exists
-        #tables = node.table if isinstance(node.table, list) else [node.table]
-        if isinstance(node.table, list):
-            tables = node.table.copy()
-        else:
-            tables = [node.table]
-        # add explicit join tables
-        if hasattr(node, "joins") and node.joins:
-            for join in node.joins:
-                tables.append(join["table"])
-        # print("tables:",tables)
-        if len(tables) > 2:
-            raise SemanticError("Only 2-table JOIN supported currently")
+    def validate_select(self, node: SelectQuery, ctx=None):
+        ctx = AnalysisContext(catalog=self.schema) if ctx is None else ctx
+        # 1. Validate Table Exists (FROM list plus explicit join tables)
+        tables = list(node.tables)
+        if isinstance(node.table, tuple) and len(node.table) > 2:
+            raise SemanticError("Only 2-table implicit JOIN supported; use JOIN ... ON for more tables")
         for t in tables:
             if t not in self.schema:
                 raise SemanticError(f"Table '{t}' does not exist")
+        if len(set(tables)) != len(tables):
+            raise SemanticError("Each table can appear only once in a query")
         # pick primary table (for Mongo base collection)
         table_name = tables[0]
         if table_name not in self.schema:
             raise SemanticError(f"Table '{table_name}' does not exist")
 
         # 2. Validate Columns
-        self.validate_columns(node.columns, table_name,node)
+        columns = self.validate_columns(node.columns, table_name,node, ctx)
 
         # 3. Validate WHERE Clause
-        #tables = node.table if isinstance(node.table, list) else [node.table]
-        if isinstance(node.table, list):
-            tables = node.table.copy()
-        else:
-            tables = [node.table]
-
-        if hasattr(node, "joins") and node.joins:
-            for join in node.joins:
-                tables.append(join["table"])
-                self.validate_condition(join["condition"], tables)
-        if isinstance(node.table, list) and len(node.table) == 2:
+        joins = []
+        for i, join in enumerate(node.joins):
+            # an ON condition sees the FROM table and the tables joined so far
+            visible = tables[:i + 2]
+            condition = self.validate_condition(join.condition, visible, ctx)
+            self._check_join_condition(condition, join.table, visible[:-1])
+            joins.append(join.replace(condition=condition))
+        joins = tuple(joins)
+        if isinstance(node.table, tuple) and len(node.table) == 2:
             if not node.where:
                 raise SemanticError("JOIN condition required for multiple tables")
+        where = None
         if node.where:
-            self.validate_condition(node.where, tables)
-        node.join = None
-        node.filter_condition=None
-        if isinstance(node.table, list):
+            where = self.validate_condition(node.where, tables, ctx, clause="WHERE")
+        if isinstance(node.table, tuple):
             if len(node.table)==2:
-                join_cond, filter_cond = self.split_join_and_filter(node.where)
+                join_cond, filter_cond = self.split_join_and_filter(where)
                 if not join_cond:
                     raise SemanticError("JOIN condition not found in WHERE clause")
-                node.join = self.extract_join_condition(join_cond)
-                node.filter_condition=filter_cond
-            elif len(node.table) > 2:
-                raise SemanticError("Only 2-table JOIN supported currently")
+                ctx.join = self.extract_join_condition(join_cond)
+                ctx.join_condition = join_cond
+                ctx.filter_condition=filter_cond
+        if node.distinct:
+            self._check_distinct(node)
         # HAVING requires GROUP BY
         if node.having and not node.group_by:
             raise SemanticError("HAVING clause requires GROUP BY")
         # Validate HAVING condition
+        having = None
         if node.having:
-            self.validate_condition(node.having, tables)
+            having = self.validate_condition(node.having, tables, ctx)
         # 4. Validate GROUP BY
         if node.group_by:
             table_schema = self.schema[table_name]
@@ -80,74 +103,75 @@ class SemanticAnalyzer:
                     raise SemanticError(f"Column '{col}' does not exist in table '{table_name}'")
             # validate SELECT columns follow SQL rules
             for col in node.columns:
-                col_name = col.get("column") if isinstance(col, dict) else col
+                col_name = col.column if isinstance(col, ColumnRef) else col
                 if isinstance(col_name, str):
                     if col_name not in node.group_by:
                         raise SemanticError(
                                 f"Column '{col_name}' must appear in GROUP BY or be aggregated")
+        order_by = tuple(self._bind_order_item(item, tables) for item in node.order_by)
+        ctx.bound = node.replace(columns=columns, joins=joins, where=where, having=having, order_by=order_by)
+        return ctx.bound
+
+    def _bind_order_item(self, item, tables):
+        """
+        ORDER BY item with its column bound to the table that has it; the FROM
+        table wins when several do. Names no table has (output names such as
+        `count`) are left as written.
+        """
+        ref = ColumnRef.of(item.column)
+        candidates = [ref.table] if ref.table is not None else self.schema.resolve(ref.column, tables)
+        if not candidates:
+            return item
+        if tables[0] in candidates:
+            table = tables[0]
+        elif len(candidates) == 1:
+            table = candidates[0]
+        else:
+            raise SemanticError(f"Ambiguous ORDER BY column '{ref.column}'")
+        column_type = self.schema.column_type(table, ref.column)
+        if column_type is None:
+            raise SemanticError(f"Column '{ref.column}' does not exist in table '{table}'")
+        return item.replace(column=ColumnRef(table, ref.column, column_type))
+
+    def _check_distinct(self, node):
+        if node.columns == ('*',):
+            raise SemanticError("SELECT DISTINCT requires a column list")
+        if node.group_by or any(isinstance(col, Aggregate) for col in node.columns):
+            raise SemanticError("SELECT DISTINCT cannot be combined with GROUP BY or aggregates")
+        if len(node.tables) > 1:
+            raise SemanticError("SELECT DISTINCT is only supported on single-table queries")
+        selected = {ColumnRef.of(col).column for col in node.columns}
+        for item in node.order_by:
+            if ColumnRef.of(item.column).column not in selected:
+                raise SemanticError(f"ORDER BY column '{item.column}' must appear in the SELECT DISTINCT list")
 
-    def validate_columns(self, columns, table_name,node):
+    def validate_columns(self, columns, table_name,node, ctx=None):
+        """Validates the SELECT list and returns it with every column bound."""
+        ctx = AnalysisContext(catalog=self.schema) if ctx is None else ctx
         table_schema = self.schema[table_name]
         
         # Handle 'SELECT *'
-        if columns == ['*']:
-            return
+        if columns == ('*',):
+            return columns
 
 
         # Check for duplicates
         seen = set()
+        bound = []
+        tables = node.tables
         for col in columns:
             # --- NORMALIZE ---
-            if isinstance(col, dict):
-                column_name = col.get("column")
-                table = col.get("table")
-                # FIX: resolve missing table
-                if table is None or "." not in col:
-                    matches = []
-                    #tables = node.table if isinstance(node.table, list) else [node.table]
-                    # include joins here also
-                    if isinstance(node.table, list):
-                        tables = node.table.copy()
-                    else:
-                        tables = [node.table]
-                    if hasattr(node, "joins") and node.joins:
-                        for join in node.joins:
-                            tables.append(join["table"])
-                    for t in tables:
-                        if column_name in self.schema[t]:
-                            matches.append(t)
-                    if len(matches) == 0:
-                        raise SemanticError(f"Column '{column_name}' not found in any table")
-                    if len(matches) > 1:
-                        raise SemanticError(f"Ambiguous column '{column_name}', specify table")
-                    table = matches[0]
-            elif isinstance(col, str):
-                if "." in col:
-                    table, column_name = col.split(".")
-                else:
-                    column_name = col
-                    # search across all tables
-                    matches = []
-                    #tables = node.table if isinstance(node.table, list) else [node.table]
-                    # include joins here also
-                    if isinstance(node.table, list):
-                        tables = node.table.copy()
-                    else:
-                        tables = [node.table]
-                    if hasattr(node, "joins") and node.joins:
-                        for join in node.joins:
-                            tables.append(join["table"])
-                    for t in tables:
-                        if column_name in self.schema[t]:
-                            matches.append(t)
-                    if len(matches) == 0:
-                        raise SemanticError(f"Column '{column_name}' not found in any table")
-                    if len(matches) > 1:
-                        raise SemanticError(f"Ambiguous column '{column_name}', specify table")
-
-                    table = matches[0]
+            if isinstance(col, (ColumnRef, str)):
+                ref = ColumnRef.of(col)
+                column_name = ref.column
+                table = ref.table
+                if table is None:
+                    table = self._resolve_table(column_name, tables,
+                                                f"Column '{column_name}' not found in any table",
+                                                f"Ambiguous column '{column_name}', specify table")
             elif isinstance(col, Aggregate):
                 if col.func == "COUNT" and col.column == "*":
+                    bound.append(col)
                     continue
                 if "." in col.column:
                     table, column_name = col.column.split(".")
@@ -158,16 +182,14 @@ class SemanticAnalyzer:
                 raise SemanticError(f"Invalid column type: {col}")
             # --- DUPLICATE CHECK ---
             if isinstance(col, Aggregate):
-                key = f"agg_{col.func}_{table}.{column_name}"
+                key = f"agg_{col.func}{'_DISTINCT' if col.distinct else ''}_{table}.{column_name}"
             else:
                 key = f"{table}.{column_name}"
             if key in seen:
                 raise SemanticError(f"Duplicate column '{column_name}' in SELECT list")
             seen.add(key)
             # ✅ STORE RESOLVED COLUMN (ADD THIS BLOCK)
-            if not hasattr(node, "resolved_columns"):
-                node.resolved_columns = []
-            node.resolved_columns.append({
+            ctx.resolved_columns.append({
                 "table": table,
                 "column": column_name
                 })
@@ -181,26 +203,20 @@ class SemanticAnalyzer:
                 raise SemanticError(
                         f"Column '{column_name}' does not exist in table '{table}'"
                 )
+            if isinstance(col, Aggregate):
+                bound.append(col)
+            else:
+                bound.append(ColumnRef(table, column_name, table_schema[column_name]))
+        return tuple(bound)
     def extract_join_condition(self, condition):
         if isinstance(condition, Comparison):
             left = condition.identifier
             right = condition.value
-            # --- normalize left ---
-            if isinstance(left, dict):
-                left_table = left.get("table")
-                left_col = left.get("column")
-            elif isinstance(left, str) and "." in left:
-                left_table, left_col = left.split(".")
-            else:
-                return None
-            # --- normalize right ---
-            if isinstance(right, dict):
-                right_table = right.get("table")
-                right_col = right.get("column")
-            elif isinstance(right, str) and "." in right:
-                right_table, right_col = right.split(".")
-            else:
+            if not (self._is_qualified(left) and self._is_qualified(right)):
                 return None
+            left, right = ColumnRef.of(left), ColumnRef.of(right)
+            left_table, left_col = left.table, left.column
+            right_table, right_col = right.table, right.column
             return {
                     "left_table": left_table,
                     "left_col": left_col,
@@ -241,55 +257,36 @@ class SemanticAnalyzer:
             else:
                 return None, condition
         return None, None
-    def validate_condition(self, node, tables):
+    def validate_condition(self, node, tables, ctx=None, clause=None):
+        """Validates a WHERE/HAVING/ON condition and returns it bound."""
+        ctx = AnalysisContext(catalog=self.schema) if ctx is None else ctx
         if isinstance(node, LogicalCondition):
-            self.validate_condition(node.left, tables)
-            self.validate_condition(node.right, tables)
+            left = self.validate_condition(node.left, tables, ctx, clause)
+            right = self.validate_condition(node.right, tables, ctx, clause)
+            return node.replace(left=left, right=right)
         elif isinstance(node, Comparison):
-            self.validate_comparison(node, tables)
+            return self.validate_comparison(node, tables, ctx, clause)
+        return node
 
-    def validate_comparison(self, node: Comparison, tables):
-        tables = tables if isinstance(tables, list) else [tables]
+    def validate_comparison(self, node: Comparison, tables, ctx=None, clause=None):
+        """Validates one comparison and returns it with its column(s) bound."""
+        ctx = AnalysisContext(catalog=self.schema) if ctx is None else ctx
+        tables = tables if isinstance(tables, (list, tuple)) else [tables]
         if node.operator == "IN_SUBQUERY":
+            if clause == "WHERE":
+                ctx.has_in_subquery = True
             # validate subquery recursively
-            self.validate_query(node.value)
-            return
-        if ((isinstance(node.identifier, dict) or (isinstance(node.identifier, str) and "." in node.identifier))and(isinstance(node.value, dict) or (isinstance(node.value, str) and "." in node.value))):
-            left = node.identifier
-            right = node.value
-            # normalize left
-            if isinstance(left, dict):
-                left_table = left.get("table")
-                left_col = left.get("column")
-            elif isinstance(left, str):
-                if "." in left:
-                    left_table, left_col = left.split(".")
-                else:
-                    # infer from available tables
-                    matches = [t for t in tables if left in self.schema[t]]
-                    if len(matches) == 1:
-                        left_table = matches[0]
-                        left_col = left
-                    else:
-                        raise SemanticError(f"Ambiguous or unknown column '{left}'")
-            else:
-                raise SemanticError(f"Invalid JOIN condition identifier: {left}")
-            # normalize right
-            if isinstance(right, dict):
-                right_table = right.get("table")
-                right_col = right.get("column")
-            elif isinstance(right, str):
-                if "." in right:
-                    right_table, right_col = right.split(".")
-                else:
-                    matches = [t for t in tables if right in self.schema[t]]
-                    if len(matches) == 1:
-                        right_table = matches[0]
-                        right_col = right
-                    else:
-                        raise SemanticError(f"Ambiguous or unknown column '{right}'")
-            else:
-                raise SemanticError(f"Invalid JOIN condition value: {right}")
+            subquery = self.validate_query(node.value, ctx.subquery()).bound
+            return node.replace(identifier=self._bind_column(node.identifier, tables), value=subquery)
+        if self._is_qualified(node.identifier) and self._is_qualified(node.value):
+            left = ColumnRef.of(node.identifier)
+            right = ColumnRef.of(node.value)
+            left_table, left_col = left.table, left.column
+            right_table, right_col = right.table, right.column
+            if left_table is None:
+                left_table = self._resolve_table(left_col, tables, f"Ambiguous or unknown column '{left_col}'")
+            if right_table is None:
+                right_table = self._resolve_table(right_col, tables, f"Ambiguous or unknown column '{right_col}'")
             # validate tables
             if left_table not in self.schema:
                 raise SemanticError(f"Table '{left_table}' does not exist")
@@ -301,7 +298,7 @@ class SemanticAnalyzer:
             if right_col not in self.schema[right_table]:
                 raise SemanticError(f"Column '{right_col}' does not exist in table '{right_table}'")
             # type match
-            if self.schema[left_table][left_col] != self.schema[right_table][right_col]:
+            if self.schema.column_type(left_table, left_col) != self.schema.column_type(right_table, right_col):
                 raise SemanticError("Type mismatch in JOIN")
             if left_col != right_col:
                 if not (
@@ -310,11 +307,14 @@ class SemanticAnalyzer:
                         ):
                     raise SemanticError(f"Invalid JOIN condition: '{left_table}.{left_col}' and '{right_table}.{right_col}' are not related"
                                         )
-            return
+            return node.replace(
+                identifier=ColumnRef(left_table, left_col, self.schema.column_type(left_table, left_col)),
+                value=ColumnRef(right_table, right_col, self.schema.column_type(right_table, right_col)))
         identifier = node.identifier
-        if isinstance(identifier, dict):
-            col_name = identifier.get("column")
-            col_table = identifier.get("table")
+        if isinstance(identifier, (ColumnRef, str)):
+            identifier = ColumnRef.of(identifier)
+            col_name = identifier.column
+            col_table = identifier.table
         else:
             col_name = identifier
             col_table = None
@@ -322,9 +322,11 @@ class SemanticAnalyzer:
         #if identifier is aggregate
         if isinstance(col_name, Aggregate):
             # Just validate literal type
+            if self._defer_to_bind(node.value, col_name, None, ctx):
+                return node
             if not isinstance(node.value, (int, str)):
                 raise SemanticError("Invalid HAVING condition value")
-            return
+            return node
 
         # resolve correct table
         if col_table:
@@ -333,45 +335,95 @@ class SemanticAnalyzer:
             if col_name not in self.schema[col_table]:
                 raise SemanticError(f"Column '{col_name}' not in table '{col_table}'")
             expected_type = self.schema[col_table][col_name]
+            table = col_table
         else:
             # search across all tables
-            found = False
-            matches = []
-            for t in tables:
-                if col_name in self.schema[t]:
-                    matches.append(t)
-            if len(matches) == 0:
-                raise SemanticError(f"Column '{col_name}' not found")
-            if len(matches) > 1:
-                raise SemanticError(f"Ambiguous column '{col_name}'")
-            expected_type = self.schema[matches[0]][col_name]
+            table = self._resolve_table(col_name, tables, f"Column '{col_name}' not found",
+                                        f"Ambiguous column '{col_name}'")
+            expected_type = self.schema[table][col_name]
 
         actual_value = node.value
+        bound = node.replace(identifier=ColumnRef(table, col_name, expected_type))
 
         # ----- BETWEEN -----
         if node.operator == "BETWEEN":
             if not isinstance(actual_value, tuple) or len(actual_value) != 2:
                 raise SemanticError("Invalid BETWEEN syntax")
-            lower, upper = actual_value
+            bounds = [v for v in actual_value
+                      if not self._defer_to_bind(v, col_name, expected_type, ctx)]
             if expected_type == 'int':
-                if not isinstance(lower, int) or not isinstance(upper, int):
+                if any(not isinstance(v, int) for v in bounds):
                     raise SemanticError(f"Type mismatch for column '{col_name}'. Expected int.")
             elif expected_type == 'string':
-                if not isinstance(lower, str) or not isinstance(upper, str):
+                if any(not isinstance(v, str) for v in bounds):
                     raise SemanticError(
                             f"Type mismatch for column '{col_name}'. Expected string.")
-            return
+            return bound
         # ----- IN -----
         if node.operator == "IN":
-            if not isinstance(actual_value, list):
+            if not isinstance(actual_value, tuple):
                 raise SemanticError("Invalid IN syntax")
             for val in actual_value:
+                if self._defer_to_bind(val, col_name, expected_type, ctx):
+                    continue
                 if expected_type == 'int' and not isinstance(val, int):
                     raise SemanticError(f"Type mismatch for column '{col_name}'. Expected int.")
                 if expected_type == 'string' and not isinstance(val, str):
                     raise SemanticError(f"Type mismatch for column '{col_name}'. Expected string.")
-            return
+            return bound
 
+        if not self._defer_to_bind(actual_value, col_name, expected_type, ctx):
+            self.check_value_type(col_name, expected_type, actual_value)
+        return bound
+
+    @staticmethod
+    def _check_join_condition(condition, table, earlier):
+        # JOIN ... ON must equate a column of the joined table with one of an earlier table
+        if (isinstance(condition, Comparison) and condition.operator == "="
+                and isinstance(condition.identifier, ColumnRef) and isinstance(condition.value, ColumnRef)):
+            sides = (condition.identifier.table, condition.value.table)
+            if table in sides:
+                other = sides[1] if sides[0] == table else sides[0]
+                if other in earlier:
+                    return
+        raise SemanticError(
+            f"JOIN condition for '{table}' must equate one of its columns with a column of an earlier table")
+
+    @staticmethod
+    def _is_qualified(value):
+        # a table.column reference, as opposed to a bare column name or literal
+        return isinstance(value, ColumnRef) or (isinstance(value, str) and "." in value)
+
+    def _bind_column(self, identifier, tables):
+        """Resolves a column reference against `tables` and returns it bound."""
+        ref = ColumnRef.of(identifier)
+        table = ref.table
+        if table is None:
+            table = self._resolve_table(ref.column, tables, f"Column '{ref.column}' not found",
+                                        f"Ambiguous column '{ref.column}'")
+        column_type = self.schema.column_type(table, ref.column)
+        if column_type is None:
+            raise SemanticError(f"Column '{ref.column}' not in table '{table}'")
+        return ColumnRef(table, ref.column, column_type)
+
+    def _resolve_table(self, column, tables, missing_msg, ambiguous_msg=None):
+        """Returns the single table among `tables` that has `column`."""
+        matches = self.schema.resolve(column, tables)
+        if len(matches) == 1:
+            return matches[0]
+        if matches and ambiguous_msg:
+            raise SemanticError(ambiguous_msg)
+        raise SemanticError(missing_msg)
+
+    def _defer_to_bind(self, value, col_name, expected_type, ctx):
+        # Placeholders are checked against the column type when bound
+        if isinstance(value, Parameter):
+            ctx.parameters[value] = (col_name, expected_type)
+            return True
+        return False
+
+    @staticmethod
+    def check_value_type(col_name, expected_type, actual_value):
         # Determine actual type
         if isinstance(actual_value, int):
             actual_type = 'int'
@@ -380,6 +432,12 @@ class SemanticAnalyzer:
         else:
             actual_type = 'unknown'
 
+        if expected_type is None:
+            # aggregate comparison (HAVING): any literal type is accepted
+            if actual_type == 'unknown':
+                raise SemanticError("Invalid HAVING condition value")
+            return
+
         if expected_type != actual_type:
             raise SemanticError(
                 f"Type mismatch for column '{col_name}'. Expected {expected_type} but got {actual_type}."
@@ -0,0 +1,104 @@
+import threading
+
+from sql2mongo.parser.parser_pool import ParserPool
+from sql2mongo.semantic.semantic_analyzer import SemanticAnalyzer
+from sql2mongo.codegen.mongodb_generator import MongoDBGenerator
+from sql2mongo.codegen.optimizer import MongoOptimizer
+from sql2mongo.codegen.keyset import page_after
+from sql2mongo.cli import preprocess_sql
+from sql2mongo.plan_cache import PlanCache, fingerprint, slot_tokens
+from sql2mongo.prepared import CompiledQuery, collect_parameters
+
+
+class Transpiler:
+    """
+    Long-lived lex -> parse -> analyze -> generate -> optimize pipeline.
+
+    The lexer, LALR parser, generator and optimizer are built once and reused
+    for every query, so callers only pay for the parse itself. Plans are cached
+    per literal-agnostic fingerprint (see plan_cache); pass plan_cache_size=0
+    to disable the cache.
+
+    Parsers come from a ParserPool of `pool_size` instances, which makes one
+    Transpiler safe to share between request threads.
+    """
+    def __init__(self, parser=None, generator=None, optimizer=None, plan_cache_size=1024, pool_size=4):
+        self.parser = parser or ParserPool(size=pool_size)
+        self.generator = generator or MongoDBGenerator()
+        self.optimizer = optimizer or MongoOptimizer()
+        self.plan_cache = PlanCache(plan_cache_size) if plan_cache_size else None
+
+    def analyzer(self, schema):
+        return SemanticAnalyzer(schema)
+
+    def _compile(self, ast, analyzer):
+        analysis = analyzer.validate_query(ast)
+        mongo_data = self.generator.generate(ast, analysis)
+        return self.optimizer.optimize(mongo_data), analysis
+
+    def translate(self, sql, schema, analyzer=None):
+        """Transpiles a single SQL statement and returns the optimized mongo_data dict."""
+        analyzer = analyzer or self.analyzer(schema)
+        if self.plan_cache is None:
+            return self._compile(self.parser.parse(sql), analyzer)[0]
+
+        tokens = self.parser.tokenize(sql)
+        shape, literals = fingerprint(tokens)
+        key = self.plan_cache.key(shape, analyzer.schema)
+        template = self.plan_cache.get(key)
+        if template is None:
+            ast = self.parser.parse_tokens(slot_tokens(tokens))
+            template = self._compile(ast, analyzer)[0]
+            self.plan_cache.put(key, template, len(literals))
+        return self.optimizer.canonicalize(self.plan_cache.bind(template, literals))
+
+    def paginate(self, sql, schema, after=None, analyzer=None):
+        """
+        Translates a find query for keyset pagination (see codegen/keyset.py):
+        pass the last document of the previous page as `after`, or None for the
+        first page. The plan itself still comes from the cache.
+        """
+        return page_after(self.translate(sql, schema, analyzer), after)
+
+    def compile(self, sql, schema):
+        """
+        Compiles a statement with '?' or ':name' placeholders into a CompiledQuery
+        whose bind(params) only substitutes values into the prepared plan.
+        """
+        ast = self.parser.parse(sql)
+        template, analysis = self._compile(ast, self.analyzer(schema))
+        return CompiledQuery(sql, template, collect_parameters(ast), analysis, self.optimizer)
+
+    def transpile(self, schema, query, analyzer=None):
+        """
+        Transpiles every statement in `query` and returns the mongosh strings,
+        with "Error: ..." entries for statements that failed.
+        """
+        analyzer = analyzer or self.analyzer(schema)
+        results = []
+        for q in preprocess_sql(query):
+            try:
+                optimized_data = self.translate(q, schema, analyzer)
+                results.append(optimized_data.get("string", ""))
+            except Exception as e:
+                results.append(f"Error: {str(e)}")
+        return results
+
+
+_default_transpiler = None
+_default_lock = threading.Lock()
+
+def get_transpiler():
+    """Returns the process-wide Transpiler, building it on first use."""
+    global _default_transpiler
+    if _default_transpiler is None:
+        # concurrent first calls must share one plan cache and parser pool
+        with _default_lock:
+            if _default_transpiler is None:
+                _default_transpiler = Transpiler()
+    return _default_transpiler
+
+
+def compile_query(sql, schema):
+    """Prepares `sql` against `schema` with the process-wide Transpiler."""
+    return get_transpiler().compile(sql, schema)
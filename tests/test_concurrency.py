@@ -0,0 +1,83 @@
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from sql2mongo.parser.sql_parser import get_parser
+from sql2mongo.semantic.semantic_analyzer import SemanticAnalyzer
+from sql2mongo.codegen.mongodb_generator import MongoDBGenerator
+from sql2mongo.codegen.optimizer import MongoOptimizer
+import sql2mongo.transpiler as transpiler_module
+
+SCHEMA = {
+    "users": {
+        "id": "int",
+        "name": "string",
+        "age": "int",
+        "city": "string"
+    },
+    "orders": {
+        "order_id": "int",
+        "user_id": "int",
+        "amount": "int"
+    }
+}
+
+QUERIES = [
+    "SELECT * FROM users WHERE age > 30;",
+    "SELECT name, city FROM users WHERE city = 'Delhi' AND age <= 40 ORDER BY age DESC LIMIT 3;",
+    "SELECT * FROM users WHERE city IN ('Pune', 'Agra', 'Delhi');",
+    "SELECT * FROM users WHERE age = 20 OR age = 27 OR age = 22;",
+    "SELECT city, COUNT(*) FROM users WHERE age > 5 GROUP BY city HAVING COUNT(*) > 2 ORDER BY COUNT(*) DESC;",
+    "SELECT users.name, orders.amount FROM users JOIN orders ON users.id = orders.user_id WHERE users.age > 20;",
+    "SELECT orders.amount FROM orders JOIN users ON orders.user_id = users.id WHERE orders.amount > 100;",
+    "SELECT users.name, orders.amount FROM users, orders WHERE users.id = orders.user_id AND orders.amount > 5;",
+    "SELECT * FROM users WHERE id IN (SELECT user_id FROM orders);",
+]
+
+def test_shared_pipeline_matches_serial_output():
+    # One analyzer/generator/optimizer and one set of ASTs shared by every thread
+    parser = get_parser()
+    asts = [parser.parse(q) for q in QUERIES]
+    analyzer = SemanticAnalyzer(SCHEMA)
+    generator = MongoDBGenerator()
+    optimizer = MongoOptimizer()
+
+    def run(i):
+        ast = asts[i % len(asts)]
+        analysis = analyzer.validate_query(ast)
+        return repr(optimizer.optimize(generator.generate(ast, analysis)))
+
+    jobs = range(len(QUERIES) * 400)
+    serial = [run(i) for i in jobs]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        threaded = list(pool.map(run, jobs))
+    assert threaded == serial
+
+def test_analysis_does_not_mutate_ast():
+    parser = get_parser()
+    ast = parser.parse("SELECT users.name, orders.amount FROM users, orders WHERE users.id = orders.user_id AND orders.amount > 5;")
+    before = hash(ast)
+    analysis = SemanticAnalyzer(SCHEMA).validate_query(ast)
+    assert ast == parser.parse("SELECT users.name, orders.amount FROM users, orders WHERE users.id = orders.user_id AND orders.amount > 5;")
+    assert hash(ast) == before
+    assert analysis.join == {"left_table": "users", "left_col": "id", "right_table": "orders", "right_col": "user_id"}
+    assert analysis.resolved_columns == [{"table": "users", "column": "name"}, {"table": "orders", "column": "amount"}]
+
+def test_default_transpiler_is_built_once(monkeypatch):
+    # a slow constructor widens the window between the None check and the assignment
+    def slow_transpiler():
+        time.sleep(0.01)
+        return object()
+    monkeypatch.setattr(transpiler_module, "_default_transpiler", None)
+    monkeypatch.setattr(transpiler_module, "Transpiler", slow_transpiler)
+    barrier = threading.Barrier(8)
+    def first_call(_):
+        barrier.wait()
+        return transpiler_module.get_transpiler()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        built = {id(t) for t in pool.map(first_call, range(8))}
+    assert len(built) == 1
@@ -0,0 +1,143 @@
+import random
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from sql2mongo.codegen.evaluator import evaluate, matches, sort_documents, top_documents
+from sql2mongo.codegen.rules import RuleEngine
+from sql2mongo.transpiler import Transpiler
+
+SCHEMA = {
+    "users": {"id": "int", "name": "string", "age": "int", "city": "string"},
+    "orders": {"order_id": "int", "user_id": "int", "amount": "int", "status": "string"},
+}
+
+DB = {
+    "users": [
+        {"id": 1, "name": "Asha", "age": 34, "city": "Pune"},
+        {"id": 2, "name": "Ravi", "age": 19, "city": "Delhi"},
+        {"id": 3, "name": "Meera", "age": 52, "city": "Pune"},
+    ],
+    "orders": [
+        {"order_id": 10, "user_id": 1, "amount": 250, "status": "open"},
+        {"order_id": 11, "user_id": 1, "amount": 40, "status": "paid"},
+        {"order_id": 12, "user_id": 2, "amount": 900, "status": "open"},
+        {"order_id": 13, "user_id": 3, "amount": 75, "status": "open"},
+    ],
+}
+
+
+def rows(result):
+    return sorted(map(repr, result))
+
+
+def test_matches():
+    doc = {"age": 30, "city": "Pune", "tags": ["a", "b"]}
+    assert matches(doc, {"age": {"$gt": 20, "$lte": 30}, "city": "Pune"})
+    assert matches(doc, {"$or": [{"age": 1}, {"city": {"$in": ["Pune"]}}]})
+    assert matches(doc, {"tags": "b", "missing": {"$ne": 1}})
+    assert not matches(doc, {"age": {"$gt": "x"}})
+
+
+def test_find_and_group():
+    assert evaluate(DB, {"collection": "users", "filter": {"age": {"$gt": 20}}, "projection": {"name": 1},
+                         "sort": {"age": -1}}) == [{"name": "Meera"}, {"name": "Asha"}]
+    result = evaluate(DB, Transpiler().translate("SELECT city, COUNT(*) FROM users GROUP BY city;", SCHEMA))
+    assert rows(result) == rows([{"city": "Pune", "count": 2}, {"city": "Delhi", "count": 1}])
+
+
+def test_join_pushdown_matches_filtering_after_unwind():
+    sql = ("SELECT users.name, orders.amount FROM users JOIN orders ON users.id = orders.user_id "
+           "WHERE users.city = 'Pune' AND orders.status = 'open';")
+    pushed = Transpiler().translate(sql, SCHEMA)
+    unpushed = {"collection": "users", "pipeline": [
+        {"$lookup": {"from": "orders", "localField": "id", "foreignField": "user_id", "as": "orders"}},
+        {"$unwind": "$orders"},
+        {"$match": {"$and": [{"city": "Pune"}, {"orders.status": "open"}]}},
+        {"$addFields": {"amount": "$orders.amount"}},
+        {"$project": {"name": 1, "amount": 1}},
+    ]}
+    assert {"$project": {"name": 1, "id": 1}} in pushed["pipeline"]
+    assert rows(evaluate(DB, pushed)) == rows(evaluate(DB, unpushed))
+    assert rows(evaluate(DB, pushed)) == rows([{"name": "Asha", "amount": 250}, {"name": "Meera", "amount": 75}])
+
+
+def test_join_order_limit_and_offset():
+    for sql in ["SELECT users.name, orders.amount FROM users JOIN orders ON users.id = orders.user_id "
+                "ORDER BY amount DESC LIMIT 2 OFFSET 1;",
+                "SELECT users.name, orders.amount FROM users, orders WHERE users.id = orders.user_id "
+                "ORDER BY amount DESC LIMIT 2 OFFSET 1;"]:
+        plan = Transpiler().translate(sql, SCHEMA)
+        assert {"$skip": 1} in plan["pipeline"]
+        # amounts 900, 250, 75, 40: skip Ravi's order, keep the next two
+        assert [doc["name"] for doc in evaluate(DB, plan)] == ["Asha", "Meera"], sql
+
+
+def test_count_fast_path_matches_group():
+    for sql in ["SELECT COUNT(*) FROM users;", "SELECT COUNT(*) FROM orders WHERE status = 'open';",
+                "SELECT COUNT(amount) FROM orders WHERE amount > 50;"]:
+        plan = Transpiler().translate(sql, SCHEMA)
+        assert "count" in plan
+        grouped = evaluate(DB, {"collection": plan["collection"], "pipeline": [
+            {"$match": plan.get("filter", {})},
+            {"$group": {"_id": None, plan["count"]: {"$sum": 1}}},
+            {"$project": {"_id": 0}},
+        ]})
+        assert evaluate(DB, plan) == grouped
+    # unlike $group, an empty match still yields a row
+    assert evaluate(DB, Transpiler().translate("SELECT COUNT(*) FROM users WHERE age > 90;", SCHEMA)) == [{"count": 0}]
+
+
+def test_distinct_strategies_agree():
+    command = dict(SCHEMA, **{"$stats": {"orders": {"distinct": {"status": 3, "user_id": 3}}}})
+    grouped = dict(SCHEMA, **{"$stats": {"orders": {"distinct": {"status": 10 ** 6, "user_id": 10 ** 6}}}})
+    for sql in ["SELECT DISTINCT status FROM orders WHERE amount > 50;",
+                "SELECT COUNT(DISTINCT user_id) FROM orders WHERE status = 'open';"]:
+        small, large = Transpiler().translate(sql, command), Transpiler().translate(sql, grouped)
+        assert "distinct" in small and "pipeline" in large
+        assert rows(evaluate(DB, small)) == rows(evaluate(DB, large))
+    result = evaluate(DB, Transpiler().translate("SELECT COUNT(DISTINCT user_id) FROM orders WHERE status = 'open';", SCHEMA))
+    assert result == [{"count_distinct_user_id": 3}]
+    # like COUNT(*), no matching document still gives a row, whichever plan runs
+    for schema in (command, grouped):
+        for sql in ["SELECT COUNT(DISTINCT user_id) FROM orders WHERE amount > 5000;",
+                    "SELECT COUNT(DISTINCT user_id) FROM orders WHERE amount > 50 AND amount < 10;"]:
+            assert evaluate(DB, Transpiler().translate(sql, schema)) == [{"count_distinct_user_id": 0}], sql
+    result = evaluate(DB, Transpiler().translate(
+        "SELECT status, COUNT(DISTINCT user_id) FROM orders GROUP BY status;", SCHEMA))
+    assert rows(result) == rows([{"status": "open", "count_distinct_user_id": 3},
+                                 {"status": "paid", "count_distinct_user_id": 1}])
+
+
+def test_top_k_sort_matches_full_sort():
+    rng = random.Random(2)
+    docs = [{"a": rng.randrange(5), "b": rng.choice(["x", "y", None]), "i": i} for i in range(200)]
+    for spec in ({"a": 1}, {"a": -1, "b": 1}, {"b": -1, "a": 1, "i": -1}):
+        for k in (1, 7, 500):
+            assert top_documents(docs, spec, k) == sort_documents(docs, spec)[:k]
+    pipeline = [{"$sort": {"a": -1}}, {"$skip": 3}, {"$limit": 4}]
+    assert evaluate({"t": docs}, {"collection": "t", "pipeline": pipeline}) == sort_documents(docs, {"a": -1})[3:7]
+
+
+def test_sort_limit_coalescing():
+    pipeline = [{"$sort": {"a": 1}}, {"$sort": {"b": -1}}, {"$project": {"b": 1}}, {"$set": {"c": 1}},
+                {"$skip": 2}, {"$limit": 5}]
+    assert RuleEngine().optimize_pipeline(pipeline) == [
+        {"$sort": {"b": -1}}, {"$skip": 2}, {"$limit": 5}, {"$project": {"b": 1}}, {"$set": {"c": 1}},
+    ]
+
+
+def test_index_sort_before_group():
+    indexed = dict(SCHEMA, **{"$stats": {"orders": {"indexes": [["status", "amount"]]}}})
+    sql = "SELECT status, MAX(amount) FROM orders WHERE amount > 50 GROUP BY status ORDER BY status DESC;"
+    plan = Transpiler().translate(sql, indexed)
+    assert plan["pipeline"][:3] == [
+        {"$match": {"amount": {"$gt": 50}}},
+        {"$sort": {"status": -1}},
+        {"$group": {"_id": "$status", "max_amount": {"$max": "$amount"}}},
+    ]
+    assert evaluate(DB, plan) == evaluate(DB, Transpiler().translate(sql, SCHEMA))
+    # no index holding user_id: sorting before $group would be an in-memory sort
+    plan = Transpiler().translate(sql.replace("MAX(amount)", "MAX(user_id)"), indexed)
+    assert "$sort" in plan["pipeline"][2] and "$group" in plan["pipeline"][1]
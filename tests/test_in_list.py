@@ -0,0 +1,121 @@
+import sys
+import os
+from array import array
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from sql2mongo.codegen.evaluator import evaluate
+from sql2mongo.codegen.in_list import InList, in_values, spill_values
+from sql2mongo.codegen.intervals import intersect
+from sql2mongo.codegen.mongodb_generator import MongoDBGenerator
+from sql2mongo.codegen.semi_join import Prepared
+from sql2mongo.codegen.shell import format_shell
+from sql2mongo.transpiler import Transpiler
+
+SCHEMA = {"users": {"id": "int", "name": "string", "age": "int", "city": "string"}}
+
+
+def dataset():
+    return {"users": [{"id": i, "name": f"u{i}", "age": 18 + i % 7, "city": ["Pune", "Goa"][i % 2]}
+                      for i in range(40)]}
+
+
+def spilling(limit=4):
+    return Transpiler(generator=MongoDBGenerator(in_list_max=limit))
+
+
+def test_in_list_is_sorted_and_unique():
+    assert InList.of([9, 3, 9, 1]) == [1, 3, 9]
+    assert InList([1, 3, 9]).contains(3) and not InList([1, 3, 9]).contains(4)
+    # mixed types can't be ordered: a plain list in the order they were written
+    mixed = InList.of(["a", 2, "a", 1])
+    assert mixed == ["a", 2, 1] and not isinstance(mixed, InList)
+    assert isinstance(in_values((3, 1, 3)), InList)
+    # a copy, never the AST's own list
+    values = InList.of([1, 2])
+    assert in_values(values) is not values
+    assert spill_values([5, 2, 5]) == array("q", [2, 5])
+    assert spill_values(["b", "a"]) == ["a", "b"]
+    assert isinstance(spill_values([1, 2 ** 70]), InList)
+
+
+def test_generated_in_lists_are_sorted_once():
+    plan = Transpiler().translate("SELECT * FROM users WHERE id IN (7, 3, 7, 1);", SCHEMA)
+    assert plan["filter"] == {"id": {"$in": [1, 3, 7]}}
+    assert isinstance(plan["filter"]["id"]["$in"], InList)
+    assert intersect([("$in", [9, 1, 5, 1]), ("$gt", 0), ("$ne", 5)]) == (("$in", [1, 9]),)
+    plan = Transpiler().translate("SELECT * FROM users WHERE id = 7 OR id = 3 OR id IN (1, 7);", SCHEMA)
+    assert plan["filter"] == {"id": {"$in": [1, 3, 7]}}
+
+
+def test_long_in_list_spills_to_a_temporary_collection():
+    sql = "SELECT name FROM users WHERE city = 'Pune' AND id IN (9, 1, 3, 3, 25, 30) ORDER BY name;"
+    plan = spilling().translate(sql, SCHEMA)
+    assert plan["prepare"] == [{"name": "tmp_0", "temp": True, "values": array("q", [1, 3, 9, 25, 30])}]
+    assert plan["pipeline"][:3] == [
+        {"$match": {"city": "Pune"}},
+        {"$lookup": {"from": Prepared("tmp_0"), "localField": "id", "foreignField": "_id", "as": "tmp_0_match"}},
+        {"$match": {"tmp_0_match": {"$ne": []}}},
+    ]
+    assert plan["string"].splitlines()[:2] == [
+        'const tmp_0 = "tmp_0_" + new ObjectId().toString();',
+        "db.getCollection(tmp_0).insertMany([ 1, 3, 9, 25, 30 ].map(v => ({ _id: v })));",
+    ]
+    assert plan["string"].endswith("db.getCollection(tmp_0).drop();")
+    db = dataset()
+    assert evaluate(db, plan) == evaluate(db, Transpiler().translate(sql, SCHEMA))
+    assert set(db) == {"users"}
+
+
+def test_spilled_plans_return_the_same_rows():
+    db = dataset()
+    queries = [
+        "SELECT * FROM users WHERE id IN (1, 2, 3, 5, 8, 13, 21, 34);",
+        "SELECT id FROM users WHERE name IN ('u1', 'u4', 'u9', 'u16', 'u25', 'u36') AND age > 19;",
+        "SELECT id FROM users WHERE id IN (2, 4, 6, 8, 10) AND age IN (19, 20, 21, 22, 23) ORDER BY id LIMIT 3;",
+    ]
+    for sql in queries:
+        plan = spilling().translate(sql, SCHEMA)
+        assert "prepare" in plan, sql
+        assert evaluate(db, plan) == evaluate(db, Transpiler().translate(sql, SCHEMA)), sql
+    # a cached template binds new, possibly repeated, values
+    transpiler = spilling()
+    transpiler.translate("SELECT id FROM users WHERE name IN ('u1', 'u2', 'u3', 'u4', 'u5');", SCHEMA)
+    plan = transpiler.translate("SELECT id FROM users WHERE name IN ('u7', 'u7', 'u9', 'u9', 'u9');", SCHEMA)
+    assert transpiler.plan_cache.stats()["hits"] == 1
+    assert [row["id"] for row in evaluate(db, plan)] == [7, 9]
+
+
+def test_spilled_in_runs_ahead_of_grouping_counts_and_joins():
+    schema = dict(SCHEMA, orders={"order_id": "int", "user_id": "int", "amount": "int"})
+    db = dict(dataset(), orders=[{"order_id": k, "user_id": k % 25, "amount": k * 10} for k in range(60)])
+    ids = "(1, 2, 3, 5, 8, 13, 21, 34)"
+    queries = [
+        f"SELECT COUNT(*) FROM users WHERE id IN {ids};",
+        "SELECT COUNT(*) FROM users WHERE id IN (100, 200, 300, 400, 500);",
+        f"SELECT city, COUNT(*) FROM users WHERE id IN {ids} GROUP BY city ORDER BY city;",
+        f"SELECT DISTINCT age FROM users WHERE id IN {ids} ORDER BY age;",
+        f"SELECT COUNT(DISTINCT age) FROM users WHERE id IN {ids};",
+        f"SELECT users.name, orders.amount FROM users JOIN orders ON users.id = orders.user_id "
+        f"WHERE users.id IN {ids} ORDER BY amount;",
+    ]
+    for sql in queries:
+        plan = spilling().translate(sql, schema)
+        assert plan["prepare"][0]["values"] and any("$lookup" in stage for stage in plan["pipeline"]), sql
+        assert evaluate(db, plan) == evaluate(db, Transpiler().translate(sql, schema)), sql
+    assert evaluate(db, spilling().translate(queries[1], schema)) == [{"count": 0}]
+
+
+def test_short_or_placeholder_lists_stay_inline():
+    sql = "SELECT * FROM users WHERE id IN (1, 2, 3, 4, 5, 6);"
+    assert spilling(limit=None).translate(sql, SCHEMA)["filter"] == {"id": {"$in": [1, 2, 3, 4, 5, 6]}}
+    assert spilling(limit=6).translate(sql, SCHEMA)["filter"] == {"id": {"$in": [1, 2, 3, 4, 5, 6]}}
+    query = spilling().compile("SELECT * FROM users WHERE id IN (?, ?, ?, ?, ?, ?);", SCHEMA)
+    assert query.bind([6, 5, 4, 3, 2, 1])["filter"] == {"id": {"$in": [1, 2, 3, 4, 5, 6]}}
+    # only AND-ed lists on the FROM table spill: under an OR, or on a joined table, they stay inline
+    plan = spilling().translate("SELECT id FROM users WHERE age > 30 OR id IN (1, 2, 3, 4, 5, 6);", SCHEMA)
+    assert "prepare" not in plan and {"id": {"$in": [1, 2, 3, 4, 5, 6]}} in plan["filter"]["$or"]
+    schema = dict(SCHEMA, orders={"order_id": "int", "user_id": "int", "amount": "int"})
+    plan = spilling().translate("SELECT users.name FROM users JOIN orders ON users.id = orders.user_id "
+                                "WHERE orders.order_id IN (1, 2, 3, 4, 5, 6);", schema)
+    assert "prepare" not in plan and "$in" in format_shell(plan["pipeline"])
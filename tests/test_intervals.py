@@ -0,0 +1,124 @@
+import sys
+import os
+import random
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from sql2mongo.ast.nodes import Parameter
+from sql2mongo.codegen.evaluator import evaluate
+from sql2mongo.codegen.intervals import EMPTY, applies, intersect
+from sql2mongo.codegen.optimizer import MongoOptimizer
+from sql2mongo.codegen.rules import RuleEngine
+from sql2mongo.executor import execute
+from sql2mongo.transpiler import Transpiler
+
+SCHEMA = {"users": {"id": "int", "name": "string", "age": "int", "city": "string"}}
+
+
+class NoDatabase:
+    def __getitem__(self, name):
+        raise AssertionError("the database was queried")
+
+
+@pytest.mark.parametrize("ops, expected", [
+    ([("$gt", 10), ("$gt", 20)], (("$gt", 20),)),
+    ([("$gt", 10), ("$gte", 10)], (("$gt", 10),)),
+    ([("$gte", 1), ("$lte", 9), ("$eq", 5)], (("$eq", 5),)),
+    ([("$in", [1, 5, 9, 5]), ("$gt", 3)], (("$in", [5, 9]),)),
+    ([("$in", [1, 5]), ("$in", [5, 7])], (("$eq", 5),)),
+    ([("$gte", 4), ("$lte", 4), ("$ne", 7)], (("$eq", 4),)),
+    ([("$gt", 1), ("$ne", 0), ("$ne", 5), ("$ne", None)], (("$gt", 1), ("$ne", 5))),
+    ([("$gt", 50), ("$lt", 10)], EMPTY),
+    ([("$gt", 5), ("$lte", 5)], EMPTY),
+    ([("$eq", 4), ("$ne", 4)], EMPTY),
+    ([("$gte", "b"), ("$lt", "c"), ("$in", ["a", "bb"])], (("$eq", "bb"),)),
+])
+def test_intersect(ops, expected):
+    assert applies(ops)
+    assert intersect(ops) == expected
+
+
+def test_intersect_leaves_mixed_and_unknown_values_alone():
+    assert not applies([("$gt", "a"), ("$lt", 3)])
+    assert not applies([("$gt", Parameter(None, 0)), ("$lt", 3)])
+    assert not applies([("$ne", None)])
+    assert not applies([("$eq", None), ("$gt", 1)])
+    assert not applies([("$regex", "a"), ("$gt", "a")])
+
+
+def test_filters_keep_every_constraint():
+    translate = Transpiler().translate
+    assert translate("SELECT * FROM users WHERE age > 10 AND age > 20;", SCHEMA)["filter"] == {"age": {"$gt": 20}}
+    assert translate("SELECT * FROM users WHERE age = 5 AND age > 3;", SCHEMA)["filter"] == {"age": 5}
+    assert translate("SELECT * FROM users WHERE age BETWEEN 18 AND 30 AND age IN (10, 20, 25, 40);",
+                     SCHEMA)["filter"] == {"age": {"$in": [20, 25]}}
+    assert translate("SELECT * FROM users WHERE age >= 7 AND age <= 7 AND city = 'Pune';",
+                     SCHEMA)["filter"] == {"age": 7, "city": "Pune"}
+
+
+def test_contradiction_is_answered_without_the_database():
+    translate = Transpiler().translate
+    plan = translate("SELECT * FROM users WHERE age > 50 AND city = 'Pune' AND age < 10;", SCHEMA)
+    assert plan["empty"] is True
+    assert plan["string"] == "[] // no document can match the filter"
+    assert execute(NoDatabase(), plan) == []
+    plan = translate("SELECT COUNT(*) FROM users WHERE age = 3 AND age = 4;", SCHEMA)
+    assert execute(NoDatabase(), plan) == [{"count": 0}]
+    plan = translate("SELECT city, COUNT(*) FROM users WHERE age IN (1, 2) AND age > 5 GROUP BY city;", SCHEMA)
+    assert execute(NoDatabase(), plan) == []
+    # one impossible branch of an OR is dropped, not the whole filter
+    plan = translate("SELECT * FROM users WHERE age > 50 AND age < 10 OR city = 'Pune';", SCHEMA)
+    assert "empty" not in plan and plan["filter"] == {"city": "Pune"}
+
+
+def test_contradiction_found_after_binding():
+    transpiler = Transpiler()
+    assert "empty" not in transpiler.translate("SELECT * FROM users WHERE age > 5 AND age < 10;", SCHEMA)
+    # same fingerprint, served from the cached template
+    assert transpiler.translate("SELECT * FROM users WHERE age > 50 AND age < 10;", SCHEMA)["empty"] is True
+    query = transpiler.compile("SELECT * FROM users WHERE age > ? AND age < ?;", SCHEMA)
+    assert "empty" not in query.bind([5, 10])
+    assert execute(NoDatabase(), query.bind([50, 10])) == []
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT city, COUNT(*) FROM users WHERE age > {} AND age < 10 GROUP BY city;",
+    "SELECT users.name, orders.amount FROM users JOIN orders ON users.id = orders.user_id "
+    "WHERE users.age > {} AND users.age < 10;",
+    "SELECT users.name, orders.amount FROM users JOIN orders ON users.id = orders.user_id "
+    "WHERE orders.amount > {} AND orders.amount < 10;",
+])
+def test_cached_pipelines_match_uncached(sql):
+    schema = dict(SCHEMA, orders={"order_id": "int", "user_id": "int", "amount": "int"})
+    transpiler = Transpiler()
+    transpiler.translate(sql.format(5), schema)
+    cached = transpiler.translate(sql.format(50), schema)
+    assert transpiler.plan_cache.stats()["hits"] == 1
+    assert cached == Transpiler(plan_cache_size=0).translate(sql.format(50), schema)
+
+
+def test_contradiction_found_after_binding_a_pipeline():
+    transpiler = Transpiler()
+    sql = "SELECT city, COUNT(*) FROM users WHERE age > {} AND age < 10 GROUP BY city;"
+    transpiler.translate(sql.format(5), SCHEMA)
+    assert transpiler.translate(sql.format(50), SCHEMA)["empty"] is True
+    query = transpiler.compile("SELECT city, COUNT(*) FROM users WHERE age > ? AND age < ? GROUP BY city;", SCHEMA)
+    assert "empty" not in query.bind([5, 10])
+    assert execute(NoDatabase(), query.bind([50, 10])) == []
+
+
+def test_normalized_filters_return_the_same_rows():
+    rng = random.Random(3)
+    db = {"users": [{"id": i, "name": f"u{i}", "age": rng.randrange(0, 40), "city": rng.choice(["Pune", "Goa"])}
+                    for i in range(80)]}
+    comparisons = ["age > {}", "age >= {}", "age < {}", "age <= {}", "age = {}", "age != {}",
+                   "age BETWEEN {} AND 30", "age IN ({}, 12, 25)"]
+    unoptimized = Transpiler(optimizer=MongoOptimizer(RuleEngine(filter_rules=[], pipeline_rules=[])),
+                             plan_cache_size=0)
+    optimized = Transpiler()
+    for _ in range(60):
+        terms = [rng.choice(comparisons).format(rng.randrange(0, 40)) for _ in range(rng.randrange(2, 5))]
+        sql = "SELECT id FROM users WHERE " + " AND ".join(terms) + ";"
+        expected = evaluate(db, unoptimized.translate(sql, SCHEMA))
+        assert evaluate(db, optimized.translate(sql, SCHEMA)) == expected, sql
@@ -0,0 +1,83 @@
+import random
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from sql2mongo.codegen.evaluator import evaluate
+from sql2mongo.codegen.join_order import JoinStep, order_joins
+from sql2mongo.ast.nodes import ColumnRef
+from sql2mongo.schema_catalog import SchemaCatalog
+from sql2mongo.transpiler import Transpiler
+
+SCHEMA = {
+    "users": {"id": "int", "name": "string", "city": "string"},
+    "orders": {"order_id": "int", "user_id": "int", "amount": "int"},
+    "items": {"order_id": "int", "product_id": "int", "qty": "int"},
+    "products": {"id": "int", "title": "string", "price": "int"},
+}
+
+STATS = {
+    "users": {"rows": 50},
+    "orders": {"rows": 300},
+    "items": {"rows": 1000},
+    "products": {"rows": 20, "selectivity": {"price": 0.05}},
+}
+
+SQL = ("SELECT users.name, products.title, items.qty FROM orders "
+       "JOIN items ON items.order_id = orders.order_id "
+       "JOIN users ON orders.user_id = users.id "
+       "JOIN products ON items.product_id = products.id "
+       "WHERE products.price > 40 AND users.city = 'a' AND orders.amount > 10;")
+
+
+def lookups(mongo_data):
+    return [stage["$lookup"]["from"] for stage in mongo_data["pipeline"] if "$lookup" in stage]
+
+
+def dataset():
+    rng = random.Random(1)
+    return {
+        "users": [{"id": i, "name": f"u{i}", "city": rng.choice("ab")} for i in range(50)],
+        "orders": [{"order_id": i, "user_id": rng.randrange(50), "amount": rng.randrange(100)} for i in range(300)],
+        "items": [{"order_id": rng.randrange(300), "product_id": rng.randrange(20), "qty": rng.randrange(5)}
+                  for _ in range(1000)],
+        "products": [{"id": i, "title": f"p{i}", "price": rng.randrange(50)} for i in range(20)],
+    }
+
+
+def test_written_order_without_stats():
+    assert lookups(Transpiler().translate(SQL, SCHEMA)) == ["items", "users", "products"]
+
+
+def test_selective_lookups_run_first():
+    plan = Transpiler().translate(SQL, dict(SCHEMA, **{"$stats": STATS}))
+    # users can run as soon as orders is there and keeps far fewer documents than items
+    assert lookups(plan) == ["users", "items", "products"]
+    stages = [next(iter(stage)) for stage in plan["pipeline"]]
+    assert stages[:2] == ["$match", "$lookup"]
+    # products is looked up from the unwound items document
+    assert plan["pipeline"][-4]["$lookup"]["localField"] == "items.product_id"
+
+
+def test_lookups_wait_for_their_local_table():
+    catalog = SchemaCatalog(SCHEMA, STATS)
+    steps = [
+        JoinStep("items", ColumnRef("orders", "order_id"), ColumnRef("items", "order_id")),
+        JoinStep("products", ColumnRef("items", "product_id"), ColumnRef("products", "id")),
+    ]
+    # products is the smaller table but needs items first
+    assert order_joins("orders", steps, catalog) == steps
+
+
+def test_reordered_plan_returns_the_same_rows():
+    db = dataset()
+    written = evaluate(db, Transpiler().translate(SQL, SCHEMA))
+    planned = evaluate(db, Transpiler().translate(SQL, dict(SCHEMA, **{"$stats": STATS})))
+    assert written and sorted(map(repr, written)) == sorted(map(repr, planned))
+
+
+def test_distinct_counts_come_from_the_catalog():
+    # only 2 distinct users.id values: looking users up multiplies documents instead of filtering them
+    stats = dict(STATS, users={"rows": 50, "distinct": {"id": 2}})
+    assert lookups(Transpiler().translate(SQL, dict(SCHEMA, **{"$stats": stats}))) == ["items", "products", "users"]
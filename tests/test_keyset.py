@@ -0,0 +1,82 @@
+import random
+import sys
+import os
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from sql2mongo.codegen.evaluator import evaluate
+from sql2mongo.codegen.keyset import keyset_predicate
+from sql2mongo.transpiler import Transpiler
+
+SCHEMA = {"users": {"id": "int", "name": "string", "age": "int", "city": "string"}}
+
+
+def dataset():
+    rng = random.Random(5)
+    # few distinct ages, so pages split runs of equal sort keys
+    return {"users": [{"_id": i, "id": i, "name": f"u{i}", "age": rng.randrange(4), "city": rng.choice("ab")}
+                      for i in range(60)]}
+
+
+def test_predicate():
+    assert keyset_predicate({"_id": 1}, {"_id": 7}) == {"_id": {"$gt": 7}}
+    # null sorts first: after it in ascending order, before anything in descending order
+    assert keyset_predicate({"age": 1, "_id": 1}, {"age": None, "_id": 7}) == {"$or": [
+        {"age": {"$ne": None}},
+        {"age": None, "_id": {"$gt": 7}},
+    ]}
+    assert keyset_predicate({"age": -1, "_id": 1}, {"_id": 7}) == {"age": None, "_id": {"$gt": 7}}
+    assert keyset_predicate({"age": -1, "_id": 1}, {"age": 30, "_id": 7}) == {"$or": [
+        {"age": {"$lt": 30}},
+        {"age": None},
+        {"age": 30, "_id": {"$gt": 7}},
+    ]}
+    with pytest.raises(ValueError, match="last value of '_id'"):
+        keyset_predicate({"age": 1, "_id": 1}, {"age": 7})
+
+
+@pytest.mark.parametrize("order", ["age DESC", "age ASC, name DESC", "name"])
+def test_pages_cover_the_sorted_result(order):
+    db = dataset()
+    transpiler = Transpiler()
+    sql = f"SELECT name FROM users WHERE city = 'a' ORDER BY {order} LIMIT 7;"
+    pages, last = [], None
+    while True:
+        page = evaluate(db, transpiler.paginate(sql, SCHEMA, last))
+        if not page:
+            break
+        assert len(page) <= 7
+        pages += page
+        last = page[-1]
+    everything = transpiler.paginate(sql.replace(" LIMIT 7", ""), SCHEMA)
+    assert pages == evaluate(db, everything)
+    assert len(pages) == sum(1 for doc in db["users"] if doc["city"] == "a")
+
+
+@pytest.mark.parametrize("order", ["age DESC", "age", "age, name DESC", "age DESC, name"])
+def test_pages_keep_null_and_missing_keys(order):
+    db = dataset()
+    for doc in db["users"][::3]:
+        doc["age"] = None
+    for doc in db["users"][1::6]:
+        del doc["age"]
+    transpiler = Transpiler()
+    sql = f"SELECT name FROM users ORDER BY {order} LIMIT 4;"
+    pages, last = [], None
+    while True:
+        page = evaluate(db, transpiler.paginate(sql, SCHEMA, last))
+        if not page:
+            break
+        pages += page
+        last = page[-1]
+    assert pages == evaluate(db, transpiler.paginate(sql.replace(" LIMIT 4", ""), SCHEMA))
+    assert len(pages) == len(db["users"])
+
+
+def test_rejects_non_find_queries():
+    transpiler = Transpiler()
+    with pytest.raises(ValueError, match="OFFSET"):
+        transpiler.paginate("SELECT name FROM users ORDER BY age LIMIT 5 OFFSET 5;", SCHEMA)
+    with pytest.raises(ValueError, match="find query"):
+        transpiler.paginate("SELECT city, COUNT(*) FROM users GROUP BY city;", SCHEMA)
@@ -68,3 +68,50 @@ def test_all_operators(lexer):
     tokens = lexer.tokenize(sql)
     expected = ['EQ', 'NE', 'LT', 'GT', 'LE', 'GE']
     assert [t.type for t in tokens] == expected
+
+# ----------------- FAST BACKEND -----------------
+from sql2mongo.lexer.fast_lexer import FastSqlLexer
+
+PARITY_QUERIES = [
+    "SELECT name, age FROM users;",
+    "select Name from Users where Age >= 18 and city != 'New Delhi' or x<=3;",
+    "SELECT city, COUNT(*) FROM users\nGROUP BY city\r\nHAVING COUNT(*) > 2 ORDER BY count DESC LIMIT 5;",
+    "SELECT users.name FROM users JOIN orders ON users.id = orders.user_id WHERE id IN (1, 2, 3);",
+    "SELECT * FROM t WHERE ordered = 1 AND inx BETWEEN 2 AND 10;",
+    "SELECT * FROM t WHERE a = ? AND b IN (:first, :second_2);",
+]
+
+@pytest.fixture
+def fast_lexer():
+    l = FastSqlLexer()
+    l.build()
+    return l
+
+@pytest.mark.parametrize("sql", PARITY_QUERIES)
+def test_fast_lexer_matches_ply(lexer, fast_lexer, sql):
+    expected = [(t.type, t.value, t.lineno, t.lexpos) for t in lexer.tokenize(sql)]
+    actual = [(t.type, t.value, t.lineno, t.lexpos) for t in fast_lexer.tokenize(sql)]
+    assert actual == expected
+
+def test_fast_lexer_keyword_prefix_is_identifier(fast_lexer):
+    tokens = fast_lexer.tokenize("orders ordering in_stock")
+    assert [t.type for t in tokens] == ['IDENTIFIER', 'IDENTIFIER', 'IDENTIFIER']
+
+def test_fast_lexer_error_position(lexer, fast_lexer):
+    sql = "SELECT *\nFROM users WHERE $;"
+    with pytest.raises(LexerError) as ply_err:
+        lexer.tokenize(sql)
+    with pytest.raises(LexerError) as fast_err:
+        fast_lexer.tokenize(sql)
+    assert str(fast_err.value) == str(ply_err.value)
+
+def test_fast_lexer_drives_parser():
+    from sql2mongo.parser.sql_parser import get_parser
+    sql = "SELECT city, COUNT(*) FROM users WHERE age > 18 GROUP BY city ORDER BY COUNT(*) DESC;"
+    assert repr(get_parser("fast").parse(sql)) == repr(get_parser().parse(sql))
+
+def test_fast_lexer_covers_every_token():
+    from sql2mongo.lexer.fast_lexer import MASTER_RE, OP_TYPES
+    groups = set(MASTER_RE.groupindex) - {'WORD', 'OP', 'NEWLINE', 'ERROR', 'END'}
+    produced = groups | set(OP_TYPES.values()) | set(SqlLexer.reserved.values()) | {'IDENTIFIER'}
+    assert produced == set(SqlLexer.tokens)
@@ -6,7 +6,7 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
 from sql2mongo.parser.sql_parser import get_parser
-from sql2mongo.ast.nodes import SelectQuery, LogicalCondition, Comparison
+from sql2mongo.ast.nodes import SelectQuery, LogicalCondition, Comparison, ColumnRef, Join, Aggregate
 
 @pytest.fixture
 def parser():
@@ -25,7 +25,7 @@ def test_select_all(parser):
     sql = "SELECT * FROM items;"
     ast = parser.parse(sql)
     
-    assert ast.columns == ['*']
+    assert ast.columns == ('*',)
 
 def test_where_single_condition(parser):
     sql = "SELECT * FROM users WHERE age > 18;"
@@ -56,6 +56,57 @@ def test_precedence(parser):
     assert isinstance(ast.where.right, LogicalCondition)
     assert ast.where.right.operator == 'AND'
 
+def test_column_refs(parser):
+    ast = parser.parse("SELECT users.name, amount FROM users JOIN orders ON users.id = orders.user_id;")
+    assert ast.columns == (ColumnRef("users", "name"), ColumnRef(None, "amount"))
+    assert ast.joins == (Join("orders", Comparison(ColumnRef("users", "id"), "=", ColumnRef("orders", "user_id"))),)
+    assert ast.tables == ("users", "orders")
+
+def test_join_chain(parser):
+    ast = parser.parse("SELECT users.name FROM orders JOIN users ON orders.user_id = users.id "
+                       "JOIN items ON items.order_id = orders.order_id;")
+    assert ast.table == "orders"
+    assert [join.table for join in ast.joins] == ["users", "items"]
+    assert ast.tables == ("orders", "users", "items")
+    with pytest.raises(SyntaxError):
+        parser.parse("SELECT name FROM users, orders JOIN items ON items.order_id = orders.order_id;")
+
+def test_distinct(parser):
+    ast = parser.parse("SELECT DISTINCT city FROM users;")
+    assert ast.distinct and ast.columns == (ColumnRef(None, "city"),)
+    assert not parser.parse("SELECT city FROM users;").distinct
+    ast = parser.parse("SELECT COUNT(DISTINCT city) FROM users HAVING COUNT(DISTINCT city) > 1;")
+    assert ast.columns == (Aggregate("COUNT", "city", distinct=True),)
+    assert ast.having.identifier == Aggregate("COUNT", "city", distinct=True)
+    assert ast.columns[0] != Aggregate("COUNT", "city")
+
+def test_limit_offset(parser):
+    ast = parser.parse("SELECT name FROM users ORDER BY name LIMIT 10 OFFSET 20;")
+    assert (ast.limit, ast.offset) == (10, 20)
+    assert parser.parse("SELECT name FROM users OFFSET 5;").offset == 5
+    assert parser.parse("SELECT name FROM users LIMIT 5;").offset is None
+
+def test_structural_equality(parser):
+    sql = "SELECT name FROM users WHERE age > 18 AND id IN (1, 2) ORDER BY name LIMIT 5;"
+    first, second = parser.parse(sql), parser.parse(sql)
+    assert first is not second
+    assert first == second
+    assert hash(first) == hash(second)
+    assert len({first, second}) == 1
+    assert first != parser.parse(sql.replace("18", "19"))
+    # placeholders at different positions are different nodes
+    params = parser.parse("SELECT * FROM users WHERE age > ? AND age < ?;").where
+    assert params.left.value != params.right.value
+
+def test_nodes_are_immutable(parser):
+    ast = parser.parse("SELECT * FROM users WHERE age > 18;")
+    with pytest.raises(AttributeError):
+        ast.where = None
+    with pytest.raises(AttributeError):
+        ast.where.value = 21
+    assert ast.where.replace(value=21).value == 21
+    assert ast.where.value == 18
+
 def test_syntax_error(parser):
     sql = "SELECT FROM users;" # Missing column list
     with pytest.raises(SyntaxError):
@@ -67,3 +118,8 @@ def test_invalid_operator(parser):
     sql = "SELECT * FROM users WHERE age 18;" # Missing operator
     with pytest.raises(SyntaxError):
         parser.parse(sql)
+
+def test_shipped_tables_are_current():
+    # SqlParser loads parsetab/lextab in optimize mode, so stale tables would go unnoticed
+    from sql2mongo.build_tables import tables_are_current
+    assert tables_are_current()
@@ -0,0 +1,80 @@
+import pytest
+import sys
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from sql2mongo.parser.sql_parser import get_parser
+from sql2mongo.parser.parser_pool import ParserPool, ParserPoolExhausted
+from sql2mongo.transpiler import Transpiler
+
+QUERIES = [
+    "SELECT * FROM users WHERE age > 30;",
+    "SELECT name, city FROM users WHERE city = 'Delhi' AND age <= 40 ORDER BY age DESC LIMIT 3;",
+    "SELECT city, COUNT(*) FROM users GROUP BY city HAVING COUNT(*) > 2;",
+    "SELECT users.name, orders.amount FROM users JOIN orders ON users.id = orders.user_id;",
+    "SELECT * FROM users WHERE id IN (SELECT user_id FROM orders);",
+]
+
+SCHEMA = {
+    "users": {"id": "int", "name": "string", "age": "int", "city": "string"},
+    "orders": {"order_id": "int", "user_id": "int", "amount": "int"},
+}
+
+def test_pool_parses_like_a_parser():
+    pool = ParserPool(size=2)
+    parser = get_parser()
+    for q in QUERIES:
+        assert repr(pool.parse(q)) == repr(parser.parse(q))
+    assert pool.stats()["idle"] == 2
+
+def test_concurrent_parsing_matches_serial():
+    pool = ParserPool(size=4, fallback="wait")
+    jobs = [QUERIES[i % len(QUERIES)] for i in range(2000)]
+    serial = [repr(get_parser().parse(q)) for q in QUERIES]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        threaded = list(executor.map(lambda q: repr(pool.parse(q)), jobs))
+    assert threaded == [serial[i % len(QUERIES)] for i in range(2000)]
+    assert pool.stats()["checkouts"] == 2000
+
+def test_build_fallback_creates_temporary_parser():
+    pool = ParserPool(size=1, fallback="build")
+    held = pool.acquire()
+    extra = pool.acquire()
+    assert extra is not held
+    pool.release(extra)
+    pool.release(held)
+    stats = pool.stats()
+    assert stats["fallbacks"] == 1 and stats["idle"] == 1
+
+def test_error_fallback_raises():
+    pool = ParserPool(size=1, fallback="error")
+    with pool.checkout():
+        with pytest.raises(ParserPoolExhausted):
+            pool.acquire()
+    assert pool.stats()["exhausted"] == 1
+
+def test_wait_fallback_times_out_and_records_wait():
+    pool = ParserPool(size=1, fallback="wait", timeout=0.05)
+    with pool.checkout():
+        with pytest.raises(ParserPoolExhausted):
+            pool.acquire()
+    stats = pool.stats()
+    assert stats["waits"] == 1 and stats["max_wait"] >= 0.05
+
+def test_wait_fallback_gets_released_parser():
+    pool = ParserPool(size=1, fallback="wait", timeout=5)
+    held = pool.acquire()
+    timer = threading.Timer(0.05, pool.release, args=(held,))
+    timer.start()
+    assert pool.acquire() is held
+    timer.join()
+
+def test_shared_transpiler_across_threads():
+    transpiler = Transpiler(pool_size=4)
+    serial = [transpiler.translate(q, SCHEMA) for q in QUERIES]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        threaded = list(executor.map(lambda i: transpiler.translate(QUERIES[i % len(QUERIES)], SCHEMA), range(1000)))
+    assert threaded == [serial[i % len(QUERIES)] for i in range(1000)]
@@ -0,0 +1,93 @@
+import pytest
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from sql2mongo.lexer.sql_lexer import get_lexer
+from sql2mongo.plan_cache import PlanCache, fingerprint
+from sql2mongo.transpiler import Transpiler
+
+SCHEMA = {
+    "users": {
+        "id": "int",
+        "name": "string",
+        "age": "int",
+        "city": "string"
+    },
+    "orders": {
+        "order_id": "int",
+        "user_id": "int",
+        "amount": "int"
+    }
+}
+
+QUERIES = [
+    "SELECT * FROM users WHERE age > 30;",
+    "SELECT name FROM users WHERE city = 'Delhi' AND age <= 40 ORDER BY age DESC LIMIT 3;",
+    "SELECT * FROM users WHERE city IN ('Pune', 'Agra', 'Delhi');",
+    "SELECT * FROM users WHERE age = 20 OR age = 27 OR age = 22;",
+    "SELECT * FROM users WHERE age BETWEEN 18 AND 30;",
+    "SELECT city, COUNT(*) FROM users WHERE age > 5 GROUP BY city HAVING COUNT(*) > 2 LIMIT 4;",
+    "SELECT users.name, orders.amount FROM users JOIN orders ON users.id = orders.user_id WHERE orders.amount > 100;",
+]
+
+def shape(sql):
+    return fingerprint(get_lexer().tokenize(sql))
+
+def test_fingerprint_ignores_literals():
+    assert shape("SELECT * FROM users WHERE age > 30;")[0] == shape("select * from users where age > 31;")[0]
+    assert shape("SELECT * FROM users WHERE age > 30;")[1] == [30]
+
+def test_fingerprint_keeps_literal_type():
+    assert shape("SELECT * FROM users WHERE age > 30;")[0] != shape("SELECT * FROM users WHERE age > '30';")[0]
+
+def test_hit_after_first_shape():
+    transpiler = Transpiler()
+    first = transpiler.translate("SELECT * FROM users WHERE age > 30;", SCHEMA)
+    second = transpiler.translate("SELECT * FROM users WHERE age > 31;", SCHEMA)
+    assert first["filter"] == {"age": {"$gt": 30}}
+    assert second["filter"] == {"age": {"$gt": 31}}
+    assert second["string"].replace(" ", "") == "db.users.find({age:{$gt:31}})"
+    stats = transpiler.plan_cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+def test_schema_change_is_a_miss():
+    transpiler = Transpiler()
+    other = dict(SCHEMA, extra={"x": "int"})
+    transpiler.translate("SELECT * FROM users WHERE age > 30;", SCHEMA)
+    transpiler.translate("SELECT * FROM users WHERE age > 30;", other)
+    assert transpiler.plan_cache.stats()["misses"] == 2
+
+@pytest.mark.parametrize("sql", QUERIES)
+def test_cached_plans_match_uncached(sql):
+    cached = Transpiler()
+    uncached = Transpiler(plan_cache_size=0)
+    variant = sql.replace("3", "7").replace("Delhi", "Goa")
+    for q in (sql, variant, sql):
+        assert cached.translate(q, SCHEMA) == uncached.translate(q, SCHEMA)
+    assert cached.plan_cache.stats()["hits"] == 2
+
+def test_value_dependent_plans_are_not_cached():
+    transpiler = Transpiler()
+    uncached = Transpiler(plan_cache_size=0)
+    for q in ("SELECT * FROM users WHERE age > 20 OR age > 30;",
+              "SELECT * FROM users WHERE age > 50 OR age > 10;"):
+        assert transpiler.translate(q, SCHEMA) == uncached.translate(q, SCHEMA)
+    stats = transpiler.plan_cache.stats()
+    assert stats["hits"] == 0 and stats["bypasses"] == 2
+
+def test_lru_eviction():
+    cache = PlanCache(maxsize=2)
+    for name in ("a", "b", "c"):
+        cache.put((name, "h"), {"filter": {}}, 0)
+    assert len(cache) == 2
+    assert cache.get(("a", "h")) is None
+    assert cache.stats()["evictions"] == 1
+
+def test_semantic_errors_are_not_cached():
+    from sql2mongo.semantic.semantic_analyzer import SemanticError
+    transpiler = Transpiler()
+    with pytest.raises(SemanticError):
+        transpiler.translate("SELECT * FROM users WHERE age = 'x';", SCHEMA)
+    assert len(transpiler.plan_cache) == 0
@@ -0,0 +1,85 @@
+import pytest
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from sql2mongo.semantic.semantic_analyzer import SemanticError
+from sql2mongo.transpiler import Transpiler, compile_query
+
+SCHEMA = {
+    "users": {
+        "id": "int",
+        "name": "string",
+        "age": "int",
+        "city": "string"
+    },
+    "orders": {
+        "order_id": "int",
+        "user_id": "int",
+        "amount": "int"
+    }
+}
+
+@pytest.fixture
+def transpiler():
+    return Transpiler(plan_cache_size=0)
+
+def test_positional_bind(transpiler):
+    query = transpiler.compile("SELECT * FROM users WHERE age > ? AND city = ?;", SCHEMA)
+    assert query.param_types == {0: "int", 1: "string"}
+    res = query.bind([30, "Delhi"])
+    assert res["filter"] == {"age": {"$gt": 30}, "city": "Delhi"}
+    assert res["string"] == transpiler.translate(
+        "SELECT * FROM users WHERE age > 30 AND city = 'Delhi';", SCHEMA)["string"]
+
+def test_named_bind_many_times(transpiler):
+    query = transpiler.compile("SELECT name FROM users WHERE age BETWEEN :lo AND :hi;", SCHEMA)
+    assert query.bind({"lo": 1, "hi": 2})["filter"] == {"age": {"$gte": 1, "$lte": 2}}
+    assert query.bind({"lo": 5, "hi": 9})["filter"] == {"age": {"$gte": 5, "$lte": 9}}
+
+def test_in_list_is_sorted_after_bind(transpiler):
+    query = transpiler.compile("SELECT * FROM users WHERE age IN (?, ?, 7);", SCHEMA)
+    assert query.bind([9, 3])["filter"] == {"age": {"$in": [3, 7, 9]}}
+
+def test_or_equalities_with_placeholders(transpiler):
+    query = transpiler.compile("SELECT * FROM users WHERE age = ? OR age = ?;", SCHEMA)
+    assert query.bind([22, 20])["filter"] == {"age": {"$in": [20, 22]}}
+
+def test_or_ranges_with_placeholders_are_not_merged(transpiler):
+    query = transpiler.compile("SELECT * FROM users WHERE age > ? OR age > ?;", SCHEMA)
+    assert list(query.template["filter"]) == ["$or"]
+    # the bound values are merged once they are known
+    assert query.bind([20, 30])["filter"] == {"age": {"$gt": 20}}
+    assert query.bind([40, 30])["filter"] == {"age": {"$gt": 30}}
+
+def test_pipeline_bind(transpiler):
+    query = transpiler.compile(
+        "SELECT city, COUNT(*) FROM users WHERE age > :age GROUP BY city HAVING COUNT(*) > :n;", SCHEMA)
+    pipeline = query.bind({"age": 18, "n": 2})["pipeline"]
+    assert pipeline[0] == {"$match": {"age": {"$gt": 18}}}
+    assert {"$match": {"count": {"$gt": 2}}} in pipeline
+
+def test_bind_type_mismatch(transpiler):
+    query = transpiler.compile("SELECT * FROM users WHERE age = ?;", SCHEMA)
+    with pytest.raises(SemanticError, match="Type mismatch for column 'age'. Expected int but got string."):
+        query.bind(["twenty"])
+
+def test_bind_arity_and_missing_names(transpiler):
+    with pytest.raises(SemanticError, match="Expected 1 parameter"):
+        transpiler.compile("SELECT * FROM users WHERE age = ?;", SCHEMA).bind([])
+    with pytest.raises(SemanticError, match="Missing value for parameter"):
+        transpiler.compile("SELECT * FROM users WHERE age = :age;", SCHEMA).bind({})
+
+def test_mixed_placeholders_rejected(transpiler):
+    with pytest.raises(SemanticError, match="Cannot mix"):
+        transpiler.compile("SELECT * FROM users WHERE age = ? AND city = :city;", SCHEMA)
+
+def test_template_is_not_mutated_by_bind(transpiler):
+    query = transpiler.compile("SELECT * FROM users WHERE age > ?;", SCHEMA)
+    first = query.bind([1])
+    first["filter"]["age"]["$gt"] = 100
+    assert query.bind([2])["filter"] == {"age": {"$gt": 2}}
+
+def test_module_level_compile():
+    assert compile_query("SELECT * FROM users WHERE id = ?;", SCHEMA).bind([5])["filter"] == {"id": 5}
@@ -0,0 +1,207 @@
+import sys
+import os
+import random
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from sql2mongo.ast.nodes import Parameter
+from sql2mongo.codegen.evaluator import evaluate
+from sql2mongo.codegen.ir import And, Or, FieldCond, Raw, Match, Stage, lift_filter, lower_filter
+from sql2mongo.codegen.optimizer import MongoOptimizer
+from sql2mongo.codegen.rules import (FlattenOr, UnwrapSingleton, OrToIn, FactorConjuncts, OrWidestBound,
+                                     MergeFieldConds, SortTerms, MergeMatches, PushMatchUp, LimitBeforeReshape,
+                                     DropOverriddenSort, RuleEngine)
+from sql2mongo.transpiler import Transpiler
+
+SCHEMA = {"users": {"id": "int", "name": "string", "age": "int", "city": "string"}}
+
+
+def test_lift_and_lower_round_trip():
+    doc = {"$and": [{"age": {"$gt": 3}}, {"$or": [{"city": "Pune"}, {"name": {"$ne": "x"}}]}],
+           "$expr": {"$eq": ["$a", "$b"]}}
+    node = lift_filter(doc)
+    assert node == And([And([FieldCond("age", [("$gt", 3)]),
+                             Or([FieldCond.eq("city", "Pune"), FieldCond("name", [("$ne", "x")])])]),
+                        Raw({"$expr": {"$eq": ["$a", "$b"]}})])
+    assert lower_filter(node) == {"age": {"$gt": 3}, "$or": [{"city": "Pune"}, {"name": {"$ne": "x"}}],
+                                  "$expr": {"$eq": ["$a", "$b"]}}
+    # repeated keys can't share a document
+    assert lower_filter(lift_filter({"$and": [{"age": 1}, {"age": 2}]})) == {"$and": [{"age": 1}, {"age": 2}]}
+    assert lower_filter(lift_filter({})) == {}
+
+
+def test_filter_rules():
+    a1, a2 = FieldCond.eq("a", 1), FieldCond.eq("a", 2)
+    assert FlattenOr().apply(Or([a1, Or([a2, a1])])) == Or([a1, a2, a1])
+    assert UnwrapSingleton().apply(And([a1])) == a1
+    assert OrToIn().apply(Or([a1, a2, a1, FieldCond("a", [("$in", [3])])])) == Or([FieldCond("a", [("$in", [1, 2, 3])])])
+    assert not OrToIn().matches(Or([a1, FieldCond.eq("b", 2)]))
+    # a run of one field's values inside a larger OR
+    b_gt = FieldCond("b", [("$gt", 1)])
+    assert OrToIn().apply(Or([b_gt, a1, b_gt, a2])) == Or([b_gt, FieldCond("a", [("$in", [1, 2])]), b_gt])
+    b1, c1 = FieldCond.eq("b", 1), FieldCond.eq("c", 1)
+    assert FactorConjuncts().apply(Or([And([a1, b1]), And([c1, a1])])) == And([a1, Or([b1, c1])])
+    assert FactorConjuncts().apply(Or([And([a1, b1]), a1])) == a1
+    assert not FactorConjuncts().matches(Or([And([a1, b1]), c1]))
+    assert SortTerms().apply(Or([c1, And([b1]), a1])) == Or([a1, c1, And([b1])])
+    assert OrWidestBound().apply(Or([FieldCond("a", [("$gt", 5)]), FieldCond("a", [("$gt", 2)])])) \
+        == FieldCond("a", [("$gt", 2)])
+    assert OrWidestBound().apply(Or([FieldCond("a", [("$lte", 5)]), FieldCond("a", [("$lte", 9)])])) \
+        == FieldCond("a", [("$lte", 9)])
+    # a > 5 OR a < 2 is not one bound, and placeholders can't be compared
+    assert not OrWidestBound().matches(Or([FieldCond("a", [("$gt", 5)]), FieldCond("a", [("$lt", 2)])]))
+    assert not OrWidestBound().matches(Or([FieldCond("a", [("$gt", Parameter(None, 0))]),
+                                           FieldCond("a", [("$gt", 2)])]))
+    b2 = FieldCond.eq("b", 2)
+    merged = MergeFieldConds().apply(And([FieldCond("a", [("$gt", 1)]), b2, FieldCond("a", [("$ne", 5)])]))
+    assert merged == And([FieldCond("a", [("$gt", 1), ("$ne", 5)]), b2])
+    # a repeated operator is not merged away
+    assert not MergeFieldConds().matches(And([FieldCond("a", [("$gt", 1)]), FieldCond("a", [("$gt", 4)])]))
+
+
+def test_pipeline_rules():
+    group, project = Stage("$group", {"_id": "$a"}), Stage("$project", {"a": 1})
+    match = Match(FieldCond.eq("a", 1))
+    lookup = Stage("$lookup", {"from": "b", "as": "b"})
+    assert PushMatchUp().apply([project, match]) == [match, project]
+    # the field comes out of the $group / $lookup
+    assert not PushMatchUp().matches([group, match])
+    assert PushMatchUp().apply([group, Match(FieldCond.eq("_id", 1))]) == [match, group]
+    assert not PushMatchUp().matches([Stage("$lookup", {"from": "b", "as": "a"}), match])
+    assert PushMatchUp().apply([lookup, match]) == [match, lookup]
+    assert MergeMatches().apply([match, Match(FieldCond.eq("b", 2))]) == [Match(And([match.condition,
+                                                                                      FieldCond.eq("b", 2)]))]
+    sort, limit = Stage("$sort", {"a": 1}), Stage("$limit", 5)
+    assert LimitBeforeReshape().apply([sort, project, limit]) == [sort, limit, project]
+    assert DropOverriddenSort().apply([Stage("$sort", {"b": 1}), sort]) == [sort]
+
+
+def test_engine_reaches_fixed_point_and_counts_hits():
+    engine = RuleEngine()
+    doc = {"$or": [{"$or": [{"age": 1}, {"age": 2}]}, {"age": 3}, {"age": 1}]}
+    assert engine.optimize_filter(doc) == {"age": {"$in": [1, 2, 3]}}
+    assert engine.hits["or_to_in"] >= 1
+    pipeline = [{"$sort": {"a": 1}}, {"$sort": {"b": -1}}, {"$project": {"b": 1}}, {"$set": {"c": 1}},
+                {"$skip": 2}, {"$limit": 5}]
+    assert engine.optimize_pipeline(pipeline) == [
+        {"$sort": {"b": -1}}, {"$skip": 2}, {"$limit": 5}, {"$project": {"b": 1}}, {"$set": {"c": 1}},
+    ]
+    assert engine.hits["drop_overridden_sort"] == 1 and engine.hits["limit_before_reshape"] == 4
+    # $match conditions inside pipelines are rewritten too
+    assert engine.optimize_pipeline([{"$match": {"$or": [{"a": 1}, {"a": 2}]}}]) == [{"$match": {"a": {"$in": [1, 2]}}}]
+
+
+def test_rule_sets_are_configurable():
+    engine = RuleEngine(filter_rules=[FlattenOr()], pipeline_rules=[])
+    assert engine.optimize_filter({"$or": [{"$or": [{"a": 1}]}, {"a": 2}]}) == {"$or": [{"a": 1}, {"a": 2}]}
+    assert engine.optimize_pipeline([{"$group": {"_id": "$a"}}, {"$match": {"a": 1}}])[0] == {"$group": {"_id": "$a"}}
+    assert set(engine.hits) == {"flatten_or"}
+
+
+def test_optimizer_hits_through_transpiler():
+    optimizer = MongoOptimizer()
+    transpiler = Transpiler(optimizer=optimizer)
+    res = transpiler.translate("SELECT * FROM users WHERE age > 3 AND age != 9 AND city = 'Pune';", SCHEMA)
+    assert res["filter"] == {"age": {"$gt": 3, "$ne": 9}, "city": "Pune"}
+    assert optimizer.hits["intersect_field_conds"] == 1 and "or_to_in" not in optimizer.hits
+
+
+DIFF_SCHEMA = {
+    "users": {"id": "int", "name": "string", "age": "int", "city": "string"},
+    "orders": {"order_id": "int", "user_id": "int", "amount": "int", "status": "string"},
+}
+
+DIFF_QUERIES = [
+    "SELECT city, COUNT(*) FROM users WHERE age > 30 GROUP BY city HAVING COUNT(*) > 2 AND city = 'Pune';",
+    "SELECT city, COUNT(*) FROM users GROUP BY city HAVING COUNT(*) > 3 OR city = 'Pune';",
+    "SELECT city, age, MAX(id) FROM users GROUP BY city, age HAVING age > 40 AND MAX(id) > 5 ORDER BY city;",
+    "SELECT city, COUNT(DISTINCT age) FROM users GROUP BY city HAVING COUNT(DISTINCT age) > 3 AND city != 'Goa';",
+    "SELECT status, SUM(amount) FROM orders WHERE amount > 10 GROUP BY status HAVING SUM(amount) > 100;",
+    "SELECT users.name, orders.amount FROM users JOIN orders ON users.id = orders.user_id "
+    "WHERE users.age > 40 OR orders.status = 'open';",
+    "SELECT users.name, orders.amount FROM users JOIN orders ON users.id = orders.user_id "
+    "WHERE users.age > 40 AND orders.status = 'open';",
+    "SELECT DISTINCT city, age FROM users WHERE age < 30;",
+]
+
+
+def diff_dataset():
+    rng = random.Random(5)
+    cities = ["Pune", "Goa", "Delhi", None]
+    return {
+        "users": [{"id": i, "name": f"u{i}", "age": rng.randrange(18, 70), "city": rng.choice(cities)}
+                  for i in range(60)],
+        "orders": [{"order_id": k, "user_id": rng.randrange(60), "amount": rng.randrange(100),
+                    "status": rng.choice(["open", "closed"])} for k in range(150)],
+    }
+
+
+@pytest.mark.parametrize("sql", DIFF_QUERIES)
+def test_reordered_pipelines_return_the_same_rows(sql):
+    unoptimized = Transpiler(optimizer=MongoOptimizer(RuleEngine(filter_rules=[], pipeline_rules=[])))
+    expected = evaluate(diff_dataset(), unoptimized.translate(sql, DIFF_SCHEMA))
+    assert expected
+    actual = evaluate(diff_dataset(), Transpiler().translate(sql, DIFF_SCHEMA))
+    assert sorted(map(repr, actual)) == sorted(map(repr, expected))
+
+
+def test_having_splits_on_group_keys():
+    pipeline = Transpiler().translate(DIFF_QUERIES[0], DIFF_SCHEMA)["pipeline"]
+    assert pipeline[:3] == [
+        {"$match": {"age": {"$gt": 30}, "city": "Pune"}},
+        {"$group": {"_id": "$city", "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 2}}},
+    ]
+    # an OR mixing a key and an aggregate can't run before $group
+    pipeline = Transpiler().translate(DIFF_QUERIES[1], DIFF_SCHEMA)["pipeline"]
+    assert "$group" in pipeline[0] and pipeline[1] == {"$match": {"$or": [{"_id": "Pune"}, {"count": {"$gt": 3}}]}}
+    # compound keys map back through _id.<col>
+    pipeline = Transpiler().translate(DIFF_QUERIES[2], DIFF_SCHEMA)["pipeline"]
+    assert pipeline[0] == {"$match": {"age": {"$gt": 40}}} and pipeline[2] == {"$match": {"max_id": {"$gt": 5}}}
+
+
+def test_equivalent_filters_normalize_identically():
+    translate = Transpiler().translate
+    variants = [
+        "SELECT id FROM users WHERE age = 1 OR age > 30 OR city = 'Goa';",
+        "SELECT id FROM users WHERE city = 'Goa' OR age > 30 OR age = 1;",
+        "SELECT id FROM users WHERE age > 30 OR city = 'Goa' OR age = 1;",
+    ]
+    strings = {translate(sql, DIFF_SCHEMA)["string"] for sql in variants}
+    assert strings == {'db.users.find({ $or: [ { age: 1 }, { age: { $gt: 30 } }, { city: "Goa" } ] }, { id: 1 })'}
+    assert translate("SELECT id FROM users WHERE name = 'x' AND age > 3;", DIFF_SCHEMA)["string"] == \
+        translate("SELECT id FROM users WHERE age > 3 AND name = 'x';", DIFF_SCHEMA)["string"]
+    # (city = 'Pune' AND age > 3) OR city = 'Pune' is just city = 'Pune'
+    res = translate("SELECT id FROM users WHERE city = 'Pune' AND age > 3 OR city = 'Pune';", DIFF_SCHEMA)
+    assert res["filter"] == {"city": "Pune"}
+    # a run of equalities on one field inside a wider OR
+    res = translate("SELECT id FROM users WHERE age = 1 OR city = 'Goa' OR age = 2 OR age = 3;", DIFF_SCHEMA)
+    assert res["filter"] == {"$or": [{"age": {"$in": [1, 2, 3]}}, {"city": "Goa"}]}
+
+
+def test_bound_plans_normalize_like_fresh_ones():
+    transpiler = Transpiler()
+    uncached = Transpiler(plan_cache_size=0)
+    transpiler.translate("SELECT id FROM users WHERE age = 5 OR age = 6;", DIFF_SCHEMA)
+    for sql in ["SELECT id FROM users WHERE age = 5 OR age = 5;", "SELECT id FROM users WHERE age = 7 OR age = 6;"]:
+        assert transpiler.translate(sql, DIFF_SCHEMA) == uncached.translate(sql, DIFF_SCHEMA)
+    assert transpiler.plan_cache.stats()["hits"] == 2
+    query = transpiler.compile("SELECT id FROM users WHERE age IN (?, ?);", DIFF_SCHEMA)
+    assert query.bind([4, 4])["filter"] == {"age": 4}
+    assert query.bind([5, 4])["filter"] == {"age": {"$in": [4, 5]}}
+
+
+def test_normalized_boolean_trees_return_the_same_rows():
+    rng = random.Random(8)
+    db = diff_dataset()
+    terms = ["age > {}", "age < {}", "age = {}", "city = 'Pune'", "city != 'Goa'", "id < {}", "name = 'u{}'"]
+    unoptimized = Transpiler(optimizer=MongoOptimizer(RuleEngine(filter_rules=[], pipeline_rules=[])),
+                             plan_cache_size=0)
+    optimized = Transpiler()
+    for _ in range(80):
+        sql = "SELECT id FROM users WHERE " + rng.choice(terms).format(rng.randrange(18, 70))
+        for _ in range(rng.randrange(2, 7)):
+            sql += rng.choice([" AND ", " OR "]) + rng.choice(terms).format(rng.randrange(18, 70))
+        expected = evaluate(db, unoptimized.translate(sql + ";", DIFF_SCHEMA))
+        assert evaluate(db, optimized.translate(sql + ";", DIFF_SCHEMA)) == expected, sql
@@ -0,0 +1,54 @@
+import json
+import pytest
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from sql2mongo.schema_cache import SchemaCache
+from sql2mongo.schema_loader import SchemaError
+from sql2mongo.transpiler import Transpiler
+
+SCHEMA = {
+    "users": {
+        "id": "int",
+        "name": "string",
+        "age": "int"
+    }
+}
+
+RAW = json.dumps(SCHEMA).encode("utf-8")
+
+def test_repeated_schema_is_parsed_once():
+    cache = SchemaCache()
+    first = cache.load(RAW)
+    assert cache.load(RAW) is first
+    assert first.catalog["users"] == SCHEMA["users"]
+    assert first.analyzer.schema is first.catalog
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_register_and_get_by_id():
+    cache = SchemaCache()
+    schema_id = cache.register(RAW)
+    entry = cache.get(schema_id)
+    assert entry.id == schema_id
+    results = Transpiler().transpile(entry.catalog, "SELECT name FROM users WHERE age > 3;", analyzer=entry.analyzer)
+    assert results == ['db.users.find({ age: { $gt: 3 } }, { name: 1 })']
+    with pytest.raises(SchemaError, match="Unknown schema id"):
+        cache.get("nope")
+
+def test_invalid_schema_is_not_cached():
+    cache = SchemaCache()
+    with pytest.raises(SchemaError, match="Invalid JSON"):
+        cache.load(b"{not json")
+    with pytest.raises(SchemaError, match="Invalid column type"):
+        cache.load_dict({"users": {"id": "float"}})
+    assert len(cache) == 0
+
+def test_lru_eviction():
+    cache = SchemaCache(maxsize=2)
+    ids = [cache.register(json.dumps({f"t{i}": {"id": "int"}})) for i in range(3)]
+    assert cache.stats()["evictions"] == 1
+    with pytest.raises(SchemaError):
+        cache.get(ids[0])
+    assert cache.load_dict(SCHEMA) is cache.load_dict(dict(SCHEMA))
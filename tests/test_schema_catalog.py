@@ -0,0 +1,74 @@
+import pytest
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from sql2mongo.schema_catalog import SchemaCatalog
+from sql2mongo.schema_loader import SchemaError, schema_hash, validate_schema
+from sql2mongo.semantic.semantic_analyzer import SemanticAnalyzer, SemanticError
+from sql2mongo.parser.sql_parser import get_parser
+
+SCHEMA = {
+    "users": {
+        "id": "int",
+        "name": "string",
+        "age": "int"
+    },
+    "orders": {
+        "id": "int",
+        "user_id": "int",
+        "amount": "int"
+    }
+}
+
+def test_lookups():
+    catalog = SchemaCatalog(SCHEMA)
+    assert "users" in catalog and "items" not in catalog
+    assert catalog["orders"] == SCHEMA["orders"]
+    assert catalog.column_type("users", "name") == "string"
+    assert catalog.column_type("users", "amount") is None
+    assert catalog.tables_with("id") == ("users", "orders")
+    assert catalog.resolve("amount", ["users", "orders"]) == ["orders"]
+    assert catalog.resolve("missing", ["users"]) == []
+
+def test_hash_is_content_based():
+    reordered = {"orders": dict(reversed(list(SCHEMA["orders"].items()))), "users": SCHEMA["users"]}
+    assert SchemaCatalog(SCHEMA).hash == SchemaCatalog(reordered).hash == schema_hash(SCHEMA)
+    assert SchemaCatalog(SCHEMA) == SchemaCatalog(reordered)
+    assert SchemaCatalog.of(SchemaCatalog(SCHEMA)).hash == schema_hash(SCHEMA)
+
+def test_large_schema():
+    schema = {f"t{i}": {f"c{i}_{j}": "int" for j in range(20)} for i in range(3000)}
+    schema["t0"]["shared"] = "string"
+    schema["t2999"]["shared"] = "string"
+    catalog = SchemaCatalog(schema)
+    assert catalog.tables_with("c1500_7") == ("t1500",)
+    assert catalog.resolve("shared", ["t0", "t5"]) == ["t0"]
+
+    parser = get_parser()
+    analyzer = SemanticAnalyzer(catalog)
+    assert analyzer.schema is catalog
+    analyzer.validate_query(parser.parse("SELECT c1500_7 FROM t1500 WHERE c1500_3 > 2;"))
+    with pytest.raises(SemanticError, match="Column 'c1_1' not found"):
+        analyzer.validate_query(parser.parse("SELECT c1500_7 FROM t1500 WHERE c1_1 > 2;"))
+
+def test_stats():
+    schema = dict(SCHEMA, **{"$stats": {"orders": {"rows": 5000, "selectivity": {"amount": 0.2}}}})
+    catalog = SchemaCatalog(validate_schema(schema))
+    assert list(catalog) == ["users", "orders"]
+    assert catalog.rows("orders") == 5000 and catalog.rows("users") is None
+    assert catalog.selectivity("orders", "amount") == 0.2
+    # statistics change plans, so they change the hash too
+    assert catalog.hash == schema_hash(schema) != SchemaCatalog(SCHEMA).hash
+    assert catalog.with_stats({"users": {"rows": 10}}).rows("users") == 10
+    with pytest.raises(SchemaError, match="Invalid selectivity"):
+        validate_schema(dict(SCHEMA, **{"$stats": {"orders": {"selectivity": {"amount": 2}}}}))
+    with pytest.raises(SchemaError, match="Invalid row count"):
+        validate_schema(dict(SCHEMA, **{"$stats": {"orders": {"rows": -1}}}))
+    assert SchemaCatalog(dict(SCHEMA, **{"$stats": {"orders": {"distinct": {"status": 4}}}})).cardinality("orders", "status") == 4
+    assert SchemaCatalog(dict(SCHEMA, **{"$stats": {"orders": {"indexes": [["status"]]}}})).indexes("orders") == [["status"]]
+    with pytest.raises(SchemaError, match="Invalid indexes"):
+        validate_schema(dict(SCHEMA, **{"$stats": {"orders": {"indexes": ["status"]}}}))
+    with pytest.raises(SchemaError, match="Invalid distinct count"):
+        validate_schema(dict(SCHEMA, **{"$stats": {"orders": {"distinct": {"status": 1.5}}}}))
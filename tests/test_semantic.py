@@ -7,6 +7,8 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'
 
 from sql2mongo.parser.sql_parser import get_parser
 from sql2mongo.semantic.semantic_analyzer import SemanticAnalyzer, SemanticError
+from sql2mongo.codegen.mongodb_generator import MongoDBGenerator
+from sql2mongo.ast.nodes import ColumnRef
 
 SCHEMA = {
     "users": {
@@ -75,3 +77,64 @@ def test_duplicate_columns(parser, analyzer):
     ast = parser.parse(sql)
     with pytest.raises(SemanticError, match="Duplicate column 'name'"):
         analyzer.validate_query(ast)
+
+def test_bound_tree_is_fully_resolved(parser, analyzer):
+    sql = "SELECT name, amount FROM users JOIN orders ON id = user_id WHERE amount > 5 AND city = 'Pune';"
+    bound = analyzer.validate_query(parser.parse(sql)).bound
+    assert bound.columns == (ColumnRef("users", "name", "string"), ColumnRef("orders", "amount", "int"))
+    condition = bound.joins[0].condition
+    assert (condition.identifier, condition.value) == (ColumnRef("users", "id", "int"), ColumnRef("orders", "user_id", "int"))
+    assert bound.where.left.identifier == ColumnRef("orders", "amount", "int")
+    assert bound.where.right.identifier == ColumnRef("users", "city", "string")
+
+def test_bound_order_by(parser, analyzer):
+    sql = "SELECT name, amount FROM users JOIN orders ON id = user_id ORDER BY amount DESC, id;"
+    bound = analyzer.validate_query(parser.parse(sql)).bound
+    assert [(item.column, item.direction) for item in bound.order_by] == [
+        (ColumnRef("orders", "amount", "int"), "DESC"), (ColumnRef("users", "id", "int"), "ASC")]
+    # output names of grouped queries are no table's column
+    sql = "SELECT city, MAX(age) FROM users GROUP BY city ORDER BY max_age;"
+    assert analyzer.validate_query(parser.parse(sql)).bound.order_by[0].column == "max_age"
+
+def test_bound_subquery(parser, analyzer):
+    analysis = analyzer.validate_query(parser.parse("SELECT name FROM users WHERE id IN (SELECT user_id FROM orders);"))
+    assert analysis.has_in_subquery
+    assert analysis.bound.where.identifier == ColumnRef("users", "id", "int")
+    assert analysis.bound.where.value.columns == (ColumnRef("orders", "user_id", "int"),)
+    with pytest.raises(SemanticError, match="Column 'nope' not found"):
+        analyzer.validate_query(parser.parse("SELECT name FROM users WHERE nope IN (SELECT user_id FROM orders);"))
+
+def test_generator_uses_bound_tree(parser, analyzer):
+    sql = "SELECT name, amount FROM users JOIN orders ON users.id = orders.user_id WHERE amount > 5;"
+    ast = parser.parse(sql)
+    pipeline = MongoDBGenerator().generate(ast, analyzer.validate_query(ast))["pipeline"]
+    # unqualified join-table columns resolve to the joined table and filter inside $lookup
+    lookup = next(stage["$lookup"] for stage in pipeline if "$lookup" in stage)
+    assert lookup["pipeline"][0] == {"$match": {"amount": {"$gt": 5}}}
+    assert {"$addFields": {"amount": "$orders.amount"}} in pipeline
+
+def test_join_chain(parser):
+    analyzer = SemanticAnalyzer(dict(SCHEMA, items={"order_id": "int", "qty": "int"}))
+    sql = ("SELECT name, qty FROM users JOIN orders ON users.id = orders.user_id "
+           "JOIN items ON items.order_id = orders.order_id WHERE qty > 1;")
+    bound = analyzer.validate_query(parser.parse(sql)).bound
+    assert bound.columns == (ColumnRef("users", "name", "string"), ColumnRef("items", "qty", "int"))
+    assert bound.where.identifier.table == "items"
+    with pytest.raises(SemanticError, match="JOIN condition for 'orders'"):
+        analyzer.validate_query(parser.parse(
+            "SELECT name FROM users JOIN orders ON items.order_id = orders.order_id "
+            "JOIN items ON items.order_id = orders.order_id;"))
+    with pytest.raises(SemanticError, match="only once"):
+        analyzer.validate_query(parser.parse(
+            "SELECT name FROM users JOIN orders ON users.id = orders.user_id JOIN users ON users.id = orders.user_id;"))
+
+def test_distinct_rules(parser, analyzer):
+    analyzer.validate_query(parser.parse("SELECT DISTINCT name, age FROM users ORDER BY age;"))
+    analyzer.validate_query(parser.parse("SELECT COUNT(DISTINCT age), COUNT(age) FROM users;"))
+    for sql, message in [
+        ("SELECT DISTINCT * FROM users;", "column list"),
+        ("SELECT DISTINCT COUNT(age) FROM users;", "GROUP BY or aggregates"),
+        ("SELECT DISTINCT name FROM users ORDER BY age;", "must appear in the SELECT DISTINCT list"),
+    ]:
+        with pytest.raises(SemanticError, match=message):
+            analyzer.validate_query(parser.parse(sql))
@@ -0,0 +1,118 @@
+import sys
+import os
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from sql2mongo.codegen.evaluator import evaluate
+from sql2mongo.codegen.mongodb_generator import MongoDBGenerator
+from sql2mongo.codegen.semi_join import LOOKUP, DISTINCT, TEMP, Prepared, choose_strategy
+from sql2mongo.schema_catalog import SchemaCatalog
+from sql2mongo.transpiler import Transpiler
+
+SCHEMA = {
+    "users": {"id": "int", "name": "string", "age": "int"},
+    "orders": {"order_id": "int", "user_id": "int", "amount": "int"},
+}
+
+FILTERED = "SELECT name FROM users WHERE id IN (SELECT user_id FROM orders WHERE amount > 100);"
+GROUPED = ("SELECT * FROM users WHERE age > 18 AND id IN "
+           "(SELECT user_id FROM orders GROUP BY user_id HAVING COUNT(*) > 2) ORDER BY name DESC;")
+
+
+def dataset():
+    return {
+        "users": [{"id": i, "name": f"u{i}", "age": 18 + i} for i in range(8)],
+        "orders": [{"order_id": k, "user_id": k % 5, "amount": k * 10} for k in range(14)],
+    }
+
+
+def translate(sql, strategy=None, schema=SCHEMA):
+    return Transpiler(generator=MongoDBGenerator(semi_join=strategy)).translate(sql, schema)
+
+
+@pytest.mark.parametrize("sql", [FILTERED, GROUPED])
+def test_strategies_return_the_same_rows(sql):
+    db = dataset()
+    results = [evaluate(db, translate(sql, strategy)) for strategy in (LOOKUP, DISTINCT, TEMP)]
+    assert results[0]
+    assert results[1] == results[0] and results[2] == results[0]
+    # temporary collections are dropped after the run
+    assert set(db) == {"users", "orders"}
+
+
+@pytest.mark.parametrize("sql, expected", [
+    ("SELECT COUNT(*) FROM users WHERE id IN (SELECT user_id FROM orders);", [{"count": 5}]),
+    ("SELECT COUNT(*) FROM users WHERE age > 90 AND id IN (SELECT user_id FROM orders);", [{"count": 0}]),
+    ("SELECT age, COUNT(*) FROM users WHERE id IN (SELECT user_id FROM orders WHERE amount > 100) GROUP BY age "
+     "ORDER BY age;", [{"age": 19, "count": 1}, {"age": 20, "count": 1}, {"age": 21, "count": 1}]),
+    ("SELECT DISTINCT age FROM users WHERE id IN (SELECT user_id FROM orders WHERE amount > 110) ORDER BY age;",
+     [{"age": 20}, {"age": 21}]),
+    ("SELECT users.name, orders.amount FROM users JOIN orders ON users.id = orders.user_id "
+     "WHERE users.id IN (SELECT user_id FROM orders WHERE amount > 120) AND orders.amount > 50;",
+     [{"name": "u3", "amount": 80}, {"name": "u3", "amount": 130}]),
+])
+def test_semi_join_runs_ahead_of_grouping_counts_and_joins(sql, expected):
+    for strategy in (LOOKUP, DISTINCT, TEMP):
+        db = dataset()
+        assert evaluate(db, translate(sql, strategy)) == expected, strategy
+        assert set(db) == {"users", "orders"}
+
+
+def test_subquery_filter_is_applied():
+    # only orders 11, 12 and 13 are over 100
+    assert [doc["name"] for doc in evaluate(dataset(), translate(FILTERED))] == ["u1", "u2", "u3"]
+    # users 0-3 have three orders each, user 4 has two
+    assert [doc["name"] for doc in evaluate(dataset(), translate(GROUPED))] == ["u3", "u2", "u1"]
+
+
+def test_prepare_steps_render_and_cache():
+    plan = translate(FILTERED, DISTINCT)
+    assert plan["prepare"] == [{"name": "in_0", "collection": "orders", "distinct": "user_id",
+                                "filter": {"amount": {"$gt": 100}}}]
+    assert plan["filter"] == {"id": {"$in": Prepared("in_0")}}
+    assert plan["string"].splitlines() == [
+        'const in_0 = db.orders.distinct("user_id", { amount: { $gt: 100 } });',
+        "db.users.find({ id: { $in: in_0 } }, { name: 1 })",
+    ]
+    temp = translate(FILTERED, TEMP)
+    assert temp["string"].splitlines()[-1] == "db.getCollection(tmp_0).drop();"
+    # a cached template keeps the placeholders and rebinds the literals
+    transpiler = Transpiler(generator=MongoDBGenerator(semi_join=DISTINCT))
+    transpiler.translate(FILTERED, SCHEMA)
+    again = transpiler.translate(FILTERED.replace("100", "120"), SCHEMA)
+    assert again["prepare"][0]["filter"] == {"amount": {"$gt": 120}}
+    assert again["filter"] == {"id": {"$in": Prepared("in_0")}}
+    assert sorted(doc["name"] for doc in evaluate(dataset(), again)) == ["u3"]
+
+
+def test_choose_strategy():
+    def choose(outer, sub, grouped=False):
+        catalog = SchemaCatalog(SCHEMA, {"users": {"rows": outer}, "orders": {"rows": sub}})
+        return choose_strategy(catalog, "users", [], "orders", "user_id", [], grouped)
+
+    assert choose_strategy(None, "users", [], "orders", "user_id", [], False) == LOOKUP
+    assert choose_strategy(SchemaCatalog(SCHEMA), "users", [], "orders", "user_id", [], False) == LOOKUP
+    # a few outer documents: probing is cheapest
+    assert choose(10, 1000000) == LOOKUP
+    # many outer documents, a small subquery result: inline it
+    assert choose(1000000, 5000) == DISTINCT
+    # too many values to inline
+    assert choose(1000000, 200000) == TEMP
+    # the catalog's distinct counts win over guessing from the column name
+    stats = {"users": {"rows": 1000000}, "orders": {"rows": 200000, "distinct": {"user_id": 5000, "id": 5000}}}
+    assert choose_strategy(SchemaCatalog(SCHEMA, stats), "users", [], "orders", "user_id", [], False) == DISTINCT
+    assert choose_strategy(SchemaCatalog(SCHEMA, stats), "users", [], "orders", "id", [], False) == DISTINCT
+    # a filter estimated to keep nothing still costs every strategy
+    stats = {"orders": {"rows": 500, "selectivity": {"amount": 0.0}}}
+    plan = Transpiler().translate(FILTERED, dict(SCHEMA, **{"$stats": stats}))
+    assert evaluate(dataset(), plan) == evaluate(dataset(), translate(FILTERED))
+
+
+def test_unsupported_in_subquery():
+    with pytest.raises(ValueError):
+        translate("SELECT name FROM users WHERE age > 20 OR id IN (SELECT user_id FROM orders);")
+    # the semi-join runs before the join, on the FROM table
+    with pytest.raises(ValueError, match="must test a column of 'users'"):
+        translate("SELECT users.name FROM users JOIN orders ON users.id = orders.user_id "
+                  "WHERE orders.order_id IN (SELECT user_id FROM orders);")
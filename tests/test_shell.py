@@ -0,0 +1,68 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from sql2mongo.codegen.shell import MongoQuery, format_shell
+from sql2mongo.codegen.optimizer import MongoOptimizer
+from sql2mongo.codegen.semi_join import Prepared
+from sql2mongo.transpiler import Transpiler
+
+SCHEMA = {
+    "users": {
+        "id": "int",
+        "name": "string",
+        "age": "int",
+        "city": "string"
+    }
+}
+
+def test_format_shell():
+    assert format_shell({}) == "{  }"
+    assert format_shell({"age": {"$gt": 5}, "city": "Delhi"}) == '{ age: { $gt: 5 }, city: "Delhi" }'
+    assert format_shell({"id": {"$in": [3, 1]}, "c": {"$in": ["a", "b"]}}) == '{ id: { $in: [ 3, 1 ] }, c: { $in: [ "a", "b" ] } }'
+    assert format_shell([{"$match": {"a": []}}, 1, "x", None]) == '[ { $match: { a: [  ] } }, 1, "x", null ]'
+    assert format_shell({"$or": [{"a": 1}, {"$and": [{"b": "x"}, {"c": [1, "y"]}]}]}) == \
+        '{ $or: [ { a: 1 }, { $and: [ { b: "x" }, { c: [ 1, "y" ] } ] } ] }'
+
+def test_format_shell_deep_document():
+    doc = {"age": 1}
+    for _ in range(5000):
+        doc = {"$and": [doc]}
+    text = format_shell(doc)
+    assert text.startswith("{ $and: [ { $and: [") and text.count("$and") == 5000
+
+def test_string_is_rendered_lazily():
+    query = MongoQuery(collection="users", filter={"age": {"$gt": 5}}, projection=None)
+    assert "string" not in dict(query)
+    assert "string" in query
+    assert query["string"] == "db.users.find({ age: { $gt: 5 } })"
+    assert dict(query)["string"] is query.get("string")
+    query["filter"]["age"]["$gt"] = 6
+    assert query.invalidate()["string"] == "db.users.find({ age: { $gt: 6 } })"
+
+def test_optimize_and_translate_render_on_access():
+    transpiler = Transpiler()
+    res = transpiler.translate("SELECT name FROM users WHERE age > 5 AND city = 'Pune';", SCHEMA)
+    assert "string" not in dict(res)
+    assert res["string"] == 'db.users.find({ age: { $gt: 5 }, city: "Pune" }, { name: 1 })'
+    data = MongoQuery(collection="users", filter={"$or": [{"age": 1}, {"age": 2}]}, projection=None)
+    before = data["string"]
+    after = MongoOptimizer().optimize(data)["string"]
+    assert before != after and after == "db.users.find({ age: { $in: [ 1, 2 ] } })"
+
+def test_pipelines_render_as_mongosh():
+    query = MongoQuery(collection="users", pipeline=[{"$match": {"$expr": False, "id": {"$ne": None}}},
+                                                     {"$count": "n"}])
+    assert query["string"] == 'db.users.aggregate([ { $match: { $expr: false, id: { $ne: null } } }, { $count: "n" } ])'
+    # dotted paths are not identifiers: quoted
+    assert format_shell({"$sort": {"orders.amount": -1, "_id": 1}}) == '{ $sort: { "orders.amount": -1, _id: 1 } }'
+    prepared = MongoQuery(collection="users", pipeline=[{"$lookup": {"from": Prepared("tmp_0"), "as": "m"}}],
+                          prepare=[{"name": "tmp_0", "collection": "orders", "temp": True,
+                                    "pipeline": [{"$match": {"a": None}}, {"$out": Prepared("tmp_0")}]}])
+    assert prepared["string"].splitlines() == [
+        'const tmp_0 = "tmp_0_" + new ObjectId().toString();',
+        "db.orders.aggregate([ { $match: { a: null } }, { $out: tmp_0 } ]);",
+        'db.users.aggregate([ { $lookup: { from: tmp_0, as: "m" } } ])',
+        "db.getCollection(tmp_0).drop();",
+    ]
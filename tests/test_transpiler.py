@@ -0,0 +1,48 @@
+import pytest
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from sql2mongo.cli import transpile
+from sql2mongo.transpiler import Transpiler, get_transpiler
+
+SCHEMA = {
+    "users": {
+        "id": "int",
+        "name": "string",
+        "age": "int",
+        "city": "string"
+    },
+    "orders": {
+        "order_id": "int",
+        "user_id": "int",
+        "amount": "int"
+    }
+}
+
+@pytest.fixture
+def transpiler():
+    return Transpiler()
+
+def test_translate_find(transpiler):
+    res = transpiler.translate("SELECT * FROM users WHERE age > 30;", SCHEMA)
+    assert res["filter"] == {"age": {"$gt": 30}}
+
+def test_parser_is_reused(transpiler):
+    parser = transpiler.parser
+    transpiler.translate("SELECT * FROM users;", SCHEMA)
+    transpiler.translate("SELECT name FROM users WHERE age = 1;", SCHEMA)
+    assert transpiler.parser is parser
+
+def test_transpile_multiple_statements(transpiler):
+    results = transpiler.transpile(SCHEMA, "SELECT * FROM users; SELECT * FROM nope;")
+    assert results[0].replace(" ", "") == "db.users.find({})"
+    assert results[1].startswith("Error: ")
+
+def test_cli_transpile_uses_shared_transpiler():
+    first = get_transpiler()
+    transpile(SCHEMA, "SELECT * FROM users;")
+    assert get_transpiler() is first
+    assert transpile(SCHEMA, "SELECT * FROM users WHERE age > 31;") == \
+        Transpiler().transpile(SCHEMA, "SELECT * FROM users WHERE age > 31;")
@@ -8,6 +8,7 @@ from sql2mongo.parser.sql_parser import get_parser
 from sql2mongo.semantic.semantic_analyzer import SemanticAnalyzer
 from sql2mongo.codegen.mongodb_generator import MongoDBGenerator
 from sql2mongo.codegen.optimizer import MongoOptimizer
+from sql2mongo.transpiler import Transpiler
 
 SCHEMA = {
     "users": {
@@ -25,6 +26,9 @@ SCHEMA = {
     }
 }
 
+# the distinct command is used when statistics expect few values
+FEW_CITIES = dict(SCHEMA, **{"$stats": {"users": {"distinct": {"city": 40}}}})
+
 @pytest.fixture
 def transpiler():
     parser = get_parser()
@@ -110,6 +114,13 @@ def test_limit_only(transpiler):
     res = transpiler("SELECT * FROM users LIMIT 10;")
     assert res["limit"] == 10
 
+def test_limit_offset(transpiler):
+    res = transpiler("SELECT name FROM users ORDER BY age LIMIT 10 OFFSET 20;")
+    assert res["skip"] == 20 and res["limit"] == 10
+    assert res["string"] == "db.users.find({}, { name: 1 }).sort({ age: 1 }).skip(20).limit(10)"
+    res = transpiler("SELECT city, COUNT(*) FROM users GROUP BY city ORDER BY city LIMIT 5 OFFSET 5;")
+    assert res["pipeline"][-3:-1] == [{"$skip": 5}, {"$limit": 5}]
+
 def test_order_by_limit_combined(transpiler):
     res = transpiler("SELECT * FROM users WHERE age > 20 ORDER BY balance DESC LIMIT 5;")
     assert res["limit"] == 5
@@ -143,6 +154,40 @@ def test_count_column(transpiler):
     assert "$sum" in group_stage["count_age"]
     assert "$cond" in group_stage["count_age"]["$sum"]
 
+def test_ungrouped_count_fast_path(transpiler):
+    res = transpiler("SELECT COUNT(*) FROM users;")
+    assert "pipeline" not in res and "filter" not in res
+    assert res["count"] == "count"
+    assert res["string"] == "db.users.estimatedDocumentCount()"
+    res = transpiler("SELECT COUNT(age) FROM users WHERE city = 'Pune';")
+    assert res["count"] == "count_age"
+    assert res["string"] == 'db.users.countDocuments({ age: { $ne: null }, city: "Pune" })'
+
+def test_select_distinct(transpiler):
+    res = Transpiler().translate("SELECT DISTINCT city FROM users WHERE age > 30;", FEW_CITIES)
+    assert res["distinct"] == "city" and res["filter"] == {"age": {"$gt": 30}}
+    assert res["string"] == 'db.users.distinct("city", { age: { $gt: 30 } })'
+    # several columns, or a sort, need the $group pipeline
+    res = transpiler("SELECT DISTINCT city, age FROM users WHERE age > 30 ORDER BY city;")
+    assert res["pipeline"] == [
+        {"$match": {"age": {"$gt": 30}}},
+        {"$group": {"_id": {"city": "$city", "age": "$age"}}},
+        {"$sort": {"_id.city": 1}},
+        {"$project": {"city": "$_id.city", "age": "$_id.age", "_id": 0}},
+    ]
+    # without a cardinality hint the values may not fit in one reply
+    assert "pipeline" in transpiler("SELECT DISTINCT user_id FROM orders;")
+    assert "pipeline" in transpiler("SELECT DISTINCT city FROM users;")
+
+def test_count_distinct(transpiler):
+    res = Transpiler().translate("SELECT COUNT(DISTINCT city) FROM users;", FEW_CITIES)
+    assert res["string"] == 'db.users.distinct("city", { city: { $ne: null } }).length'
+    res = transpiler("SELECT COUNT(DISTINCT city) FROM users;")
+    assert res["pipeline"][-1] == {"$count": "count_distinct_city"}
+    res = transpiler("SELECT age, COUNT(DISTINCT city) FROM users GROUP BY age;")
+    group_stage = next(stage["$group"] for stage in res["pipeline"] if "$group" in stage)
+    assert group_stage["count_distinct_city"] == {"$addToSet": "$city"}
+
 def test_multiple_aggregates(transpiler):
     res = transpiler("SELECT city, SUM(balance), AVG(age), MIN(id), MAX(balance) FROM users GROUP BY city;")
     pipeline = res["pipeline"]
@@ -205,6 +250,34 @@ def test_join_with_extra_filters(transpiler):
     assert "age" in str(match)
 
 
+def test_join_predicate_pushdown(transpiler):
+    res = transpiler("SELECT users.name, orders.amount FROM users JOIN orders ON users.id = orders.user_id "
+                     "WHERE users.age > 20 AND orders.status = 'open';")
+    pipeline = res["pipeline"]
+    # users filter runs before $lookup, orders filter inside it
+    assert pipeline[0] == {"$match": {"age": {"$gt": 20}}}
+    assert pipeline[1]["$lookup"]["pipeline"][0] == {"$match": {"status": "open"}}
+    assert sum("$match" in stage for stage in pipeline) == 1
+
+def test_join_mixed_predicate_stays_after_unwind(transpiler):
+    res = transpiler("SELECT users.name, orders.amount FROM users JOIN orders ON users.id = orders.user_id "
+                     "WHERE users.age > 20 OR orders.status = 'open';")
+    pipeline = res["pipeline"]
+    stages = [next(iter(stage)) for stage in pipeline]
+    assert stages.index("$match") > stages.index("$unwind")
+    assert all("$match" not in stage for stage in pipeline[stages.index("$lookup")]["$lookup"]["pipeline"])
+
+def test_join_projection_pushdown(transpiler):
+    res = transpiler("SELECT users.name, orders.amount FROM users JOIN orders ON users.id = orders.user_id "
+                     "WHERE orders.status = 'open';")
+    lookup = next(stage["$lookup"] for stage in res["pipeline"] if "$lookup" in stage)
+    # joined orders carry only the selected column and the join key
+    assert lookup["pipeline"][-1] == {"$project": {"amount": 1, "user_id": 1, "_id": 0}}
+    res = transpiler("SELECT * FROM users JOIN orders ON users.id = orders.user_id;")
+    lookup = next(stage["$lookup"] for stage in res["pipeline"] if "$lookup" in stage)
+    assert "pipeline" not in lookup
+
+
 # ----------------- SUBQUERIES -----------------
 def test_in_subquery(transpiler):
     res = transpiler("SELECT * FROM users WHERE id IN (SELECT user_id FROM orders);")
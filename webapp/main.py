@@ -11,6 +11,8 @@ from sql2mongo.parser.sql_parser import get_parser
 from sql2mongo.semantic.semantic_analyzer import SemanticAnalyzer
 from sql2mongo.codegen.mongodb_generator import MongoDBGenerator
 from sql2mongo.codegen.optimizer import MongoOptimizer
+from sql2mongo.schema_cache import get_schema_cache
+from sql2mongo.schema_loader import SchemaError
 
 app = FastAPI(title="SQL to MongoDB Web Transpiler")
 
@@ -23,19 +25,33 @@ templates = Jinja2Templates(directory=os.path.join(BASE_DIR, "templates"))
 async def index(request: Request):
     return templates.TemplateResponse(request=request, name="index.html")
 
+@app.post("/schemas")
+async def register_schema(schema: UploadFile = File(...)):
+    try:
+        # Parse once; later /transpile calls can send just the returned schema_id
+        content = await schema.read()
+        return {"schema_id": get_schema_cache().register(content)}
+    except SchemaError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
 @app.post("/transpile")
-async def transpile_endpoint(schema: UploadFile = File(...), query: str = Form(...)):
+async def transpile_endpoint(schema: UploadFile = File(None), schema_id: str = Form(None), query: str = Form(...)):
     try:
-        from sql2mongo.cli import transpile
+        from sql2mongo.transpiler import get_transpiler
 
-        # Load constraints
-        content = await schema.read()
-        schema_dict = json.loads(content)
+        # Load constraints (cached on the raw schema bytes)
+        cache = get_schema_cache()
+        if schema_id:
+            entry = cache.get(schema_id)
+        elif schema is not None:
+            entry = cache.load(await schema.read())
+        else:
+            return JSONResponse(status_code=400, content={"error": "Missing schema or schema_id"})
 
         # Build pipeline sequence evaluating string arrays securely gracefully bypassing breaks
-        results = transpile(schema_dict, query)
+        results = get_transpiler().transpile(entry.catalog, query, analyzer=entry.analyzer)
 
-        return {"queries": results}
+        return {"queries": results, "schema_id": entry.id}
 
     except Exception as e:
         # Pass Exception natively back to user to help format their SQL cleanly